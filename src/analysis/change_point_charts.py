@@ -0,0 +1,313 @@
+"""
+Change point charts for Brent oil price analysis.
+The price and returns panels form a base layer that is rendered once per
+dataset and figure size and cached as an image; change points are drawn on
+a reusable transparent overlay template (one scatter collection plus labels
+culled so they never overlap) and composited onto the cached base.
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Bump when the base layer's appearance changes to invalidate cached images
+BASE_LAYER_VERSION = 1
+
+LABEL_OFFSET = (10, 10)  # points from the marker
+LABEL_STYLE = {
+    'fontsize': 8,
+    'bbox': dict(boxstyle='round,pad=0.3', facecolor='yellow', alpha=0.7)
+}
+LABEL_SAMPLE = 'CP: 0000-00'
+
+def _figure(figsize, dpi):
+    """Agg figure detached from pyplot, so templates outlive plt.close('all')."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    return fig
+
+def cull_labels(anchors, size, offset, bounds, order):
+    """
+    Greedily keep labels whose boxes do not overlap an already kept label.
+
+    Args:
+        anchors (np.ndarray): (n x 2) marker positions in pixels
+        size (tuple): Label box (width, height) in pixels
+        offset (tuple): Label box offset from its marker in pixels
+        bounds (tuple): (x0, y0, x1, y1) area labels must stay inside
+        order (np.ndarray): Candidate positions, highest priority first
+
+    Returns:
+        np.ndarray: Sorted positions of the kept labels
+    """
+    lower_left = np.asarray(anchors, dtype=np.float64) + offset
+    upper_right = lower_left + size
+    inside = ((lower_left[:, 0] >= bounds[0]) & (lower_left[:, 1] >= bounds[1]) &
+              (upper_right[:, 0] <= bounds[2]) & (upper_right[:, 1] <= bounds[3]))
+
+    boxes = np.empty((len(lower_left), 4))
+    kept = []
+    for i in order:
+        if not inside[i]:
+            continue
+        placed = boxes[:len(kept)]
+        if np.any((placed[:, 0] < upper_right[i, 0]) & (lower_left[i, 0] < placed[:, 2]) &
+                  (placed[:, 1] < upper_right[i, 1]) & (lower_left[i, 1] < placed[:, 3])):
+            continue
+        boxes[len(kept)] = (*lower_left[i], *upper_right[i])
+        kept.append(i)
+    return np.sort(np.asarray(kept, dtype=np.int64))
+
+class ChangePointChart:
+    """
+    Price/returns chart with a cached base layer and a redrawable change point overlay.
+
+    Base layers are cached on disk under cache_dir when it is set.
+
+    Attributes:
+        key (str): Hash of the plotted data and figure settings naming the cached base layer
+    """
+
+    def __init__(self, df, figsize=(15, 10), dpi=300, cache_dir=None):
+        self.dates = pd.DatetimeIndex(df.index)
+        self.prices = df['Price'].to_numpy(dtype=np.float64)
+        self.returns = df['log_returns'].to_numpy(dtype=np.float64)
+        self.figsize = tuple(figsize)
+        self.dpi = dpi
+        self.cache_dir = cache_dir
+        self.key = self._cache_key()
+        self._base = None
+        self._layout = None
+        self._overlay = None
+        self._labels = []
+        self._label_box = None
+
+    def _cache_key(self):
+        digest = hashlib.sha256()
+        for values in (self.dates.as_unit('ns').asi8, self.prices, self.returns):
+            digest.update(np.ascontiguousarray(values).tobytes())
+        digest.update(repr((self.figsize, self.dpi, BASE_LAYER_VERSION)).encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    def _draw_base(self):
+        """Render the price and returns panels; return the image and the price axes layout."""
+        fig = _figure(self.figsize, self.dpi)
+        ax1, ax2 = fig.subplots(2, 1)
+
+        ax1.plot(self.dates, self.prices, linewidth=0.5, alpha=0.8, label='Brent Oil Price')
+        ax1.set_title('Brent Oil Prices with Detected Change Points', fontsize=14, fontweight='bold')
+        ax1.set_ylabel('Price (USD/barrel)')
+        ax1.grid(True, alpha=0.3)
+        ax1.legend()
+
+        ax2.plot(self.dates, self.returns, linewidth=0.5, alpha=0.8, color='orange', label='Log Returns')
+        ax2.set_title('Log Returns', fontsize=14, fontweight='bold')
+        ax2.set_ylabel('Log Returns')
+        ax2.set_xlabel('Date')
+        ax2.grid(True, alpha=0.3)
+        ax2.legend()
+
+        fig.tight_layout()
+        fig.canvas.draw()
+        image = np.asarray(fig.canvas.buffer_rgba())[..., :3].copy()
+        layout = {
+            'position': list(ax1.get_position().bounds),
+            'xlim': list(ax1.get_xlim()),
+            'ylim': list(ax1.get_ylim())
+        }
+        return image, layout
+
+    def base_layer(self):
+        """
+        Base layer image and price axes layout, from memory, the disk cache or a fresh render.
+
+        Returns:
+            tuple: (RGB uint8 image, layout dict with position, xlim and ylim)
+        """
+        if self._base is not None:
+            return self._base, self._layout
+        from PIL import Image
+
+        image_path = meta_path = None
+        if self.cache_dir is not None:
+            image_path = os.path.join(self.cache_dir, f'base_{self.key}.png')
+            meta_path = os.path.join(self.cache_dir, f'base_{self.key}.json')
+
+        if image_path is not None and os.path.exists(image_path) and os.path.exists(meta_path):
+            with open(meta_path) as f:
+                self._layout = json.load(f)
+            with Image.open(image_path) as image:
+                self._base = np.asarray(image.convert('RGB'))
+            return self._base, self._layout
+
+        print("Rendering chart base layer...")
+        self._base, self._layout = self._draw_base()
+        if image_path is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            Image.fromarray(self._base).save(image_path, compress_level=1)
+            with open(meta_path, 'w') as f:
+                json.dump(self._layout, f)
+        return self._base, self._layout
+
+    def _overlay_template(self):
+        """Transparent figure whose only axes coincide with the base layer's price axes."""
+        if self._overlay is None:
+            _, layout = self.base_layer()
+            fig = _figure(self.figsize, self.dpi)
+            fig.patch.set_alpha(0)
+            ax = fig.add_axes(layout['position'])
+            ax.set_axis_off()
+            ax.set_xlim(layout['xlim'])
+            ax.set_ylim(layout['ylim'])
+            ax.set_autoscale_on(False)
+            markers = ax.scatter(np.empty(0), np.empty(0), color='red', s=50, zorder=5)
+            self._overlay = (fig, ax, markers)
+        return self._overlay
+
+    def _measure_label(self, fig, ax):
+        """
+        Label box offset from its marker and size in pixels.
+
+        Every label has the same 'CP: YYYY-MM' layout, so one sample drawn
+        with the label offset and style gives the box of all of them,
+        including the padding of the rounded frame.
+        """
+        if self._label_box is None:
+            renderer = fig.canvas.get_renderer()
+            sample = ax.annotate(LABEL_SAMPLE, xy=(0.5, 0.5), xycoords='axes fraction', xytext=LABEL_OFFSET,
+                                 textcoords='offset points', **LABEL_STYLE)
+            sample.draw(renderer)
+            extent = sample.get_bbox_patch().get_window_extent(renderer)
+            anchor_x, anchor_y = ax.transAxes.transform((0.5, 0.5))
+            self._label_box = ((extent.x0 - anchor_x, extent.y0 - anchor_y), (extent.width, extent.height))
+            sample.remove()
+        return self._label_box
+
+    def render_overlay(self, change_points, priorities=None):
+        """
+        Draw the change point markers and labels on the overlay template.
+
+        Args:
+            change_points (list): Change point dates (dates missing from the data are skipped)
+            priorities (array-like): Label priority per change point (higher kept first);
+                chronological order when omitted
+
+        Returns:
+            tuple: (RGBA uint8 overlay image, number of labels drawn)
+        """
+        import matplotlib.dates as mdates
+
+        fig, ax, markers = self._overlay_template()
+        for label in self._labels:
+            label.remove()
+        self._labels = []
+
+        positions = self.dates.get_indexer(pd.DatetimeIndex(change_points))
+        found = positions >= 0
+        positions = positions[found]
+        x = mdates.date2num(self.dates[positions])
+        y = self.prices[positions]
+        points = np.column_stack([x, y])
+        markers.set_offsets(points)
+
+        if priorities is None:
+            order = np.arange(len(positions))
+        else:
+            priorities = np.nan_to_num(np.asarray(priorities, dtype=np.float64)[found], nan=-np.inf)
+            order = np.argsort(-priorities, kind='stable')
+
+        offset, size = self._measure_label(fig, ax)
+        kept = cull_labels(ax.transData.transform(points), size, offset, fig.bbox.extents, order)
+        for i in kept:
+            self._labels.append(ax.annotate(f'CP: {self.dates[positions[i]].strftime("%Y-%m")}',
+                                            xy=(x[i], y[i]), xytext=LABEL_OFFSET,
+                                            textcoords='offset points', **LABEL_STYLE))
+
+        fig.canvas.draw()
+        return np.asarray(fig.canvas.buffer_rgba()), len(kept)
+
+    def render(self, change_points, priorities=None):
+        """
+        Composite the change point overlay onto the base layer.
+
+        Args:
+            change_points (list): Change point dates
+            priorities (array-like): Label priority per change point
+
+        Returns:
+            tuple: (RGB uint8 image, number of labels drawn)
+        """
+        base, _ = self.base_layer()
+        overlay, n_labels = self.render_overlay(change_points, priorities)
+
+        # Only rows and columns the overlay touches need blending
+        alpha = overlay[..., 3]
+        rows = np.flatnonzero(alpha.any(axis=1))
+        image = base.copy()
+        if len(rows):
+            cols = np.flatnonzero(alpha.any(axis=0))
+            window = (slice(rows[0], rows[-1] + 1), slice(cols[0], cols[-1] + 1))
+            weight = alpha[window][..., None].astype(np.float32) / 255
+            blended = overlay[window][..., :3] * weight + base[window] * (1 - weight)
+            image[window] = np.round(blended).astype(np.uint8)
+        return image, n_labels
+
+    def save(self, change_points, save_path, priorities=None):
+        """
+        Render the chart and write it as PNG.
+
+        Args:
+            change_points (list): Change point dates
+            save_path (str): Output path
+            priorities (array-like): Label priority per change point
+
+        Returns:
+            int: Number of labels drawn
+        """
+        from PIL import Image
+
+        image, n_labels = self.render(change_points, priorities)
+        Image.fromarray(image).save(save_path, dpi=(self.dpi, self.dpi))
+        return n_labels
+
+# Charts keyed by data and figure settings, so repeated plots in one process reuse templates;
+# each holds a full-resolution base image and two figures, so only the most recent are kept
+CHART_CACHE_SIZE = 2
+_charts = OrderedDict()
+
+def plot_change_points(df, change_points, save_path, priorities=None, figsize=(15, 10), dpi=300,
+                       cache_dir=None):
+    """
+    Save the change point chart, reusing the cached base layer and overlay template.
+
+    Args:
+        df (pd.DataFrame): Data with Price and log_returns (sorted by date)
+        change_points (list): Change point dates
+        save_path (str): Output path
+        priorities (array-like): Label priority per change point (e.g. episode scores)
+        figsize (tuple): Figure size in inches
+        dpi (int): Output resolution
+        cache_dir (str): Directory of cached base layers (default: chart_cache next to save_path)
+
+    Returns:
+        int: Number of labels drawn
+    """
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(save_path)), 'chart_cache')
+    chart = ChangePointChart(df, figsize=figsize, dpi=dpi, cache_dir=cache_dir)
+    key = (chart.key, cache_dir)
+    if key in _charts:
+        _charts.move_to_end(key)
+        chart = _charts[key]
+    else:
+        _charts[key] = chart
+        if len(_charts) > CHART_CACHE_SIZE:
+            _charts.popitem(last=False)
+    return chart.save(change_points, save_path, priorities)
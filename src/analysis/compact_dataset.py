@@ -0,0 +1,195 @@
+"""
+Compact typed in-memory representation of the Brent price datasets.
+Stores dates as int32 day ordinals (or int64 nanoseconds for intraday data),
+numeric columns as contiguous NumPy arrays and boolean flags bit-packed.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+NS_PER_DAY = 86_400 * 10**9
+TRUE_STRINGS = {'true', '1', 'yes', 't'}
+
+class CompactDataset:
+    """
+    Column store for a date-indexed price dataset.
+
+    Attributes:
+        dates (np.ndarray): int32 days since epoch, or int64 ns for intraday data
+        date_unit (str): 'D' or 'ns'
+        columns (dict): Numeric column name -> 1-D array
+        flags (dict): Boolean column name -> bit-packed uint8 array
+    """
+
+    def __init__(self, dates, date_unit, columns, flags=None):
+        self.dates = dates
+        self.date_unit = date_unit
+        self.columns = columns
+        self.flags = flags or {}
+        self._length = len(dates)
+
+    @classmethod
+    def from_frame(cls, df, float32_columns=(), bool_columns=('high_volatility',)):
+        """
+        Build a compact dataset from a DataFrame with a date index.
+
+        Args:
+            df (pd.DataFrame): Data with a date-like index
+            float32_columns (tuple): Numeric columns stored as float32
+            bool_columns (tuple): Columns stored as bit-packed booleans
+
+        Returns:
+            CompactDataset: Compact copy of the data
+        """
+        index = pd.DatetimeIndex(pd.to_datetime(df.index)).as_unit('ns')
+        nanoseconds = index.asi8
+        if len(nanoseconds) and not (nanoseconds % NS_PER_DAY).any():
+            dates, date_unit = (nanoseconds // NS_PER_DAY).astype(np.int32), 'D'
+        else:
+            dates, date_unit = nanoseconds.copy(), 'ns'
+
+        columns, flags = {}, {}
+        for name in df.columns:
+            if name in bool_columns:
+                flags[name] = np.packbits(_as_bool(df[name]))
+            else:
+                dtype = np.float32 if name in float32_columns else np.float64
+                columns[name] = np.ascontiguousarray(df[name].to_numpy(dtype=dtype, na_value=np.nan))
+
+        return cls(dates, date_unit, columns, flags)
+
+    @classmethod
+    def read_csv(cls, file_path, float32_columns=(), bool_columns=('high_volatility',)):
+        """
+        Read a processed dataset CSV (date index in the first column).
+
+        Args:
+            file_path (str): Path to the CSV file
+            float32_columns (tuple): Numeric columns stored as float32
+            bool_columns (tuple): Columns stored as bit-packed booleans
+
+        Returns:
+            CompactDataset: Parsed dataset
+        """
+        df = pd.read_csv(file_path, index_col=0, parse_dates=True)
+        return cls.from_frame(df, float32_columns, bool_columns)
+
+    @classmethod
+    def load_directory(cls, path, mmap_mode='r'):
+        """
+        Open a column directory (meta.json plus one .npy file per array).
+
+        Args:
+            path (str): Directory written by SharedDatasetStore or preprocess_streaming
+            mmap_mode (str): np.load memory-map mode (None reads into memory)
+
+        Returns:
+            CompactDataset: Dataset backed by the directory's files
+        """
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        load = lambda file_name: np.load(os.path.join(path, file_name), mmap_mode=mmap_mode)
+        return cls(
+            load('dates.npy'),
+            meta['date_unit'],
+            {column: load(f'col_{column}.npy') for column in meta['columns']},
+            {flag: load(f'flag_{flag}.npy') for flag in meta['flags']}
+        )
+
+    def __len__(self):
+        return self._length
+
+    def __contains__(self, name):
+        return name in self.columns or name in self.flags
+
+    @property
+    def column_names(self):
+        return list(self.columns) + list(self.flags)
+
+    @property
+    def datetimes(self):
+        """Dates as a datetime64[ns] array."""
+        if self.date_unit == 'D':
+            return self.dates.astype('datetime64[D]').astype('datetime64[ns]')
+        return self.dates.view('datetime64[ns]')
+
+    @property
+    def index(self):
+        return pd.DatetimeIndex(self.datetimes, name='Date')
+
+    def date_strings(self, fmt='%Y-%m-%d'):
+        """Dates formatted as strings (vectorized for the default format)."""
+        if fmt == '%Y-%m-%d':
+            return np.datetime_as_string(self.datetimes, unit='D')
+        return self.index.strftime(fmt).to_numpy()
+
+    def column(self, name):
+        """Return a numeric column or an unpacked boolean flag."""
+        if name in self.columns:
+            return self.columns[name]
+        return np.unpackbits(self.flags[name], count=self._length).view(bool)
+
+    def searchsorted(self, dates, side='left'):
+        """Position(s) of one or many dates in the (sorted) date column."""
+        scalar = np.ndim(dates) == 0
+        values = pd.DatetimeIndex(np.atleast_1d(pd.to_datetime(dates))).as_unit('ns').asi8
+        if self.date_unit == 'D':
+            # Whole days strictly before the date (left) or at/before it (right)
+            values = -(-values // NS_PER_DAY) if side == 'left' else values // NS_PER_DAY
+        positions = np.searchsorted(self.dates, values, side=side)
+        return int(positions[0]) if scalar else positions
+
+    def take(self, positions):
+        """Return the rows at the given positions (or slice) as a new dataset."""
+        flags = {name: np.packbits(self.column(name)[positions]) for name in self.flags}
+        columns = {name: values[positions] for name, values in self.columns.items()}
+        return CompactDataset(self.dates[positions], self.date_unit, columns, flags)
+
+    def to_frame(self):
+        """Expand into a pandas DataFrame with a DatetimeIndex."""
+        data = {name: self.column(name) for name in self.column_names}
+        return pd.DataFrame(data, index=self.index)
+
+    def memory_usage(self):
+        """
+        Report the memory footprint of each array.
+
+        Returns:
+            dict: Bytes per column plus 'dates' and 'total'
+        """
+        usage = {'dates': self.dates.nbytes}
+        usage.update({name: values.nbytes for name, values in self.columns.items()})
+        usage.update({name: packed.nbytes for name, packed in self.flags.items()})
+        usage['total'] = sum(usage.values())
+        return usage
+
+    @property
+    def nbytes(self):
+        return self.memory_usage()['total']
+
+def _as_bool(series):
+    """Coerce a column that may hold bools, strings or NaN into a bool array."""
+    if series.dtype == bool:
+        return series.to_numpy()
+    if series.dtype == object:
+        return series.astype(str).str.strip().str.lower().isin(TRUE_STRINGS).to_numpy()
+    return series.fillna(0).astype(bool).to_numpy()
+
+def load_compact_dataset(file_path, float32_columns=(), bool_columns=('high_volatility',)):
+    """
+    Load a processed dataset CSV into a compact container.
+
+    Args:
+        file_path (str): Path to the processed data CSV
+        float32_columns (tuple): Numeric columns stored as float32
+        bool_columns (tuple): Columns stored as bit-packed booleans
+
+    Returns:
+        CompactDataset: Compact dataset
+    """
+    dataset = CompactDataset.read_csv(file_path, float32_columns, bool_columns)
+    print(f"Loaded {len(dataset)} observations ({dataset.nbytes / 1024:.1f} KB in memory)")
+    return dataset
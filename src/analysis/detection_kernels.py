@@ -0,0 +1,378 @@
+"""
+Compiled kernels for change point detection on Brent oil prices.
+Rolling moments, threshold detection, run-length merging of flagged days and
+before/after regime statistics, each with a Numba implementation and a
+pure-NumPy fallback selected per call.
+"""
+
+import functools
+import importlib.util
+
+import numpy as np
+
+# Probed without importing: numba itself is only imported when a kernel runs on it
+HAVE_NUMBA = importlib.util.find_spec('numba') is not None
+
+BACKENDS = ('auto', 'numba', 'numpy')
+
+_numba = None
+
+def _load_numba():
+    """Import numba on first use; None when it is missing or fails to import."""
+    global _numba, HAVE_NUMBA
+    if _numba is None and HAVE_NUMBA:
+        try:
+            import numba
+            _numba = numba
+        except ImportError:
+            HAVE_NUMBA = False
+    return _numba
+
+def resolve_backend(backend):
+    """
+    Map a backend name to 'numba' or 'numpy'.
+
+    Args:
+        backend (str): 'auto' (Numba when installed), 'numba' or 'numpy'
+
+    Returns:
+        str: Backend that will run
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}. Use one of {BACKENDS}")
+    if backend == 'numba' and _load_numba() is None:
+        raise ImportError("Numba backend requested but numba is not installed")
+    if backend == 'auto':
+        return 'numba' if _load_numba() is not None else 'numpy'
+    return backend
+
+def _jit(func):
+    """Compile with Numba on the first call; the Python function runs when numba is unavailable."""
+    compiled = []
+
+    @functools.wraps(func)
+    def dispatch(*args):
+        if not compiled:
+            numba = _load_numba()
+            compiled.append(numba.njit(cache=True, nogil=True)(func) if numba is not None else func)
+        return compiled[0](*args)
+    return dispatch
+
+# NumPy implementations
+
+def rolling_mean_std(matrix, window, block_size=4096):
+    """
+    Trailing rolling mean and standard deviation (ddof=1) along the last axis.
+
+    Positions before the window is full are NaN, matching pandas rolling.
+    Prefix sums are taken over blocks of block_size outputs (plus the window
+    that precedes them), each centered on its own mean, so accuracy does not
+    degrade on long series that drift over a wide range.
+
+    Args:
+        matrix (np.ndarray): (rows x n) or (n,) values
+        window (int): Window size
+        block_size (int): Outputs computed per prefix-sum block
+
+    Returns:
+        tuple: (mean, std) arrays shaped like matrix
+    """
+    values = np.atleast_2d(np.asarray(matrix, dtype=np.float64))
+    n_rows, n = values.shape
+    mean = np.full(values.shape, np.nan)
+    std = np.full(values.shape, np.nan)
+
+    if n >= window:
+        for out_start in range(window - 1, n, block_size):
+            out_stop = min(out_start + block_size, n)
+            segment = values[:, out_start - window + 1:out_stop]
+
+            center = segment.mean(axis=1, keepdims=True)
+            centered = segment - center
+            prefix = np.zeros((n_rows, segment.shape[1] + 1))
+            prefix_sq = np.zeros((n_rows, segment.shape[1] + 1))
+            np.cumsum(centered, axis=1, out=prefix[:, 1:])
+            np.cumsum(centered * centered, axis=1, out=prefix_sq[:, 1:])
+
+            total = prefix[:, window:] - prefix[:, :-window]
+            total_sq = prefix_sq[:, window:] - prefix_sq[:, :-window]
+            mean[:, out_start:out_stop] = total / window + center
+            variance = (total_sq - total * total / window) / (window - 1)
+            std[:, out_start:out_stop] = np.sqrt(np.maximum(variance, 0.0))
+
+    if np.ndim(matrix) == 1:
+        return mean[0], std[0]
+    return mean, std
+
+def _threshold_flags_numpy(prices, returns, price_window, price_threshold, vol_window, vol_threshold):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean, std = rolling_mean_std(prices, price_window)
+        price_flags = np.abs((prices - mean) / std) > price_threshold
+
+        _, vol = rolling_mean_std(returns, vol_window)
+        vol_flags = np.zeros(len(returns), dtype=bool)
+        vol_flags[1:] = np.abs(vol[1:] / vol[:-1] - 1) > vol_threshold
+    return price_flags, vol_flags
+
+def _merge_runs_numpy(flags, max_gap):
+    positions = np.flatnonzero(flags)
+    if len(positions) == 0:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    # A run breaks where more than max_gap unflagged days separate two flags
+    breaks = np.flatnonzero(np.diff(positions) > max_gap + 1)
+    starts = positions[np.concatenate([[0], breaks + 1])]
+    stops = positions[np.concatenate([breaks, [len(positions) - 1]])] + 1
+    return starts.astype(np.int64), stops.astype(np.int64)
+
+def _window_stats_numpy(values, starts, stops):
+    """Mean and sample std of values[start:stop] for arrays of bounds via prefix sums."""
+    center = np.nanmean(values) if len(values) else 0.0
+    centered = values - center
+    prefix = np.concatenate([[0.0], np.cumsum(centered)])
+    prefix_sq = np.concatenate([[0.0], np.cumsum(centered * centered)])
+    count = stops - starts
+    total = prefix[stops] - prefix[starts]
+    total_sq = prefix_sq[stops] - prefix_sq[starts]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(count > 0, total / count + center, np.nan)
+        variance = (total_sq - total * total / count) / (count - 1)
+        std = np.where(count > 1, np.sqrt(np.maximum(variance, 0.0)), np.nan)
+    return mean, std
+
+# Numba implementations
+
+@_jit
+def _rolling_mean_std_loop(values, window):
+    n = len(values)
+    mean = np.full(n, np.nan)
+    std = np.full(n, np.nan)
+    if n < window:
+        return mean, std
+    # Shifted sums around a reference that is reset every window, so the
+    # running sums never accumulate error across the whole series
+    total = 0.0
+    total_sq = 0.0
+    reference = values[0]
+    for i in range(n):
+        if i % window == 0 and i >= window:
+            reference = values[i - window + 1]
+            total = 0.0
+            total_sq = 0.0
+            for j in range(i - window + 1, i):
+                shifted = values[j] - reference
+                total += shifted
+                total_sq += shifted * shifted
+        shifted = values[i] - reference
+        total += shifted
+        total_sq += shifted * shifted
+        if i >= window and i % window != 0:
+            old = values[i - window] - reference
+            total -= old
+            total_sq -= old * old
+        if i >= window - 1:
+            mean[i] = total / window + reference
+            variance = (total_sq - total * total / window) / (window - 1)
+            std[i] = np.sqrt(variance) if variance > 0.0 else 0.0
+    return mean, std
+
+@_jit
+def _threshold_flags_loop(prices, returns, price_window, price_threshold, vol_window, vol_threshold):
+    # Both detectors fused into one pass with add/remove (Welford) window updates;
+    # the sums are recomputed exactly every few windows to bound drift
+    n = len(prices)
+    price_flags = np.zeros(n, dtype=np.bool_)
+    vol_flags = np.zeros(n, dtype=np.bool_)
+    refresh = 64
+    price_mean = 0.0
+    price_ss = 0.0
+    vol_mean = 0.0
+    vol_ss = 0.0
+    previous_vol = np.nan
+    for i in range(n):
+        x = prices[i]
+        if i < price_window:
+            delta = x - price_mean
+            price_mean += delta / (i + 1)
+            price_ss += delta * (x - price_mean)
+        elif i % (price_window * refresh) == 0:
+            price_mean = 0.0
+            for j in range(i - price_window + 1, i + 1):
+                price_mean += prices[j]
+            price_mean /= price_window
+            price_ss = 0.0
+            for j in range(i - price_window + 1, i + 1):
+                price_ss += (prices[j] - price_mean) ** 2
+        else:
+            old = prices[i - price_window]
+            new_mean = price_mean + (x - old) / price_window
+            price_ss += (x - old) * (x - new_mean + old - price_mean)
+            price_mean = new_mean
+        if i >= price_window - 1:
+            variance = price_ss / (price_window - 1)
+            std = np.sqrt(variance) if variance > 0.0 else 0.0
+            deviation = abs(x - price_mean)
+            price_flags[i] = deviation > price_threshold * std if std > 0.0 else deviation > 0.0
+
+        r = returns[i]
+        if i < vol_window:
+            delta = r - vol_mean
+            vol_mean += delta / (i + 1)
+            vol_ss += delta * (r - vol_mean)
+        elif i % (vol_window * refresh) == 0:
+            vol_mean = 0.0
+            for j in range(i - vol_window + 1, i + 1):
+                vol_mean += returns[j]
+            vol_mean /= vol_window
+            vol_ss = 0.0
+            for j in range(i - vol_window + 1, i + 1):
+                vol_ss += (returns[j] - vol_mean) ** 2
+        else:
+            old = returns[i - vol_window]
+            new_mean = vol_mean + (r - old) / vol_window
+            vol_ss += (r - old) * (r - new_mean + old - vol_mean)
+            vol_mean = new_mean
+        if i >= vol_window - 1:
+            variance = vol_ss / (vol_window - 1)
+            vol = np.sqrt(variance) if variance > 0.0 else 0.0
+            if previous_vol > 0.0:
+                vol_flags[i] = abs(vol / previous_vol - 1.0) > vol_threshold
+            elif previous_vol == 0.0:
+                vol_flags[i] = vol > 0.0
+            previous_vol = vol
+    return price_flags, vol_flags
+
+@_jit
+def _merge_runs_loop(flags, max_gap):
+    n = len(flags)
+    starts = np.empty(n, dtype=np.int64)
+    stops = np.empty(n, dtype=np.int64)
+    count = 0
+    last = -1
+    for i in range(n):
+        if flags[i]:
+            if count > 0 and i - last <= max_gap + 1:
+                stops[count - 1] = i + 1
+            else:
+                starts[count] = i
+                stops[count] = i + 1
+                count += 1
+            last = i
+    return starts[:count], stops[:count]
+
+@_jit
+def _window_stats_loop(values, starts, stops):
+    k = len(starts)
+    mean = np.full(k, np.nan)
+    std = np.full(k, np.nan)
+    for c in range(k):
+        count = stops[c] - starts[c]
+        if count <= 0:
+            continue
+        total = 0.0
+        for j in range(starts[c], stops[c]):
+            total += values[j]
+        mean[c] = total / count
+        if count > 1:
+            squares = 0.0
+            for j in range(starts[c], stops[c]):
+                deviation = values[j] - mean[c]
+                squares += deviation * deviation
+            std[c] = np.sqrt(squares / (count - 1))
+    return mean, std
+
+# Public kernels
+
+def rolling_moments(values, window, backend='auto'):
+    """
+    Trailing rolling mean and sample standard deviation of a 1-D series.
+
+    Args:
+        values (np.ndarray): Series values
+        window (int): Window size
+        backend (str): 'auto', 'numba' or 'numpy'
+
+    Returns:
+        tuple: (mean, std) arrays, NaN until the window is full
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    if resolve_backend(backend) == 'numba':
+        return _rolling_mean_std_loop(values, window)
+    return rolling_mean_std(values, window)
+
+def threshold_flags(prices, returns, price_window=252, price_threshold=2.0, vol_window=60,
+                    vol_threshold=1.5, backend='auto'):
+    """
+    Run the rolling-mean and volatility-change detectors in one pass.
+
+    Args:
+        prices (np.ndarray): Prices
+        returns (np.ndarray): Log returns (NaN treated as zero)
+        price_window (int): Rolling mean window
+        price_threshold (float): Z-score threshold
+        vol_window (int): Rolling volatility window
+        vol_threshold (float): Relative volatility change threshold
+        backend (str): 'auto', 'numba' or 'numpy'
+
+    Returns:
+        tuple: (price flags, volatility flags) boolean arrays
+    """
+    prices = np.ascontiguousarray(prices, dtype=np.float64)
+    returns = np.ascontiguousarray(np.nan_to_num(np.asarray(returns, dtype=np.float64)))
+    if resolve_backend(backend) == 'numba':
+        return _threshold_flags_loop(prices, returns, price_window, price_threshold, vol_window, vol_threshold)
+    return _threshold_flags_numpy(prices, returns, price_window, price_threshold, vol_window, vol_threshold)
+
+def merge_runs(flags, max_gap=0, backend='auto'):
+    """
+    Merge consecutive flagged positions into runs.
+
+    Args:
+        flags (np.ndarray): Boolean flags
+        max_gap (int): Unflagged positions allowed inside one run
+        backend (str): 'auto', 'numba' or 'numpy'
+
+    Returns:
+        tuple: (run starts, run stops) with stops exclusive
+    """
+    flags = np.ascontiguousarray(flags, dtype=bool)
+    if resolve_backend(backend) == 'numba':
+        return _merge_runs_loop(flags, max_gap)
+    return _merge_runs_numpy(flags, max_gap)
+
+def before_after_stats(prices, returns, starts, ends, window=252, backend='auto'):
+    """
+    Mean price and return volatility before and after every change point.
+
+    The before period is rows [start - window, start) and the after period
+    rows [end, end + window), both clipped to the series.
+
+    Args:
+        prices (np.ndarray): Prices
+        returns (np.ndarray): Log returns
+        starts (np.ndarray): First row at or after each change point
+        ends (np.ndarray): First row after each change point
+        window (int): Rows per period
+        backend (str): 'auto', 'numba' or 'numpy'
+
+    Returns:
+        dict: before_mean, after_mean, before_vol, after_vol arrays
+    """
+    prices = np.ascontiguousarray(prices, dtype=np.float64)
+    returns = np.ascontiguousarray(returns, dtype=np.float64)
+    n = len(prices)
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    before_starts = np.maximum(starts - window, 0)
+    after_stops = np.minimum(ends + window, n)
+
+    stats = _window_stats_loop if resolve_backend(backend) == 'numba' else _window_stats_numpy
+    before_mean, _ = stats(prices, before_starts, starts)
+    after_mean, _ = stats(prices, ends, after_stops)
+    _, before_vol = stats(returns, before_starts, starts)
+    _, after_vol = stats(returns, ends, after_stops)
+    return {
+        'before_mean': before_mean,
+        'after_mean': after_mean,
+        'before_vol': before_vol,
+        'after_vol': after_vol
+    }
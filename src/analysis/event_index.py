@@ -0,0 +1,73 @@
+"""
+Interval index over event dates for Brent oil price analysis.
+Answers "which events fall within N days of each date" for a whole batch of
+dates with two binary searches per query, so k queries cost O(k log m).
+"""
+
+import numpy as np
+import pandas as pd
+
+NS_PER_DAY = 86_400 * 10**9
+
+def to_day_ordinals(dates):
+    """Convert date-like values to int64 days since the epoch (floored)."""
+    nanoseconds = pd.DatetimeIndex(np.atleast_1d(pd.to_datetime(dates))).as_unit('ns').asi8
+    return nanoseconds // NS_PER_DAY
+
+class EventIndex:
+    """
+    Sorted-array interval index over event dates.
+
+    Attributes:
+        days (np.ndarray): Event dates as sorted int64 day ordinals
+        order (np.ndarray): Row positions of the events in the original table
+    """
+
+    def __init__(self, event_dates):
+        days = to_day_ordinals(event_dates)
+        self.order = np.argsort(days, kind='stable')
+        self.days = days[self.order]
+
+    def __len__(self):
+        return len(self.days)
+
+    def query(self, dates, days):
+        """
+        Locate the events within a window around each query date.
+
+        Args:
+            dates (array-like): Query dates
+            days (int or array-like): Half-width of each window in days (inclusive)
+
+        Returns:
+            tuple: (lo, hi) arrays; events self.order[lo[i]:hi[i]] match query i
+        """
+        centers = to_day_ordinals(dates)
+        half_widths = np.broadcast_to(np.asarray(days, dtype=np.int64), centers.shape)
+        lo = np.searchsorted(self.days, centers - half_widths, side='left')
+        hi = np.searchsorted(self.days, centers + half_widths, side='right')
+        return lo, hi
+
+    def matches(self, dates, days):
+        """
+        Flatten all matches of a batch query.
+
+        Args:
+            dates (array-like): Query dates
+            days (int or array-like): Half-width of each window in days (inclusive)
+
+        Returns:
+            tuple: (query positions, event row positions, day offsets event - query)
+        """
+        centers = to_day_ordinals(dates)
+        lo, hi = self.query(dates, days)
+        # A negative half-width gives an empty window, not a negative count
+        counts = np.maximum(hi - lo, 0)
+
+        query_positions = np.repeat(np.arange(len(centers)), counts)
+        # Position within each query's run, added to its lower bound
+        run_offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        sorted_positions = np.repeat(lo, counts) + run_offsets
+
+        offsets = self.days[sorted_positions] - centers[query_positions]
+        return query_positions, self.order[sorted_positions], offsets
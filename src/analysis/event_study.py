@@ -0,0 +1,142 @@
+"""
+Vectorized event study for Brent oil price analysis.
+Measures cumulative (abnormal) log returns and volatility changes around every
+event at once, using prefix sums and a strided window gather.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+DEFAULT_WINDOWS = ((-5, 5), (-30, 30))
+ESTIMATION_DAYS = 250
+
+def parse_windows(spec):
+    """
+    Parse a window specification such as "-5:5,-30:30".
+
+    Args:
+        spec (str): Comma separated start:end offsets in trading days
+
+    Returns:
+        tuple: (start, end) pairs with start <= 0 <= end
+    """
+    windows = []
+    for part in spec.split(','):
+        start, end = (int(value) for value in part.split(':'))
+        if not start <= 0 <= end:
+            raise ValueError(f"Window {part} must contain the event day (start <= 0 <= end)")
+        windows.append((start, end))
+    return tuple(windows)
+
+def _window_sum(prefix, start, stop):
+    """Sum over [start, stop) for arrays of bounds using a prefix-sum array."""
+    return prefix[stop] - prefix[start]
+
+def compute_event_impact(log_returns, event_positions, windows=DEFAULT_WINDOWS,
+                         estimation_days=ESTIMATION_DAYS, include_path=False):
+    """
+    Compute event-window statistics for all events in one vectorized pass.
+
+    Day 0 is the first trading day on or after the event. For each window
+    [start, end] the cumulative log return covers days start..end, the abnormal
+    return subtracts the mean daily return of the estimation period that ends
+    just before the window, and volatility is compared between days start..-1
+    and 0..end.
+
+    Args:
+        log_returns (np.ndarray): Daily log returns
+        event_positions (np.ndarray): Index of day 0 for every event (-1 when the
+            data does not cover the event; its statistics are NaN)
+        windows (tuple): (start, end) offsets in trading days
+        estimation_days (int): Length of the normal-return estimation period
+        include_path (bool): Also return the cumulative return path per window
+
+    Returns:
+        dict: Window label -> dict of per-event arrays
+    """
+    returns = np.nan_to_num(np.asarray(log_returns, dtype=np.float64))
+    n = len(returns)
+    positions = np.asarray(event_positions, dtype=np.int64)
+    missing = (positions < 0) | (positions >= n)
+
+    prefix = np.concatenate([[0.0], np.cumsum(returns)])
+    prefix_sq = np.concatenate([[0.0], np.cumsum(returns * returns)])
+
+    def window_std(start, stop):
+        count = stop - start
+        total = _window_sum(prefix, start, stop)
+        total_sq = _window_sum(prefix_sq, start, stop)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variance = (total_sq - total * total / count) / (count - 1)
+        return np.where(count > 1, np.sqrt(np.maximum(variance, 0.0)), np.nan)
+
+    results = {}
+    for start_offset, end_offset in windows:
+        start = np.clip(positions + start_offset, 0, n)
+        stop = np.clip(positions + end_offset + 1, 0, n)
+        complete = (positions + start_offset >= 0) & (positions + end_offset < n) & ~missing
+
+        car = _window_sum(prefix, start, stop)
+
+        estimation_start = np.clip(start - estimation_days, 0, n)
+        estimation_count = start - estimation_start
+        with np.errstate(invalid='ignore', divide='ignore'):
+            normal_return = _window_sum(prefix, estimation_start, start) / estimation_count
+        abnormal_car = car - normal_return * (stop - start)
+
+        day0 = np.clip(positions, 0, n)
+        pre_vol = window_std(start, day0)
+        post_vol = window_std(day0, stop)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            vol_change_pct = (post_vol - pre_vol) / pre_vol * 100
+
+        car, abnormal_car, pre_vol, post_vol, vol_change_pct = (
+            np.where(missing, np.nan, values)
+            for values in (car, abnormal_car, pre_vol, post_vol, vol_change_pct))
+
+        window_result = {
+            'start': start_offset,
+            'end': end_offset,
+            'complete': complete,
+            'observations': np.where(missing, 0, stop - start),
+            'cumulative_return': car,
+            'abnormal_return': abnormal_car,
+            'price_change_pct': np.expm1(car) * 100,
+            'pre_volatility': pre_vol,
+            'post_volatility': post_vol,
+            'vol_change_pct': vol_change_pct
+        }
+
+        if include_path:
+            window_result['cumulative_path'] = gather_windows(returns, positions, start_offset,
+                                                              end_offset).cumsum(axis=1)
+
+        results[f'{start_offset:+d}:{end_offset:+d}'] = window_result
+
+    return results
+
+def gather_windows(values, positions, start_offset, end_offset):
+    """
+    Gather a fixed-width window around every position as a 2-D strided view.
+
+    Positions whose window runs past either end are padded with zeros;
+    positions outside the series (e.g. -1 for events the data does not
+    cover) give rows of NaN.
+
+    Args:
+        values (np.ndarray): 1-D series
+        positions (np.ndarray): Window anchor positions
+        start_offset (int): First offset (<= 0)
+        end_offset (int): Last offset (>= 0)
+
+    Returns:
+        np.ndarray: (events x window length) array
+    """
+    width = end_offset - start_offset + 1
+    positions = np.asarray(positions, dtype=np.int64)
+    missing = (positions < 0) | (positions >= len(values))
+    padded = np.concatenate([np.zeros(width), values, np.zeros(width)])
+    view = sliding_window_view(padded, width)
+    windows = view[np.where(missing, 0, positions) + start_offset + width]
+    windows[missing] = np.nan
+    return windows
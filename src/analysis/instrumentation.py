@@ -0,0 +1,207 @@
+"""
+Stage-level timing and memory instrumentation for the analysis scripts.
+Records wall time, CPU time, peak memory and row counts as JSON lines.
+
+Instrumentation is controlled by environment variables read at import time:
+    BRENT_INSTRUMENT    Path of the JSON-lines output file ("-" for stderr).
+                        When unset, decorators return the original function
+                        and stage() is a no-op, so there is no runtime cost.
+    BRENT_TRACEMALLOC   Set to 1 to also record the tracemalloc peak per stage.
+    BRENT_PROFILE       "cprofile" or "pyinstrument" to dump a profile per stage.
+    BRENT_PROFILE_DIR   Directory for profile dumps (default: ./profiles).
+"""
+
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+OUTPUT = os.environ.get('BRENT_INSTRUMENT')
+ENABLED = bool(OUTPUT)
+TRACEMALLOC = ENABLED and os.environ.get('BRENT_TRACEMALLOC') == '1'
+PROFILER = os.environ.get('BRENT_PROFILE') if ENABLED else None
+PROFILE_DIR = os.environ.get('BRENT_PROFILE_DIR', 'profiles')
+
+_lock = threading.Lock()
+_local = threading.local()
+_counter = 0
+
+def _stack():
+    """Return the per-thread stack of open stage records."""
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+def _peak_rss_mb():
+    """Peak resident set size of the process in MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    return peak / 1024**2 if sys.platform == 'darwin' else peak / 1024
+
+def _emit(record):
+    """Write one JSON-lines record to the configured output."""
+    line = json.dumps(record, default=str) + '\n'
+    with _lock:
+        if OUTPUT == '-':
+            sys.stderr.write(line)
+        else:
+            with open(OUTPUT, 'a') as f:
+                f.write(line)
+
+def _count_rows(value):
+    """Best-effort row count of a function argument or result."""
+    if hasattr(value, 'shape') and len(getattr(value, 'shape', ())) > 0:
+        return int(value.shape[0])
+    if isinstance(value, (list, tuple, dict)):
+        return len(value)
+    return None
+
+class _Profile:
+    """Optional per-stage profiler dump (cProfile or pyinstrument)."""
+
+    active = False
+
+    def __init__(self, name):
+        self.name = name
+        self.profiler = None
+
+    def __enter__(self):
+        # Only one profiler can run at a time, so nested stages are covered by the outer one
+        if PROFILER is None or _Profile.active:
+            return self
+        _Profile.active = True
+        if PROFILER == 'pyinstrument':
+            from pyinstrument import Profiler
+            self.profiler = Profiler()
+            self.profiler.start()
+        else:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self.profiler is None:
+            return False
+        global _counter
+        with _lock:
+            _counter += 1
+            count = _counter
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, f"{self.name}-{os.getpid()}-{count}")
+
+        if PROFILER == 'pyinstrument':
+            self.profiler.stop()
+            with open(base + '.html', 'w') as f:
+                f.write(self.profiler.output_html())
+        else:
+            self.profiler.disable()
+            self.profiler.dump_stats(base + '.prof')
+        _Profile.active = False
+        return False
+
+@contextlib.contextmanager
+def _stage(name, rows=None):
+    """Record one stage; see stage()."""
+    stack = _stack()
+    record = {
+        'stage': name,
+        'parent': stack[-1]['stage'] if stack else None,
+        'pid': os.getpid(),
+        'start': datetime.now().isoformat(),
+        'rows': rows,
+    }
+
+    if TRACEMALLOC:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if stack:
+            # Keep the parent's peak before resetting it for this stage
+            stack[-1]['_child_peak'] = max(stack[-1].get('_child_peak', 0),
+                                           tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+
+    stack.append(record)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        with _Profile(name):
+            yield record
+        record['status'] = 'ok'
+    except BaseException as e:
+        record['status'] = 'error'
+        record['error'] = type(e).__name__
+        raise
+    finally:
+        record['wall_s'] = time.perf_counter() - wall_start
+        record['cpu_s'] = time.process_time() - cpu_start
+        record['peak_rss_mb'] = _peak_rss_mb()
+        stack.pop()
+
+        if TRACEMALLOC:
+            peak = max(tracemalloc.get_traced_memory()[1], record.pop('_child_peak', 0))
+            record['tracemalloc_peak_mb'] = peak / 1024**2
+            if stack:
+                stack[-1]['_child_peak'] = max(stack[-1].get('_child_peak', 0), peak)
+        _emit(record)
+
+def stage(name, rows=None):
+    """
+    Context manager recording wall time, CPU time and memory for a block.
+
+    The yielded record is a dict; set record['rows'] inside the block when the
+    row count is only known at the end. Returns a no-op context when disabled.
+
+    Args:
+        name (str): Stage name
+        rows (int): Number of rows processed, if known up front
+
+    Returns:
+        contextlib.AbstractContextManager: Stage context
+    """
+    if not ENABLED:
+        return contextlib.nullcontext({})
+    return _stage(name, rows)
+
+def instrument(func=None, *, name=None):
+    """
+    Decorator recording a stage for every call of the decorated function.
+
+    Row counts are taken from the first argument (rows) and the result
+    (rows_out) when they are DataFrames, Series, arrays, lists or dicts. When
+    instrumentation is disabled the function is returned unchanged.
+
+    Args:
+        func (callable): Function to decorate (when used without arguments)
+        name (str): Stage name (defaults to the function name)
+
+    Returns:
+        callable: Decorated function
+    """
+    def decorator(f):
+        if not ENABLED:
+            return f
+        stage_name = name or f.__name__
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            rows_in = _count_rows(args[0]) if args else None
+            with _stage(stage_name, rows_in) as record:
+                result = f(*args, **kwargs)
+                record['rows_out'] = _count_rows(result)
+            return result
+        return wrapper
+
+    return decorator(func) if func is not None else decorator
@@ -5,18 +5,22 @@ Loads and prepares data for change point analysis.
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
-def load_brent_data(file_path='../../data/BrentOilPrices.csv'):
+from instrumentation import instrument
+from resolution_pyramid import build_pyramid, save_pyramid
+from volatility_engine import DEFAULT_WINDOWS, add_volatility_columns, rolling_column
+
+@instrument
+def load_brent_data(file_path='../../data/BrentOilPrices.csv', date_format='%d-%b-%y'):
     """
     Load and preprocess Brent oil price data.
     
     Args:
         file_path (str): Path to the CSV file
+        date_format (str): strptime format of the Date column (ISO 8601 is tried when nothing matches)
         
     Returns:
         pd.DataFrame: Cleaned time series data
@@ -26,8 +30,11 @@ def load_brent_data(file_path='../../data/BrentOilPrices.csv'):
     # Load data
     df = pd.read_csv(file_path)
     
-    # Convert date column
-    df['Date'] = pd.to_datetime(df['Date'], format='%d-%b-%y', errors='coerce')
+    # Convert date column (ISO timestamps, e.g. intraday synthetic data, when the format matches nothing)
+    dates = pd.to_datetime(df['Date'], format=date_format, errors='coerce')
+    if len(df) and dates.isna().all():
+        dates = pd.to_datetime(df['Date'], format='ISO8601', errors='coerce')
+    df['Date'] = dates
     
     # Handle missing dates
     df = df.dropna()
@@ -41,6 +48,7 @@ def load_brent_data(file_path='../../data/BrentOilPrices.csv'):
     print(f"Loaded {len(df)} records from {df.index.min()} to {df.index.max()}")
     return df
 
+@instrument
 def calculate_returns(df):
     """
     Calculate log returns from price data.
@@ -77,6 +85,7 @@ def basic_statistics(df):
     print(f"Log returns mean: {df['log_returns'].mean():.6f}")
     print(f"Log returns std: {df['log_returns'].std():.6f}")
 
+@instrument
 def plot_time_series(df, save_path='../../reports/price_timeseries.png'):
     """
     Create time series plots for prices and returns.
@@ -86,6 +95,7 @@ def plot_time_series(df, save_path='../../reports/price_timeseries.png'):
         save_path (str): Path to save the plot
     """
     print("Creating time series plots...")
+    import matplotlib.pyplot as plt
     
     fig, axes = plt.subplots(2, 1, figsize=(15, 10))
     
@@ -108,6 +118,7 @@ def plot_time_series(df, save_path='../../reports/price_timeseries.png'):
     
     print(f"Plot saved to {save_path}")
 
+@instrument
 def plot_distributions(df, save_path='../../reports/distributions.png'):
     """
     Create distribution plots for prices and returns.
@@ -117,6 +128,7 @@ def plot_distributions(df, save_path='../../reports/distributions.png'):
         save_path (str): Path to save the plot
     """
     print("Creating distribution plots...")
+    import matplotlib.pyplot as plt
     
     fig, axes = plt.subplots(2, 2, figsize=(15, 10))
     
@@ -148,10 +160,14 @@ def plot_distributions(df, save_path='../../reports/distributions.png'):
     
     print(f"Plot saved to {save_path}")
 
+@instrument
 def identify_volatility_periods(df, window=30):
     """
     Identify periods of high volatility.
     
+    All volatility engine columns (rolling, EWMA and realized) are added in one
+    pass so downstream scripts read them instead of recomputing.
+    
     Args:
         df (pd.DataFrame): Time series data
         window (int): Rolling window size for volatility calculation
@@ -161,8 +177,9 @@ def identify_volatility_periods(df, window=30):
     """
     print("Identifying volatility periods...")
     
-    # Calculate rolling volatility
-    df['volatility'] = df['log_returns'].rolling(window=window).std()
+    # Calculate rolling, EWMA and realized volatility
+    df = add_volatility_columns(df, windows=tuple(sorted(set(DEFAULT_WINDOWS) | {window})))
+    df['volatility'] = df[rolling_column(window)]
     
     # Identify high volatility periods (above 95th percentile)
     volatility_threshold = df['volatility'].quantile(0.95)
@@ -173,6 +190,7 @@ def identify_volatility_periods(df, window=30):
     
     return df
 
+@instrument
 def save_processed_data(df, file_path='../../data/processed_brent_data.csv'):
     """
     Save processed data for further analysis.
@@ -210,6 +228,9 @@ def main():
     # Save processed data
     save_processed_data(df)
     
+    # Save weekly/monthly/quarterly bars for long-range charts
+    save_pyramid(build_pyramid(df))
+    
     print("\n=== Preprocessing Complete ===")
     print("Data is ready for change point analysis!")
 
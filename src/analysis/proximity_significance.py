@@ -0,0 +1,198 @@
+"""
+Monte Carlo significance test for change point / event proximity.
+Relocates the events (or shifts the change points) at random thousands of
+times and counts the matches within the correlation threshold, using batched
+searchsorted over (simulations x events) matrices split across processes.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from event_index import to_day_ordinals
+
+# Simulations evaluated by one pool task
+SIMULATIONS_PER_TASK = 500
+
+def nearest_distance(sorted_rows, queries):
+    """
+    Distance from every query to the nearest value of its row.
+
+    All rows are searched with one searchsorted call: each row is moved to
+    its own disjoint range by a row offset, so the flattened matrix stays
+    sorted and a query can only land between values of its own row.
+
+    Args:
+        sorted_rows (np.ndarray): (simulations x k) int64 day ordinals, sorted per row
+        queries (np.ndarray): (simulations x q) int64 day ordinals
+
+    Returns:
+        np.ndarray: (simulations x q) absolute distances in days
+    """
+    sorted_rows = np.asarray(sorted_rows, dtype=np.int64)
+    queries = np.asarray(queries, dtype=np.int64)
+    n_rows, k = sorted_rows.shape
+    if k == 0 or queries.size == 0:
+        return np.full(queries.shape, np.iinfo(np.int64).max)
+
+    origin = min(sorted_rows.min(), queries.min())
+    stride = 2 * (max(sorted_rows.max(), queries.max()) - origin) + 1
+    offsets = np.arange(n_rows, dtype=np.int64)[:, None] * stride
+    flat = (sorted_rows - origin + offsets).ravel()
+    shifted = queries - origin + offsets
+
+    positions = np.searchsorted(flat, shifted)
+    row_start = np.arange(n_rows)[:, None] * k
+    left = np.maximum(positions - 1, 0)
+    right = np.minimum(positions, flat.size - 1)
+
+    far = stride
+    left_distance = np.where(positions > row_start, shifted - flat[left], far)
+    right_distance = np.where(positions < row_start + k, flat[right] - shifted, far)
+    return np.minimum(left_distance, right_distance)
+
+def match_counts(change_point_rows, event_rows, event_categories, n_categories, days_threshold):
+    """
+    Proximity statistics for a batch of (change points, events) placements.
+
+    Args:
+        change_point_rows (np.ndarray): (simulations x k) change point day ordinals, sorted per row
+        event_rows (np.ndarray): (simulations x m) event day ordinals, sorted per row
+        event_categories (np.ndarray): (simulations x m) category code of every event
+        n_categories (int): Number of category codes
+        days_threshold (int): Largest distance in days counted as a match
+
+    Returns:
+        np.ndarray: (simulations x (n_categories + 2)) counts: events matched per
+            category, events matched overall and change points matched
+    """
+    event_matched = nearest_distance(change_point_rows, event_rows) <= days_threshold
+    change_point_matched = nearest_distance(event_rows, change_point_rows) <= days_threshold
+
+    counts = np.empty((event_rows.shape[0], n_categories + 2), dtype=np.int64)
+    for code in range(n_categories):
+        counts[:, code] = (event_matched & (event_categories == code)).sum(axis=1)
+    counts[:, n_categories] = event_matched.sum(axis=1)
+    counts[:, n_categories + 1] = change_point_matched.sum(axis=1)
+    return counts
+
+def _simulation_task(task):
+    """Process pool entry point: one batch of simulations -> match counts."""
+    (change_point_days, event_days, categories, n_categories, span, days_threshold,
+     relocate, n_simulations, seed) = task
+    rng = np.random.default_rng(seed)
+    first_day, last_day = span
+    width = last_day - first_day + 1
+
+    if relocate == 'events':
+        # Events land uniformly within the sample; each keeps its category
+        event_rows = rng.integers(first_day, last_day + 1, size=(n_simulations, len(event_days)))
+        order = np.argsort(event_rows, axis=1, kind='stable')
+        event_rows = np.take_along_axis(event_rows, order, axis=1)
+        change_point_rows = np.broadcast_to(change_point_days, (n_simulations, len(change_point_days)))
+        event_categories = categories[order]
+    elif relocate == 'change_points':
+        # Circular shift keeps the spacing and clustering of the change points
+        shifts = rng.integers(0, width, size=(n_simulations, 1))
+        change_point_rows = first_day + (change_point_days - first_day + shifts) % width
+        event_rows = np.broadcast_to(event_days, (n_simulations, len(event_days)))
+        event_categories = np.broadcast_to(categories, event_rows.shape)
+    else:
+        raise ValueError(f"Unknown relocation: {relocate}")
+
+    change_point_rows = np.sort(change_point_rows, axis=1)
+    return match_counts(change_point_rows, event_rows, event_categories, n_categories, days_threshold)
+
+def proximity_significance(change_points, events_df, span, days_threshold=30, n_simulations=10000,
+                           relocate='events', seed=42, max_workers=None):
+    """
+    Test whether change points and events coincide more often than by chance.
+
+    The observed statistics are the number of events with a change point
+    within days_threshold (overall and per category) and the number of
+    change points with an event within days_threshold, the same matching
+    rule as correlate_with_events. Under the null hypothesis the events are
+    placed uniformly within the sample span (relocate='events') or the change
+    points are circularly shifted by a uniform offset (relocate='change_points').
+
+    Args:
+        change_points (list): Detected change point dates
+        events_df (pd.DataFrame): Events with Date and Category columns
+        span (tuple): (first date, last date) of the analysed sample
+        days_threshold (int): Days threshold for a match
+        n_simulations (int): Number of Monte Carlo placements
+        relocate (str): 'events' or 'change_points'
+        seed (int): Random seed
+        max_workers (int): Worker processes (None = number of cores)
+
+    Returns:
+        pd.DataFrame: One row per scope (overall, each category, change points) with
+            observed and expected matches, excess ratio, z-score and p-value
+    """
+    print(f"Testing event proximity with {n_simulations} simulations (relocating {relocate})...")
+
+    change_point_days = np.unique(to_day_ordinals(change_points)) if len(change_points) else \
+        np.empty(0, dtype=np.int64)
+    event_days = to_day_ordinals(events_df['Date'])
+    category_codes, category_names = pd.factorize(events_df['Category'], sort=True)
+    n_categories = len(category_names)
+    first_day, last_day = (int(day) for day in to_day_ordinals(list(span)))
+
+    # The sample bounds the null placements, so only events inside it are tested
+    inside = (event_days >= first_day) & (event_days <= last_day)
+    event_days, category_codes = event_days[inside], category_codes[inside]
+    order = np.argsort(event_days, kind='stable')
+    event_days, category_codes = event_days[order], category_codes[order]
+
+    observed = match_counts(change_point_days[None, :], event_days[None, :], category_codes[None, :],
+                            n_categories, days_threshold)[0]
+
+    batch_sizes = [min(SIMULATIONS_PER_TASK, n_simulations - i)
+                   for i in range(0, n_simulations, SIMULATIONS_PER_TASK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(batch_sizes))
+    tasks = [(change_point_days, event_days, category_codes, n_categories, (first_day, last_day),
+              days_threshold, relocate, size, child) for size, child in zip(batch_sizes, seeds)]
+
+    if len(change_point_days) == 0 or len(event_days) == 0:
+        # Nothing can match under any placement
+        null = np.zeros((n_simulations, n_categories + 2), dtype=np.int64)
+    elif len(tasks) > 1 and max_workers != 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            null = np.vstack(list(executor.map(_simulation_task, tasks)))
+    else:
+        null = np.vstack([_simulation_task(task) for task in tasks])
+
+    expected = null.mean(axis=0)
+    null_std = null.std(axis=0, ddof=1) if n_simulations > 1 else np.full(len(expected), np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        excess = observed / expected
+        z_score = (observed - expected) / null_std
+
+    scopes = ['overall'] + list(category_names) + ['change_points']
+    totals = np.append(np.bincount(category_codes, minlength=n_categories),
+                       [len(event_days), len(change_point_days)])
+    rows = [n_categories] + list(range(n_categories)) + [n_categories + 1]
+
+    results = pd.DataFrame({
+        'scope': scopes,
+        'n_items': totals[rows],
+        'observed_matches': observed[rows],
+        'expected_matches': expected[rows],
+        'null_std': null_std[rows],
+        'excess_ratio': excess[rows],
+        'z_score': z_score[rows],
+        # One-sided: as many or more matches than observed
+        'p_value': ((null[:, rows] >= observed[rows]).sum(axis=0) + 1) / (n_simulations + 1)
+    })
+
+    overall = results.iloc[0]
+    print(f"Events matched: {overall['observed_matches']} observed vs "
+          f"{overall['expected_matches']:.1f} expected (p = {overall['p_value']:.4f})")
+    return results
+
+def save_results(results, file_path='../../reports/event_proximity_significance.csv'):
+    """Save proximity significance results to CSV."""
+    print(f"Saving results to {file_path}...")
+    results.to_csv(file_path, index=False)
+    print("Results saved successfully!")
@@ -0,0 +1,154 @@
+"""
+Permutation significance test for regime shifts in Brent oil prices.
+Scores every candidate change point against shuffles of the returns in its
+before/after window, using prefix sums over batched (permutations x window)
+matrices processed in memory-bounded chunks.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Upper bound on the gathered (change points x permutations x window) block
+CHUNK_BYTES = 64 * 2**20
+# Change points tested by one pool task
+ROWS_PER_TASK = 64
+
+def window_statistics(windows, before_length, after_start):
+    """
+    Price and volatility shift statistics for a batch of return windows.
+
+    Each window holds the log returns from the first before-period row to the
+    last after-period row. Prices are rebuilt relative to the first row, so
+    the price statistic matches the mean-price change of the regime analysis.
+
+    Args:
+        windows (np.ndarray): (..., m) log returns
+        before_length (int): Rows in the before period
+        after_start (int): Offset of the first after-period row
+
+    Returns:
+        tuple: (price_change_pct, vol_change_pct) arrays over the leading axes
+    """
+    log_path = np.cumsum(windows[..., 1:], axis=-1)
+    relative_price = np.concatenate([np.ones(windows.shape[:-1] + (1,)), np.exp(log_path)], axis=-1)
+    before_mean = relative_price[..., :before_length].mean(axis=-1)
+    after_mean = relative_price[..., after_start:].mean(axis=-1)
+
+    before_vol = windows[..., :before_length].std(axis=-1, ddof=1)
+    after_vol = windows[..., after_start:].std(axis=-1, ddof=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        price_change = (after_mean - before_mean) / before_mean * 100
+        vol_change = (after_vol - before_vol) / before_vol * 100
+    return price_change, vol_change
+
+def _exceedances(windows, before_length, after_start, n_permutations, seed, chunk_bytes):
+    """
+    Count permutations at least as extreme as the observed statistics.
+
+    Args:
+        windows (np.ndarray): (change points x m) log returns sharing one layout
+        before_length (int): Rows in the before period
+        after_start (int): Offset of the first after-period row
+        n_permutations (int): Number of shuffles
+        seed (np.random.SeedSequence): Seed for the shuffles
+        chunk_bytes (int): Memory budget of one gathered block
+
+    Returns:
+        tuple: (price exceedance counts, volatility exceedance counts)
+    """
+    rng = np.random.default_rng(seed)
+    k, m = windows.shape
+    observed_price, observed_vol = window_statistics(windows, before_length, after_start)
+    # Two-sided: price shifts by magnitude, volatility shifts by log ratio
+    observed_price = np.abs(observed_price)
+    observed_vol = np.abs(np.log1p(observed_vol / 100))
+
+    price_count = np.zeros(k, dtype=np.int64)
+    vol_count = np.zeros(k, dtype=np.int64)
+    permutations_per_chunk = max(1, min(n_permutations, chunk_bytes // (8 * m * k)))
+    rows_per_chunk = max(1, min(k, chunk_bytes // (8 * m * permutations_per_chunk)))
+
+    done = 0
+    while done < n_permutations:
+        batch = min(permutations_per_chunk, n_permutations - done)
+        # Shared shuffles for every change point in the chunk
+        order = np.argsort(rng.random((batch, m)), axis=1)
+        for lo in range(0, k, rows_per_chunk):
+            hi = min(lo + rows_per_chunk, k)
+            shuffled = windows[lo:hi][:, order]
+            price, vol = window_statistics(shuffled, before_length, after_start)
+            # Small tolerance so ties with the observed value count as exceedances
+            price_count[lo:hi] += (np.abs(price) >= observed_price[lo:hi, None] * (1 - 1e-12)).sum(axis=1)
+            vol_count[lo:hi] += (np.abs(np.log1p(vol / 100)) >=
+                                 observed_vol[lo:hi, None] * (1 - 1e-12)).sum(axis=1)
+        done += batch
+
+    return price_count, vol_count
+
+def _exceedance_task(task):
+    """Process pool entry point for one batch of change points sharing a window layout."""
+    return _exceedances(*task)
+
+def permutation_p_values(log_returns, before_starts, starts, ends, after_stops,
+                         n_permutations=1000, seed=42, chunk_bytes=CHUNK_BYTES, max_workers=None):
+    """
+    Permutation p-values of the price and volatility shift at every change point.
+
+    Under the null hypothesis the returns around a change point are
+    exchangeable, so the observed shift is compared with the shift obtained
+    from shuffling the returns of the combined before/after window. Change
+    points with the same window layout share shuffles and are tested in
+    batches of ROWS_PER_TASK.
+
+    Args:
+        log_returns (np.ndarray): Daily log returns
+        before_starts (np.ndarray): First row of each before period
+        starts (np.ndarray): First row after each before period
+        ends (np.ndarray): First row of each after period
+        after_stops (np.ndarray): Row after each after period
+        n_permutations (int): Number of shuffles per change point
+        seed (int): Random seed
+        chunk_bytes (int): Memory budget of one gathered block
+        max_workers (int): Worker processes (None = number of cores)
+
+    Returns:
+        tuple: (price p-values, volatility p-values); NaN where a period is too short
+    """
+    returns = np.nan_to_num(np.asarray(log_returns, dtype=np.float64))
+    before_starts, starts, ends, after_stops = (np.asarray(values, dtype=np.int64) for values in
+                                                (before_starts, starts, ends, after_stops))
+    k = len(starts)
+    price_p = np.full(k, np.nan)
+    vol_p = np.full(k, np.nan)
+
+    before_lengths = starts - before_starts
+    after_starts = ends - before_starts
+    lengths = after_stops - before_starts
+    testable = (before_lengths > 1) & (after_stops - ends > 1)
+
+    layouts = {}
+    for i in np.flatnonzero(testable):
+        layouts.setdefault((before_lengths[i], after_starts[i], lengths[i]), []).append(i)
+
+    tasks, members = [], []
+    seed_sequence = np.random.SeedSequence(seed)
+    for (before_length, after_start, length), rows in layouts.items():
+        for lo in range(0, len(rows), ROWS_PER_TASK):
+            batch = np.asarray(rows[lo:lo + ROWS_PER_TASK])
+            windows = returns[before_starts[batch, None] + np.arange(length)]
+            tasks.append((windows, int(before_length), int(after_start), n_permutations,
+                          seed_sequence.spawn(1)[0], chunk_bytes))
+            members.append(batch)
+
+    if len(tasks) > 1 and max_workers != 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            counts = list(executor.map(_exceedance_task, tasks))
+    else:
+        counts = [_exceedance_task(task) for task in tasks]
+
+    for rows, (price_count, vol_count) in zip(members, counts):
+        price_p[rows] = (price_count + 1) / (n_permutations + 1)
+        vol_p[rows] = (vol_count + 1) / (n_permutations + 1)
+
+    return price_p, vol_p
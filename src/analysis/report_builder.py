@@ -0,0 +1,392 @@
+"""
+Incremental report builder for the Brent oil price analysis.
+Renders figures and report sections as independent artifacts cached by
+content hash, renders stale figures in parallel and only rebuilds the PDF
+when one of its inputs changed.
+"""
+
+import ast
+import hashlib
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+ANALYSIS_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(ANALYSIS_DIR, '..', 'models')
+
+PROCESSED_DATA = 'data/processed_brent_data.csv'
+
+# Figure path -> (renderer, source files it reads,
+#                 [(module file, function or None for the whole module), ...] of the code drawing it)
+FIGURES = {
+    'reports/price_timeseries.png': (
+        'time_series', [PROCESSED_DATA], [(os.path.join(ANALYSIS_DIR, 'preprocess_data.py'), 'plot_time_series')]),
+    'reports/statistical_analysis.png': (
+        'distributions', [PROCESSED_DATA], [(os.path.join(ANALYSIS_DIR, 'preprocess_data.py'), 'plot_distributions')]),
+    'reports/change_points_analysis.png': (
+        'change_points', [PROCESSED_DATA], [
+            (os.path.join(ANALYSIS_DIR, 'change_point_charts.py'), None),
+            (os.path.join(ANALYSIS_DIR, 'detection_kernels.py'), None),
+            (os.path.join(ANALYSIS_DIR, 'volatility_engine.py'), None),
+        ] + [(os.path.join(MODELS_DIR, 'simple_change_point_analysis.py'), name) for name in (
+            'detect_change_points_rolling_mean', 'detect_volatility_changes', 'change_point_scores',
+            '_row_positions', 'build_change_point_episodes', 'detect_change_point_episodes',
+            'plot_change_points')]),
+}
+
+MARKDOWN_EXTENSIONS = ['tables', 'fenced_code']
+
+PDF_OPTIONS = {
+    'page-size': 'A4',
+    'margin-top': '0.75in',
+    'margin-right': '0.75in',
+    'margin-bottom': '0.75in',
+    'margin-left': '0.75in',
+    'encoding': "UTF-8",
+    'no-outline': None
+}
+
+REPORT_CSS = """
+            body {
+                font-family: 'Arial', sans-serif;
+                line-height: 1.6;
+                margin: 40px;
+                color: #333;
+            }
+            h1, h2, h3 {
+                color: #2c3e50;
+                border-bottom: 2px solid #3498db;
+                padding-bottom: 10px;
+            }
+            h1 {
+                font-size: 28px;
+                text-align: center;
+                color: #2c3e50;
+            }
+            h2 {
+                font-size: 22px;
+                margin-top: 30px;
+            }
+            h3 {
+                font-size: 18px;
+                margin-top: 25px;
+            }
+            table {
+                border-collapse: collapse;
+                width: 100%;
+                margin: 20px 0;
+            }
+            th, td {
+                border: 1px solid #ddd;
+                padding: 12px;
+                text-align: left;
+            }
+            th {
+                background-color: #3498db;
+                color: white;
+                font-weight: bold;
+            }
+            tr:nth-child(even) {
+                background-color: #f2f2f2;
+            }
+            code {
+                background-color: #f4f4f4;
+                padding: 2px 4px;
+                border-radius: 3px;
+                font-family: 'Courier New', monospace;
+            }
+            pre {
+                background-color: #f4f4f4;
+                padding: 15px;
+                border-radius: 5px;
+                overflow-x: auto;
+            }
+            img {
+                max-width: 100%;
+                height: auto;
+                display: block;
+                margin: 20px auto;
+                border: 1px solid #ddd;
+            }
+            .highlight {
+                background-color: #fff3cd;
+                padding: 15px;
+                border-left: 4px solid #ffc107;
+                margin: 20px 0;
+            }
+            .footer {
+                text-align: center;
+                margin-top: 40px;
+                padding-top: 20px;
+                border-top: 1px solid #ddd;
+                color: #666;
+                font-size: 12px;
+            }
+"""
+
+HTML_TEMPLATE = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="utf-8">
+        <title>Brent Oil Price Change Point Analysis - Final Report</title>
+        <style>{css}</style>
+    </head>
+    <body>
+        {body}
+        <div class="footer">
+            <p>Generated on {generated}</p>
+            <p>Brent Oil Price Change Point Analysis - Final Report</p>
+            <p>Birhan Energies Data Science Team</p>
+        </div>
+    </body>
+    </html>
+    """
+
+IMAGE_SOURCE = re.compile(r'<img[^>]*\ssrc="([^"]+)"')
+
+def hash_bytes(*parts):
+    """SHA-256 hex digest of several str/bytes parts."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8') if isinstance(part, str) else part)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+def hash_file(path, chunk_size=1 << 20):
+    """SHA-256 hex digest of a file's contents, or 'missing' if it does not exist."""
+    if not os.path.exists(path):
+        return 'missing'
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def function_source(module_path, function_name):
+    """Source code of a top-level function (or the whole module if None), read without importing it."""
+    with open(module_path, encoding='utf-8') as f:
+        source = f.read()
+    if function_name is None:
+        return source
+    for node in ast.parse(source).body:
+        if isinstance(node, ast.FunctionDef) and node.name == function_name:
+            return ast.get_source_segment(source, node)
+    raise ValueError(f"{function_name} not found in {module_path}")
+
+def split_sections(markdown_text):
+    """
+    Split a markdown document at level-1 and level-2 headings.
+
+    Headings inside fenced code blocks are ignored.
+
+    Args:
+        markdown_text (str): Markdown document
+
+    Returns:
+        list: Markdown text of each section, in order
+    """
+    sections, current, in_fence = [], [], False
+    for line in markdown_text.splitlines(keepends=True):
+        if line.lstrip().startswith('```'):
+            in_fence = not in_fence
+        if not in_fence and re.match(r'#{1,2} ', line) and current:
+            sections.append(''.join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append(''.join(current))
+    return sections
+
+def _load_figure_data(data_path):
+    if MODELS_DIR not in sys.path:
+        sys.path.insert(0, MODELS_DIR)
+    from compact_dataset import CompactDataset
+    return CompactDataset.read_csv(data_path).to_frame()
+
+def _render_figure(task):
+    """Process pool entry point: render one figure file."""
+    renderer, data_path, output_path = task
+    import matplotlib
+    matplotlib.use('Agg')
+
+    df = _load_figure_data(data_path)
+    if renderer == 'time_series':
+        import preprocess_data
+        preprocess_data.plot_time_series(df, save_path=output_path)
+    elif renderer == 'distributions':
+        import preprocess_data
+        preprocess_data.plot_distributions(df, save_path=output_path)
+    elif renderer == 'change_points':
+        import simple_change_point_analysis as simple_cp
+        episodes = simple_cp.detect_change_point_episodes(df)
+        simple_cp.plot_change_points(df, episodes['peak'].tolist(), save_path=output_path,
+                                     priorities=episodes['max_score'].to_numpy())
+    else:
+        raise ValueError(f"Unknown figure renderer: {renderer}")
+
+    import matplotlib.pyplot as plt
+    plt.close('all')
+    return output_path
+
+class ReportBuilder:
+    """
+    Content-addressed build of the final report.
+
+    Every artifact (figure, HTML section, PDF) is keyed by a hash of its inputs;
+    keys of the last build live in a manifest so unchanged artifacts are skipped.
+    """
+
+    def __init__(self, root='.', source='FINAL_REPORT.md', output='FINAL_REPORT.pdf',
+                 cache_dir='.report_cache'):
+        self.root = root
+        self.source = source
+        self.output = output
+        self.cache_dir = os.path.join(root, cache_dir)
+        self.manifest_path = os.path.join(self.cache_dir, 'manifest.json')
+        os.makedirs(os.path.join(self.cache_dir, 'sections'), exist_ok=True)
+        try:
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.manifest = {}
+
+    def _path(self, relative):
+        return os.path.join(self.root, relative)
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def figure_key(self, figure):
+        """Hash of a figure's data files and plotting code."""
+        renderer, inputs, sources = FIGURES[figure]
+        parts = [renderer]
+        parts.extend(function_source(module_path, function_name) for module_path, function_name in sources)
+        parts.extend(hash_file(self._path(path)) for path in inputs)
+        return hash_bytes(*parts)
+
+    def build_figures(self, max_workers=None, force=False):
+        """
+        Render every figure whose inputs changed, in parallel.
+
+        Args:
+            max_workers (int): Worker processes (None = number of cores)
+            force (bool): Re-render all figures
+
+        Returns:
+            list: Figures that were rendered
+        """
+        stale = {}
+        for figure in FIGURES:
+            key = self.figure_key(figure)
+            cached = self.manifest.get(f'figure:{figure}')
+            if force or cached != key or not os.path.exists(self._path(figure)):
+                stale[figure] = key
+
+        print(f"Figures: {len(FIGURES) - len(stale)} cached, {len(stale)} to render")
+        if not stale:
+            return []
+
+        tasks = [(FIGURES[figure][0], self._path(FIGURES[figure][1][0]), self._path(figure))
+                 for figure in stale]
+        if len(tasks) > 1 and max_workers != 1:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                list(executor.map(_render_figure, tasks))
+        else:
+            for task in tasks:
+                _render_figure(task)
+
+        for figure, key in stale.items():
+            self.manifest[f'figure:{figure}'] = key
+        self._save_manifest()
+        return list(stale)
+
+    def render_sections(self):
+        """
+        Convert the report markdown to HTML section by section.
+
+        Returns:
+            str: HTML body of the report
+        """
+        import markdown
+
+        with open(self._path(self.source), encoding='utf-8') as f:
+            sections = split_sections(f.read())
+
+        fragments, rendered = [], 0
+        for section in sections:
+            key = hash_bytes(section, markdown.__version__, *MARKDOWN_EXTENSIONS)
+            path = os.path.join(self.cache_dir, 'sections', f'{key}.html')
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    fragments.append(f.read())
+                continue
+            html = markdown.markdown(section, extensions=MARKDOWN_EXTENSIONS)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(html)
+            fragments.append(html)
+            rendered += 1
+
+        print(f"Sections: {len(sections) - rendered} cached, {rendered} rendered")
+        return '\n'.join(fragments)
+
+    def pdf_key(self, body):
+        """Hash of the HTML body, styling, PDF options and every referenced image."""
+        images = sorted(set(IMAGE_SOURCE.findall(body)))
+        return hash_bytes(body, REPORT_CSS, HTML_TEMPLATE, json.dumps(PDF_OPTIONS, sort_keys=True),
+                          *(f'{image}={hash_file(self._path(image))}' for image in images))
+
+    def build_pdf(self, body, force=False, html_path='temp_report.html'):
+        """
+        Write the report HTML and convert it to PDF if anything changed.
+
+        The HTML file is kept when PDF conversion fails so it can be printed
+        from a browser instead.
+
+        Args:
+            body (str): HTML body from render_sections
+            force (bool): Rebuild even if the inputs are unchanged
+            html_path (str): Intermediate HTML file
+
+        Returns:
+            bool: True if the PDF was rebuilt
+        """
+        key = self.pdf_key(body)
+        if not force and self.manifest.get('pdf') == key and os.path.exists(self._path(self.output)):
+            print(f"PDF unchanged: {self.output}")
+            return False
+
+        html = HTML_TEMPLATE.format(css=REPORT_CSS, body=body,
+                                    generated=datetime.now().strftime('%B %d, %Y at %I:%M %p'))
+        html_path = self._path(html_path)
+        with open(html_path, 'w', encoding='utf-8') as f:
+            f.write(html)
+
+        import pdfkit
+        pdfkit.from_file(html_path, self._path(self.output), options=PDF_OPTIONS)
+        os.remove(html_path)
+
+        self.manifest['pdf'] = key
+        self._save_manifest()
+        return True
+
+    def build(self, max_workers=None, force=False):
+        """
+        Build figures, sections and the PDF, skipping unchanged artifacts.
+
+        Args:
+            max_workers (int): Worker processes for figure rendering
+            force (bool): Rebuild every artifact
+
+        Returns:
+            bool: True if the PDF was rebuilt
+        """
+        self.build_figures(max_workers=max_workers, force=force)
+        body = self.render_sections()
+        return self.build_pdf(body, force=force)
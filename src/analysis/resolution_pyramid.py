@@ -0,0 +1,95 @@
+"""
+Multi-resolution aggregation pyramid for Brent oil price data.
+Builds weekly, monthly and quarterly OHLC bars with mean price, volatility and
+log return so long-range charts can read hundreds of rows instead of thousands.
+"""
+
+import os
+
+import pandas as pd
+
+# Pyramid levels from finest to coarsest, with their resample rules
+LEVELS = {
+    'weekly': 'W-FRI',
+    'monthly': 'ME',
+    'quarterly': 'QE'
+}
+
+PYRAMID_COLUMNS = ['open', 'high', 'low', 'close', 'mean', 'volatility', 'log_return', 'observations']
+
+def level_file_name(level):
+    """File name of a persisted pyramid level."""
+    return f'brent_{level}.csv'
+
+def aggregate_level(df, rule):
+    """
+    Aggregate daily data into bars for one resample rule.
+
+    Each bar is dated by its first trading day. The log return of a bar is
+    the sum of its daily log returns (close over the previous bar's close)
+    and its volatility is the sample standard deviation of those returns.
+
+    Args:
+        df (pd.DataFrame): Processed data with Price and log_returns and a date index
+        rule (str): Pandas resample rule
+
+    Returns:
+        pd.DataFrame: One row per non-empty period
+    """
+    resampler = df.resample(rule)
+    bars = resampler['Price'].ohlc()
+    bars['mean'] = resampler['Price'].mean()
+    bars['volatility'] = resampler['log_returns'].std()
+    bars['log_return'] = resampler['log_returns'].sum()
+    bars['observations'] = resampler['Price'].count()
+
+    first_dates = pd.Series(df.index, index=df.index).resample(rule).first()
+    bars = bars[bars['observations'] > 0]
+    bars.index = pd.DatetimeIndex(first_dates[bars.index].values, name='Date')
+    return bars[PYRAMID_COLUMNS]
+
+def build_pyramid(df, levels=LEVELS):
+    """
+    Build every pyramid level from daily data.
+
+    Args:
+        df (pd.DataFrame): Processed data with Price and log_returns and a date index
+        levels (dict): Level name -> resample rule
+
+    Returns:
+        dict: Level name -> aggregated DataFrame
+    """
+    print("Building resolution pyramid...")
+    pyramid = {level: aggregate_level(df, rule) for level, rule in levels.items()}
+    for level, bars in pyramid.items():
+        print(f"  {level}: {len(bars)} bars")
+    return pyramid
+
+def save_pyramid(pyramid, directory='../../data'):
+    """
+    Save pyramid levels as CSV files.
+
+    Args:
+        pyramid (dict): Level name -> aggregated DataFrame
+        directory (str): Output directory
+    """
+    for level, bars in pyramid.items():
+        path = os.path.join(directory, level_file_name(level))
+        print(f"Saving {level} bars to {path}...")
+        bars.to_csv(path)
+
+def choose_level(row_counts, width):
+    """
+    Pick the finest resolution that fits in the requested pixel width.
+
+    Args:
+        row_counts (dict): Level name -> rows in the requested range, finest first
+        width (int): Available horizontal pixels (one bar per pixel at most)
+
+    Returns:
+        str: Chosen level name (the coarsest level if none fits)
+    """
+    for level, rows in row_counts.items():
+        if rows <= width:
+            return level
+    return list(row_counts)[-1]
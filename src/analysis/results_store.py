@@ -0,0 +1,295 @@
+"""
+Embedded SQLite store for Brent oil price analysis results.
+Keeps prices, events, change points, regime statistics and run metadata in
+indexed tables so results can be filtered by date range, event category and
+run without rewriting CSV files.
+"""
+
+import json
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    method TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    parameters TEXT,
+    n_change_points INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_runs_method ON runs (method, run_id);
+
+CREATE TABLE IF NOT EXISTS prices (
+    date TEXT PRIMARY KEY,
+    price REAL NOT NULL,
+    log_returns REAL,
+    volatility REAL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS events (
+    event_id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    event TEXT NOT NULL,
+    category TEXT,
+    description TEXT,
+    impact_score REAL,
+    region TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_events_date ON events (date);
+CREATE INDEX IF NOT EXISTS idx_events_category_date ON events (category, date);
+
+CREATE TABLE IF NOT EXISTS change_points (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    change_point TEXT NOT NULL,
+    date TEXT NOT NULL,
+    median_date TEXT,
+    lower_ci TEXT,
+    upper_ci TEXT,
+    confidence_level REAL,
+    correlated_event TEXT,
+    event_date TEXT,
+    days_diff INTEGER,
+    event_category TEXT,
+    PRIMARY KEY (run_id, change_point)
+);
+CREATE INDEX IF NOT EXISTS idx_change_points_run_date ON change_points (run_id, date);
+CREATE INDEX IF NOT EXISTS idx_change_points_date ON change_points (date);
+
+CREATE TABLE IF NOT EXISTS regime_stats (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    change_point TEXT NOT NULL,
+    date TEXT NOT NULL,
+    before_mean REAL,
+    after_mean REAL,
+    before_vol REAL,
+    after_vol REAL,
+    price_change_pct REAL,
+    vol_change_pct REAL,
+    price_p_value REAL,
+    vol_p_value REAL,
+    PRIMARY KEY (run_id, change_point)
+);
+CREATE INDEX IF NOT EXISTS idx_regime_stats_run_date ON regime_stats (run_id, date);
+"""
+
+CHANGE_POINT_COLUMNS = ['change_point', 'date', 'median_date', 'lower_ci', 'upper_ci', 'confidence_level',
+                        'correlated_event', 'event_date', 'days_diff', 'event_category']
+REGIME_COLUMNS = ['date', 'before_mean', 'after_mean', 'before_vol', 'after_vol', 'price_change_pct',
+                  'vol_change_pct', 'price_p_value', 'vol_p_value']
+
+def _iso_date(value):
+    """Format a date-like value as YYYY-MM-DD (None stays None)."""
+    if value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NaT:
+        return None
+    return pd.Timestamp(value).strftime('%Y-%m-%d')
+
+def _sql_value(value):
+    """Convert NumPy scalars and NaN into SQLite-compatible values."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+class ResultsStore:
+    """
+    SQLite database of analysis results.
+
+    Writes happen in one transaction per call; reads use the date and
+    category indexes, so filtered queries cost O(log n) plus the rows returned.
+    """
+
+    def __init__(self, path='../../reports/brent_results.db', read_only=False):
+        self.path = path
+        if read_only:
+            self.connection = sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False)
+        else:
+            self.connection = sqlite3.connect(path)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.executescript(SCHEMA)
+        self.connection.row_factory = sqlite3.Row
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Writes
+
+    def start_run(self, method, parameters=None):
+        """
+        Register a new analysis run.
+
+        Args:
+            method (str): Detection method, e.g. 'rolling_mean' or 'bayesian'
+            parameters (dict): Parameters of the run (stored as JSON)
+
+        Returns:
+            int: Run ID
+        """
+        with self.connection:
+            cursor = self.connection.execute(
+                'INSERT INTO runs (method, started_at, parameters) VALUES (?, ?, ?)',
+                (method, datetime.now().isoformat(timespec='seconds'), json.dumps(parameters or {}, default=str)))
+        return cursor.lastrowid
+
+    def finish_run(self, run_id, n_change_points):
+        """Mark a run as finished with its number of change points."""
+        with self.connection:
+            self.connection.execute(
+                'UPDATE runs SET finished_at = ?, n_change_points = ? WHERE run_id = ?',
+                (datetime.now().isoformat(timespec='seconds'), int(n_change_points), run_id))
+
+    def write_prices(self, df):
+        """
+        Replace the stored price series.
+
+        Args:
+            df (pd.DataFrame): Processed data with Price, log_returns and a date index
+        """
+        volatility = df['volatility'] if 'volatility' in df.columns else pd.Series(np.nan, index=df.index)
+        rows = zip(df.index.strftime('%Y-%m-%d'), df['Price'].astype(float),
+                   df['log_returns'].astype(float), volatility.astype(float))
+        with self.connection:
+            self.connection.execute('DELETE FROM prices')
+            self.connection.executemany('INSERT INTO prices VALUES (?, ?, ?, ?)',
+                                        ((d, p, _sql_value(r), _sql_value(v)) for d, p, r, v in rows))
+
+    def write_events(self, events_df):
+        """
+        Replace the stored events.
+
+        Args:
+            events_df (pd.DataFrame): Events with Date, Event, Category, Description,
+                Impact_Score and (optionally) Region
+        """
+        region = events_df['Region'] if 'Region' in events_df.columns else pd.Series(None, index=events_df.index)
+        rows = zip(pd.to_datetime(events_df['Date']).dt.strftime('%Y-%m-%d'), events_df['Event'],
+                   events_df['Category'], events_df['Description'], events_df['Impact_Score'], region)
+        with self.connection:
+            self.connection.execute('DELETE FROM events')
+            self.connection.executemany(
+                'INSERT INTO events (date, event, category, description, impact_score, region) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                ([_sql_value(value) for value in row] for row in rows))
+
+    def write_change_points(self, run_id, records):
+        """
+        Store the change points of a run.
+
+        Args:
+            run_id (int): Run ID
+            records (list): Dicts keyed by CHANGE_POINT_COLUMNS (missing keys are NULL)
+        """
+        date_columns = {'date', 'median_date', 'lower_ci', 'upper_ci', 'event_date'}
+        rows = [[run_id] + [_iso_date(record.get(column)) if column in date_columns
+                            else _sql_value(record.get(column)) for column in CHANGE_POINT_COLUMNS]
+                for record in records]
+        placeholders = ', '.join('?' * (len(CHANGE_POINT_COLUMNS) + 1))
+        with self.connection:
+            self.connection.executemany(
+                f'INSERT OR REPLACE INTO change_points (run_id, {", ".join(CHANGE_POINT_COLUMNS)}) '
+                f'VALUES ({placeholders})', rows)
+
+    def write_regime_stats(self, run_id, regime_analysis):
+        """
+        Store the regime statistics of a run.
+
+        Args:
+            run_id (int): Run ID
+            regime_analysis (dict): Output of analyze_regime_changes
+        """
+        rows = [[run_id, name, _iso_date(stats['date'])] +
+                [_sql_value(stats.get(column)) for column in REGIME_COLUMNS[1:]]
+                for name, stats in regime_analysis.items()]
+        placeholders = ', '.join('?' * (len(REGIME_COLUMNS) + 2))
+        with self.connection:
+            self.connection.executemany(
+                f'INSERT OR REPLACE INTO regime_stats (run_id, change_point, {", ".join(REGIME_COLUMNS)}) '
+                f'VALUES ({placeholders})', rows)
+
+    # Queries
+
+    def _query(self, sql, params):
+        with closing(self.connection.execute(sql, params)) as cursor:
+            return [dict(row) for row in cursor.fetchall()]
+
+    def runs(self, method=None, limit=50):
+        """Most recent runs, optionally for one method."""
+        sql = 'SELECT * FROM runs'
+        params = []
+        if method:
+            sql += ' WHERE method = ?'
+            params.append(method)
+        sql += ' ORDER BY run_id DESC LIMIT ?'
+        params.append(limit)
+        rows = self._query(sql, params)
+        for row in rows:
+            row['parameters'] = json.loads(row['parameters'] or '{}')
+        return rows
+
+    def latest_run_id(self, method=None):
+        """ID of the most recent finished run, or None."""
+        sql = 'SELECT run_id FROM runs WHERE finished_at IS NOT NULL'
+        params = []
+        if method:
+            sql += ' AND method = ?'
+            params.append(method)
+        rows = self._query(sql + ' ORDER BY run_id DESC LIMIT 1', params)
+        return rows[0]['run_id'] if rows else None
+
+    def has_run(self, run_id):
+        """Whether a run with this ID was stored."""
+        return bool(self._query('SELECT 1 FROM runs WHERE run_id = ?', [run_id]))
+
+    @staticmethod
+    def _date_filter(start, end, column='date'):
+        clauses, params = [], []
+        if start:
+            clauses.append(f'{column} >= ?')
+            params.append(start)
+        if end:
+            clauses.append(f'{column} <= ?')
+            params.append(end)
+        return clauses, params
+
+    def prices(self, start=None, end=None):
+        """Prices between two YYYY-MM-DD dates (inclusive)."""
+        clauses, params = self._date_filter(start, end)
+        where = f' WHERE {" AND ".join(clauses)}' if clauses else ''
+        return self._query(f'SELECT * FROM prices{where} ORDER BY date', params)
+
+    def events(self, start=None, end=None, category=None):
+        """Events in a date range, optionally of one category."""
+        clauses, params = self._date_filter(start, end)
+        if category:
+            clauses.insert(0, 'category = ?')
+            params.insert(0, category)
+        where = f' WHERE {" AND ".join(clauses)}' if clauses else ''
+        return self._query(f'SELECT * FROM events{where} ORDER BY date', params)
+
+    def change_points(self, run_id, start=None, end=None, category=None):
+        """Change points of a run in a date range, optionally matched to an event category."""
+        clauses, params = self._date_filter(start, end)
+        clauses.insert(0, 'run_id = ?')
+        params.insert(0, run_id)
+        if category:
+            clauses.append('event_category = ?')
+            params.append(category)
+        return self._query(f'SELECT * FROM change_points WHERE {" AND ".join(clauses)} ORDER BY date', params)
+
+    def regime_stats(self, run_id, start=None, end=None):
+        """Regime statistics of a run in a date range."""
+        clauses, params = self._date_filter(start, end)
+        clauses.insert(0, 'run_id = ?')
+        params.insert(0, run_id)
+        return self._query(f'SELECT * FROM regime_stats WHERE {" AND ".join(clauses)} ORDER BY date', params)
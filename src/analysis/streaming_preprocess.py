@@ -0,0 +1,325 @@
+"""
+Out-of-core preprocessing for large intraday/tick Brent price files.
+Reads the CSV in chunks, carries the last price and the rolling-window state
+across chunk boundaries and writes the processed columns incrementally to a
+memory-mappable column directory, so peak memory depends on the chunk size
+instead of the file size. The output matches preprocess_data's in-memory
+pipeline (load_brent_data -> calculate_returns -> identify_volatility_periods)
+value for value.
+
+Output layout (the SharedDatasetStore snapshot format):
+    <output>/meta.json, dates.npy, col_<name>.npy, flag_<name>.npy
+
+Usage:
+    python streaming_preprocess.py ../../data/intraday.csv ../../data/intraday.columns \\
+        --date-format "%Y-%m-%d %H:%M:%S"
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+warnings.filterwarnings('ignore')
+
+from compact_dataset import CompactDataset, NS_PER_DAY
+from instrumentation import instrument
+from volatility_engine import DEFAULT_WINDOWS, VolatilityStream, rolling_column
+
+DEFAULT_CHUNK_ROWS = 1_000_000
+BRENT_DATE_FORMAT = '%d-%b-%y'
+SPILL_COLUMNS = (('dates', np.int64), ('Price', np.float64), ('log_returns', np.float64))
+
+def read_price_chunks(file_path, chunk_rows=DEFAULT_CHUNK_ROWS, date_format=BRENT_DATE_FORMAT):
+    """
+    Parse a Date/Price CSV chunk by chunk, as load_brent_data would.
+
+    Rows with unparseable dates or missing prices are dropped. The file
+    must already be in chronological order; an out-of-order row raises
+    instead of silently diverging from the sorted in-memory path.
+
+    Args:
+        file_path (str): Path to the CSV file
+        chunk_rows (int): CSV rows parsed per chunk
+        date_format (str): strptime format of the Date column
+
+    Yields:
+        tuple: (int64 nanosecond timestamps, float64 prices) per chunk
+    """
+    last_date = None
+    for chunk in pd.read_csv(file_path, usecols=['Date', 'Price'], chunksize=chunk_rows):
+        chunk['Date'] = pd.to_datetime(chunk['Date'], format=date_format, errors='coerce')
+        chunk = chunk.dropna()
+        if chunk.empty:
+            continue
+
+        dates = pd.DatetimeIndex(chunk['Date']).as_unit('ns').asi8
+        if (np.diff(dates) < 0).any() or (last_date is not None and dates[0] < last_date):
+            raise ValueError(f"{file_path} is not in chronological order; "
+                             "sort it or use the in-memory preprocessing")
+        last_date = dates[-1]
+        yield dates, chunk['Price'].to_numpy(dtype=np.float64)
+
+def _order_keys(values):
+    """Map float64 values to uint64 keys with the same ordering (NaN excluded by callers)."""
+    bits = np.ascontiguousarray(values, dtype=np.float64).view(np.uint64)
+    sign = np.uint64(1 << 63)
+    return np.where(bits & sign, ~bits, bits | sign)
+
+def npy_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Chunk source over a 1-D .npy file read sequentially (no memory map).
+
+    Args:
+        path (str): .npy file
+        chunk_rows (int): Values per chunk
+
+    Returns:
+        callable: Function returning a fresh iterator of chunks on each call
+    """
+    def chunks():
+        with open(path, 'rb') as f:
+            version = np.lib.format.read_magic(f)
+            read_header = (np.lib.format.read_array_header_1_0 if version == (1, 0)
+                           else np.lib.format.read_array_header_2_0)
+            shape, _, dtype = read_header(f)
+            for start in range(0, shape[0], chunk_rows):
+                yield np.fromfile(f, dtype=dtype, count=min(chunk_rows, shape[0] - start))
+    return chunks
+
+def array_chunks(values, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Chunk source over an in-memory or memory-mapped array."""
+    return lambda: (values[start:start + chunk_rows] for start in range(0, len(values), chunk_rows))
+
+def _select_rank(chunks, rank, collect_limit):
+    """
+    k-th smallest non-NaN value of a chunked column by radix selection.
+
+    Each pass histograms the next 16 bits of the order keys among the values
+    still in play; once few enough remain they are collected and partitioned.
+    """
+    prefix, prefix_bits = np.uint64(0), 0
+    while True:
+        shift = np.uint64(64 - prefix_bits - 16)
+        counts = np.zeros(1 << 16, dtype=np.int64)
+        for chunk in chunks():
+            keys = _order_keys(chunk[~np.isnan(chunk)])
+            if prefix_bits:
+                keys = keys[(keys >> np.uint64(64 - prefix_bits)) == prefix]
+            counts += np.bincount(((keys >> shift) & np.uint64(0xFFFF)).astype(np.int64),
+                                  minlength=1 << 16)
+
+        cumulative = np.cumsum(counts)
+        bucket = int(np.searchsorted(cumulative, rank, side='right'))
+        rank -= int(cumulative[bucket - 1]) if bucket else 0
+        prefix = (prefix << np.uint64(16)) | np.uint64(bucket)
+        prefix_bits += 16
+        if counts[bucket] <= collect_limit or prefix_bits == 64:
+            break
+
+    selected = []
+    for chunk in chunks():
+        chunk = chunk[~np.isnan(chunk)]
+        selected.append(chunk[(_order_keys(chunk) >> np.uint64(64 - prefix_bits)) == prefix])
+    selected = np.concatenate(selected)
+    return float(np.partition(selected, rank)[rank])
+
+@instrument
+def exact_quantile(chunks, q, collect_limit=DEFAULT_CHUNK_ROWS):
+    """
+    Quantile of a column too large for memory, equal to pd.Series.quantile.
+
+    The two order statistics around the quantile are found by radix
+    selection over the chunks, then interpolated linearly by np.quantile
+    itself so rounding matches the in-memory computation.
+
+    Args:
+        chunks (callable): Chunk source (npy_chunks or array_chunks); NaN skipped
+        q (float): Quantile in [0, 1]
+        collect_limit (int): Candidates gathered in memory for the final partition
+
+    Returns:
+        float: Quantile value (NaN if there are no values)
+    """
+    n = sum(int((~np.isnan(chunk)).sum()) for chunk in chunks())
+    if n == 0:
+        return np.nan
+
+    virtual_index = (n - 1) * q
+    lower = int(np.floor(virtual_index))
+    upper = min(lower + 1, n - 1)
+    gamma = virtual_index - lower
+    lower_value = _select_rank(chunks, lower, collect_limit)
+    upper_value = lower_value if upper == lower else _select_rank(chunks, upper, collect_limit)
+    # For two points np.quantile's virtual index is gamma itself
+    return float(np.quantile(np.array([lower_value, upper_value]), gamma))
+
+def _pairwise_sum(path, start, count, leaf_rows):
+    """
+    Sum of float64 values [start, start + count) of a raw file, equal to np.sum.
+
+    Follows the block splits of NumPy's pairwise summation down to leaves
+    of at most leaf_rows values, each summed by NumPy itself, so the result
+    matches np.sum over the whole array without holding it in memory.
+    """
+    if count <= leaf_rows:
+        with open(path, 'rb') as f:
+            f.seek(start * 8)
+            return np.add.reduce(np.fromfile(f, dtype=np.float64, count=count))
+    half = count // 2
+    half -= half % 8
+    return _pairwise_sum(path, start, half, leaf_rows) + _pairwise_sum(path, start + half, count - half, leaf_rows)
+
+def _spill_chunks(spill_dir, length, chunk_rows):
+    """Read the spilled raw columns back sequentially in aligned chunks."""
+    files = [open(os.path.join(spill_dir, f'{name}.bin'), 'rb') for name, _ in SPILL_COLUMNS]
+    try:
+        for start in range(0, length, chunk_rows):
+            count = min(chunk_rows, length - start)
+            yield start, [np.fromfile(f, dtype=dtype, count=count) for f, (_, dtype) in zip(files, SPILL_COLUMNS)]
+    finally:
+        for f in files:
+            f.close()
+
+def _open_npy(path, dtype, length):
+    """Open a .npy file for sequential writing of a 1-D array of known length."""
+    f = open(path, 'wb')
+    np.lib.format.write_array_header_1_0(f, {'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                                             'fortran_order': False, 'shape': (length,)})
+    return f
+
+@instrument
+def preprocess_streaming(file_path='../../data/BrentOilPrices.csv',
+                         output_dir='../../data/processed_brent_data.columns',
+                         chunk_rows=DEFAULT_CHUNK_ROWS, date_format=BRENT_DATE_FORMAT,
+                         window=30, high_volatility_quantile=0.95):
+    """
+    Preprocess a price file chunk by chunk into a column directory.
+
+    Pass 1 parses the CSV, computes log returns with the last price carried
+    across chunks and spills dates, prices and returns to raw files. Pass 2
+    streams the returns through VolatilityStream (centered on the mean
+    return, as compute_volatility is) and writes every column. Pass 3 finds
+    the high-volatility threshold with exact_quantile and pass 4 writes the
+    bit-packed flag.
+
+    Args:
+        file_path (str): Path to the raw Date/Price CSV
+        output_dir (str): Directory receiving the processed columns (replaced if present)
+        chunk_rows (int): Rows held in memory per chunk
+        date_format (str): strptime format of the Date column
+        window (int): Rolling window of the 'volatility' column
+        high_volatility_quantile (float): Quantile above which volatility is flagged high
+
+    Returns:
+        CompactDataset: Processed data mapped read-only from output_dir
+    """
+    print(f"Preprocessing {file_path} in chunks of {chunk_rows:,} rows...")
+    started = time.perf_counter()
+
+    output_dir = os.path.abspath(output_dir)
+    work_dir = f'{output_dir}.tmp-{os.getpid()}'
+    spill_dir = os.path.join(work_dir, 'spill')
+    os.makedirs(spill_dir)
+
+    try:
+        # Pass 1: parse, log returns, spill
+        length, all_midnight, last_price = 0, True, None
+        spill_files = {name: open(os.path.join(spill_dir, f'{name}.bin'), 'wb') for name, _ in SPILL_COLUMNS}
+        try:
+            for dates, prices in read_price_chunks(file_path, chunk_rows, date_format):
+                previous = np.concatenate([[np.nan if last_price is None else last_price], prices[:-1]])
+                log_returns = np.log(prices / previous)
+                last_price = prices[-1]
+
+                # calculate_returns drops every row whose return is NaN
+                keep = ~np.isnan(log_returns)
+                for name, values in (('dates', dates), ('Price', prices), ('log_returns', log_returns)):
+                    values[keep].tofile(spill_files[name])
+                all_midnight &= not (dates[keep] % NS_PER_DAY).any()
+                length += int(keep.sum())
+        finally:
+            for f in spill_files.values():
+                f.close()
+        print(f"Parsed {length:,} observations")
+
+        # Pass 2: volatility columns, centered exactly as compute_volatility centers them
+        returns_path = os.path.join(spill_dir, 'log_returns.bin')
+        center = _pairwise_sum(returns_path, 0, length, chunk_rows) / length if length else 0.0
+        stream = VolatilityStream(center, windows=tuple(sorted(set(DEFAULT_WINDOWS) | {window})))
+
+        date_unit = 'D' if all_midnight else 'ns'
+        date_dtype = np.int32 if all_midnight else np.int64
+        files = {'dates': _open_npy(os.path.join(work_dir, 'dates.npy'), date_dtype, length)}
+        columns = []
+        try:
+            for start, (dates, prices, returns) in _spill_chunks(spill_dir, length, chunk_rows):
+                (dates // NS_PER_DAY if all_midnight else dates).astype(date_dtype).tofile(files['dates'])
+                volatility = stream.update(returns)
+                chunk_columns = {'Price': prices, 'log_returns': returns, **volatility,
+                                 'volatility': volatility[rolling_column(window)]}
+                for name, values in chunk_columns.items():
+                    if name not in files:
+                        files[name] = _open_npy(os.path.join(work_dir, f'col_{name}.npy'), np.float64, length)
+                        columns.append(name)
+                    values.tofile(files[name])
+        finally:
+            for f in files.values():
+                f.close()
+        shutil.rmtree(spill_dir)
+
+        # Pass 3: exact threshold over the written column
+        volatility = npy_chunks(os.path.join(work_dir, 'col_volatility.npy'), chunk_rows)
+        threshold = exact_quantile(volatility, high_volatility_quantile, chunk_rows)
+
+        # Pass 4: bit-packed flag, in chunks of whole bytes
+        flag_rows = max(chunk_rows - chunk_rows % 8, 8)
+        high_volatility_days = 0
+        with _open_npy(os.path.join(work_dir, 'flag_high_volatility.npy'), np.uint8, (length + 7) // 8) as f:
+            for chunk in npy_chunks(os.path.join(work_dir, 'col_volatility.npy'), flag_rows)():
+                flags = chunk > threshold
+                high_volatility_days += int(flags.sum())
+                np.packbits(flags).tofile(f)
+
+        stat = os.stat(file_path)
+        meta = {
+            'source_key': [os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size],
+            'date_unit': date_unit,
+            'columns': columns,
+            'flags': ['high_volatility'],
+            'length': length,
+            'volatility_threshold': threshold
+        }
+        with open(os.path.join(work_dir, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+        if os.path.isdir(output_dir):
+            shutil.rmtree(output_dir)
+        os.rename(work_dir, output_dir)
+    except BaseException:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise
+
+    print(f"High volatility threshold: {threshold:.4f}")
+    print(f"High volatility periods: {high_volatility_days} observations")
+    print(f"Wrote {length:,} rows to {output_dir} in {time.perf_counter() - started:.1f}s")
+    return CompactDataset.load_directory(output_dir)
+
+def main(argv=None):
+    """Run the streaming preprocessing from the command line."""
+    parser = argparse.ArgumentParser(description="Chunked out-of-core preprocessing of a price file")
+    parser.add_argument('input', nargs='?', default='../../data/BrentOilPrices.csv')
+    parser.add_argument('output', nargs='?', default='../../data/processed_brent_data.columns')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--date-format', default=BRENT_DATE_FORMAT)
+    args = parser.parse_args(argv)
+
+    print("=== Streaming Brent Oil Price Preprocessing ===\n")
+    preprocess_streaming(args.input, args.output, chunk_rows=args.chunk_rows, date_format=args.date_format)
+
+if __name__ == "__main__":
+    main()
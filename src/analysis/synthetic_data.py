@@ -0,0 +1,442 @@
+"""
+Synthetic regime-switching data generator for Brent oil price analysis.
+Produces price/return series with known change points, matching event tables,
+and scores detector output against the true breaks.
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+BRENT_DATE_FORMAT = '%d-%b-%y'
+ISO_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+EVENT_CATEGORIES = ['Conflict', 'Political', 'Economic', 'OPEC', 'Natural Disaster']
+
+# Two-digit years only round-trip through load_brent_data up to 2068
+LAST_LOADABLE_YEAR = 2068
+
+# Frequencies tried by freq='auto', coarsest first
+AUTO_FREQUENCIES = ['B', 'h', 'min', 's']
+
+# Points for the log price to revert half way to its start (two years of business days)
+DEFAULT_HALF_LIFE = 504
+
+def make_regime_schedule(n_points, n_regimes=5, mean_shift=0.001, vol_range=(0.01, 0.04),
+                         min_regime_length=252, seed=None):
+    """
+    Draw regime boundaries and per-regime return parameters.
+
+    Args:
+        n_points (int): Total series length
+        n_regimes (int): Number of regimes (n_regimes - 1 true breaks)
+        mean_shift (float): Standard deviation of the per-regime mean return
+        vol_range (tuple): Range of the per-regime daily volatility (log-uniform)
+        min_regime_length (int): Minimum number of points in a regime
+        seed (int): Random seed
+
+    Returns:
+        pd.DataFrame: One row per regime with start, end, mean and volatility
+    """
+    if n_regimes * min_regime_length > n_points:
+        raise ValueError(f"{n_regimes} regimes of at least {min_regime_length} points "
+                         f"do not fit in {n_points} points")
+
+    rng = np.random.default_rng(seed)
+
+    # Spread the slack randomly between regimes, keeping the minimum length
+    slack = n_points - n_regimes * min_regime_length
+    cuts = np.sort(rng.integers(0, slack + 1, size=n_regimes - 1))
+    lengths = np.diff(np.concatenate([[0], cuts, [slack]])) + min_regime_length
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+
+    log_low, log_high = np.log(vol_range[0]), np.log(vol_range[1])
+    return pd.DataFrame({
+        'regime': np.arange(n_regimes),
+        'start': starts,
+        'end': starts + lengths,
+        'mean': rng.normal(0, mean_shift, size=n_regimes),
+        'volatility': np.exp(rng.uniform(log_low, log_high, size=n_regimes))
+    })
+
+def _draw_returns(schedule, start, stop, tail_df, rng):
+    """Draw log returns for positions [start, stop) of a regime schedule."""
+    positions = np.arange(start, stop)
+    regime = np.searchsorted(schedule['start'].values, positions, side='right') - 1
+
+    if tail_df is None:
+        shocks = rng.standard_normal(stop - start)
+    else:
+        # Scale Student-t draws to unit variance so volatility stays comparable
+        shocks = rng.standard_t(tail_df, size=stop - start) * np.sqrt((tail_df - 2) / tail_df)
+
+    return schedule['mean'].values[regime] + schedule['volatility'].values[regime] * shocks
+
+def _log_price_deviation(returns, half_life, last_deviation=0.0):
+    """
+    Integrate returns into the log price deviation from the start price.
+
+    The deviation follows x[t] = phi * x[t-1] + returns[t] with
+    phi = 2 ** (-1 / half_life), a discrete Ornstein-Uhlenbeck process, so
+    the per-regime drift settles at a bounded offset instead of compounding
+    without limit. half_life=None gives the plain cumulative sum.
+
+    Args:
+        returns (np.ndarray): Drawn log returns
+        half_life (float): Points for a deviation to decay by half (None = no reversion)
+        last_deviation (float): Deviation before the first return (carried across chunks)
+
+    Returns:
+        np.ndarray: Log price deviation at every point
+    """
+    if half_life is None:
+        return last_deviation + np.cumsum(returns)
+    phi = 2.0 ** (-1.0 / half_life)
+    deviation, _ = lfilter([1.0], [1.0, -phi], returns, zi=[phi * last_deviation])
+    return deviation
+
+def _last_year(start_date, n_points, offset):
+    """Year of the last date of a series, inf when it overflows the timestamp range."""
+    try:
+        return (pd.Timestamp(start_date) + (n_points - 1) * offset).year
+    except (OverflowError, pd.errors.OutOfBoundsDatetime, pd.errors.OutOfBoundsTimedelta):
+        return np.inf
+
+def auto_frequency(n_points, start_date='1987-05-20'):
+    """
+    Coarsest frequency whose date span stays loadable from start_date.
+
+    Args:
+        n_points (int): Series length
+        start_date (str): Date of the first observation
+
+    Returns:
+        str: Pandas frequency from AUTO_FREQUENCIES
+    """
+    for freq in AUTO_FREQUENCIES:
+        if _last_year(start_date, n_points, pd.tseries.frequencies.to_offset(freq)) <= LAST_LOADABLE_YEAR:
+            return freq
+    raise ValueError(f"{n_points:,} points starting {start_date} do not fit before "
+                     f"{LAST_LOADABLE_YEAR + 1} even at one per second")
+
+def generate_regime_series(n_points, n_regimes=5, mean_shift=0.001, vol_range=(0.01, 0.04),
+                           tail_df=None, min_regime_length=252, start_price=18.63,
+                           start_date='1987-05-20', freq='B', half_life=DEFAULT_HALF_LIFE,
+                           seed=None):
+    """
+    Generate an in-memory price/return series with known change points.
+
+    Args:
+        n_points (int): Series length
+        n_regimes (int): Number of regimes
+        mean_shift (float): Standard deviation of the per-regime mean return
+        vol_range (tuple): Range of the per-regime volatility
+        tail_df (float): Student-t degrees of freedom for heavy tails (None = Gaussian)
+        min_regime_length (int): Minimum number of points in a regime
+        start_price (float): Price at the first observation
+        start_date (str): Date of the first observation
+        freq (str): Pandas frequency of the date index ('auto' = coarsest loadable one)
+        half_life (float): Mean-reversion half-life of the log price in points (None = random walk)
+        seed (int): Random seed
+
+    Returns:
+        tuple: (pd.DataFrame with Price and log_returns, pd.DataFrame of true breaks)
+    """
+    if tail_df is not None and tail_df <= 2:
+        raise ValueError("tail_df must be greater than 2 for a finite variance")
+
+    rng = np.random.default_rng(seed)
+    schedule = make_regime_schedule(n_points, n_regimes, mean_shift, vol_range,
+                                    min_regime_length, seed=rng.integers(2**32))
+
+    returns = _draw_returns(schedule, 0, n_points, tail_df, rng)
+    returns[0] = 0.0
+    deviation = _log_price_deviation(returns, half_life)
+    prices = start_price * np.exp(deviation)
+    if freq == 'auto':
+        freq = auto_frequency(n_points, start_date)
+    dates = pd.date_range(start_date, periods=n_points, freq=freq)
+
+    # Reversion pulls on the drawn returns, so report the realised ones
+    df = pd.DataFrame({'Price': prices, 'log_returns': np.diff(deviation, prepend=0.0)},
+                      index=pd.Index(dates, name='Date'))
+    return df, true_breaks(schedule, dates)
+
+def true_breaks(schedule, dates):
+    """
+    Describe the true change points of a regime schedule.
+
+    Args:
+        schedule (pd.DataFrame): Regime schedule from make_regime_schedule
+        dates (pd.DatetimeIndex): Dates of the generated series
+
+    Returns:
+        pd.DataFrame: One row per break with position, date and parameter shifts
+    """
+    before = schedule.iloc[:-1].reset_index(drop=True)
+    after = schedule.iloc[1:].reset_index(drop=True)
+    return pd.DataFrame({
+        'position': after['start'].values,
+        'date': dates[after['start'].values],
+        'mean_before': before['mean'].values,
+        'mean_after': after['mean'].values,
+        'vol_before': before['volatility'].values,
+        'vol_after': after['volatility'].values,
+    })
+
+def write_regime_series(file_path, n_points, chunk_size=1_000_000, n_regimes=5, mean_shift=0.001,
+                        vol_range=(0.01, 0.04), tail_df=None, min_regime_length=252,
+                        start_price=18.63, start_date='1987-05-20', freq='auto', date_format=None,
+                        half_life=DEFAULT_HALF_LIFE, seed=None):
+    """
+    Write a large regime-switching price series to CSV in chunks.
+
+    Memory stays bounded by chunk_size, so series of 10^8 points can be written.
+    freq='auto' picks the coarsest frequency ending before 2069. Daily series
+    use the BrentOilPrices.csv date format; intraday series are written as
+    ISO timestamps, which load_brent_data falls back to.
+
+    Args:
+        file_path (str): Output CSV path (Date, Price columns)
+        n_points (int): Series length
+        chunk_size (int): Points generated and written per chunk
+        date_format (str): strftime format for the Date column
+        (remaining arguments as in generate_regime_series)
+
+    Returns:
+        pd.DataFrame: True breaks of the written series
+    """
+    print(f"Writing {n_points:,} synthetic observations to {file_path}...")
+
+    rng = np.random.default_rng(seed)
+    schedule = make_regime_schedule(n_points, n_regimes, mean_shift, vol_range,
+                                    min_regime_length, seed=rng.integers(2**32))
+    if freq == 'auto':
+        freq = auto_frequency(n_points, start_date)
+    offset = pd.tseries.frequencies.to_offset(freq)
+    if date_format is None:
+        daily = offset.name in ('B', 'D') and _last_year(start_date, n_points, offset) <= LAST_LOADABLE_YEAR
+        date_format = BRENT_DATE_FORMAT if daily else ISO_DATE_FORMAT
+
+    first_date = pd.Timestamp(start_date)
+    last_deviation = 0.0
+    break_dates = []
+
+    with open(file_path, 'w') as f:
+        f.write('Date,Price\n')
+        for start in range(0, n_points, chunk_size):
+            stop = min(start + chunk_size, n_points)
+            returns = _draw_returns(schedule, start, stop, tail_df, rng)
+            if start == 0:
+                returns[0] = 0.0
+
+            deviation = _log_price_deviation(returns, half_life, last_deviation)
+            last_deviation = deviation[-1]
+
+            dates = pd.date_range(first_date, periods=stop - start, freq=offset)
+            first_date = dates[-1] + offset
+
+            chunk_starts = schedule['start'].values
+            in_chunk = (chunk_starts > 0) & (chunk_starts >= start) & (chunk_starts < stop)
+            break_dates.extend(dates[chunk_starts[in_chunk] - start])
+
+            pd.DataFrame({'Date': dates.strftime(date_format), 'Price': start_price * np.exp(deviation)}) \
+                .to_csv(f, header=False, index=False, float_format='%.6f')
+
+    breaks = pd.DataFrame({
+        'position': schedule['start'].values[1:],
+        'date': pd.DatetimeIndex(break_dates),
+        'mean_before': schedule['mean'].values[:-1],
+        'mean_after': schedule['mean'].values[1:],
+        'vol_before': schedule['volatility'].values[:-1],
+        'vol_after': schedule['volatility'].values[1:],
+    })
+    print(f"Wrote {n_points:,} observations with {len(breaks)} true breaks")
+    return breaks
+
+def make_events_table(breaks, jitter_days=0, n_noise_events=0, date_range=None, seed=None):
+    """
+    Build a major_events.csv-style table from the true breaks.
+
+    Args:
+        breaks (pd.DataFrame): True breaks with date and parameter shifts
+        jitter_days (int): Maximum random offset between a break and its event
+        n_noise_events (int): Number of extra events not tied to any break
+        date_range (tuple): (start, end) dates for noise events (defaults to the break span)
+        seed (int): Random seed
+
+    Returns:
+        pd.DataFrame: Events with Date, Event, Category, Description, Impact_Score, Region
+    """
+    rng = np.random.default_rng(seed)
+
+    offsets = rng.integers(-jitter_days, jitter_days + 1, size=len(breaks))
+    dates = pd.DatetimeIndex(breaks['date']) + pd.to_timedelta(offsets, unit='D')
+
+    # Larger volatility shifts map to higher impact scores
+    vol_ratio = np.abs(np.log(breaks['vol_after'].values / breaks['vol_before'].values))
+    impact = np.clip(np.round(3 + 6 * vol_ratio / max(vol_ratio.max(), 1e-12)), 1, 9).astype(int)
+
+    events = pd.DataFrame({
+        'Date': dates,
+        'Event': [f'Synthetic Break {i+1}' for i in range(len(breaks))],
+        'Category': rng.choice(EVENT_CATEGORIES, size=len(breaks)),
+        'Description': [f'Regime shift: volatility {b:.4f} -> {a:.4f}'
+                        for b, a in zip(breaks['vol_before'], breaks['vol_after'])],
+        'Impact_Score': impact,
+        'Region': 'Global'
+    })
+
+    if n_noise_events > 0:
+        if date_range is None:
+            date_range = (breaks['date'].min(), breaks['date'].max())
+        start, end = (pd.Timestamp(d) for d in date_range)
+        noise_dates = start + pd.to_timedelta(
+            rng.integers(0, (end - start).days + 1, size=n_noise_events), unit='D')
+        noise = pd.DataFrame({
+            'Date': noise_dates,
+            'Event': [f'Synthetic Noise Event {i+1}' for i in range(n_noise_events)],
+            'Category': rng.choice(EVENT_CATEGORIES, size=n_noise_events),
+            'Description': 'Event with no associated regime shift',
+            'Impact_Score': rng.integers(1, 5, size=n_noise_events),
+            'Region': 'Global'
+        })
+        events = pd.concat([events, noise], ignore_index=True)
+
+    events = events.sort_values('Date').reset_index(drop=True)
+    events['Date'] = events['Date'].dt.strftime('%Y-%m-%d')
+    return events
+
+def evaluate_detections(detected, true_break_points, tolerance):
+    """
+    Score detected change points against the true breaks.
+
+    A detection is a true positive when it lies within tolerance of a true break;
+    a true break is recalled when at least one detection lies within tolerance.
+
+    Args:
+        detected (array-like): Detected positions or dates
+        true_break_points (array-like): True break positions or dates
+        tolerance (int or pd.Timedelta): Matching tolerance (days for dates)
+
+    Returns:
+        dict: precision, recall, f1 and supporting counts
+    """
+    detected = _as_sorted_numeric(detected)
+    truth = _as_sorted_numeric(true_break_points)
+    if isinstance(tolerance, (int, np.integer)) and _is_datetime(true_break_points):
+        tolerance = pd.Timedelta(days=int(tolerance))
+    if isinstance(tolerance, pd.Timedelta):
+        tolerance = tolerance.value
+
+    detected_hits = _nearest_distance(detected, truth) <= tolerance
+    truth_hits = _nearest_distance(truth, detected) <= tolerance
+
+    precision = detected_hits.mean() if len(detected) else 0.0
+    recall = truth_hits.mean() if len(truth) else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall > 0 else 0.0
+
+    return {
+        'n_detected': int(len(detected)),
+        'n_true': int(len(truth)),
+        'true_positives': int(detected_hits.sum()),
+        'breaks_found': int(truth_hits.sum()),
+        'precision': float(precision),
+        'recall': float(recall),
+        'f1': float(f1)
+    }
+
+def _is_datetime(values):
+    """Check whether values are datetime-like."""
+    return pd.api.types.is_datetime64_any_dtype(pd.Series(values).infer_objects()) \
+        if len(values) else False
+
+def _as_sorted_numeric(values):
+    """Convert positions or dates to a sorted int64 array."""
+    if _is_datetime(values):
+        values = pd.DatetimeIndex(values).as_unit('ns').asi8
+    return np.sort(np.asarray(values, dtype=np.int64))
+
+def _nearest_distance(points, targets):
+    """Distance from each point to its nearest target (inf when no targets)."""
+    if len(targets) == 0:
+        return np.full(len(points), np.inf)
+    idx = np.searchsorted(targets, points)
+    left = targets[np.clip(idx - 1, 0, len(targets) - 1)]
+    right = targets[np.clip(idx, 0, len(targets) - 1)]
+    return np.minimum(np.abs(points - left), np.abs(right - points)).astype(float)
+
+def benchmark_detectors(n_points=100_000, n_regimes=10, tolerance=20, tail_df=4, seed=42):
+    """
+    Measure throughput and accuracy of the simple detectors on synthetic data.
+
+    Args:
+        n_points (int): Series length
+        n_regimes (int): Number of regimes
+        tolerance (int): Matching tolerance in observations
+        tail_df (float): Student-t degrees of freedom
+        seed (int): Random seed
+
+    Returns:
+        pd.DataFrame: One row per detector with timings and accuracy scores
+    """
+    import sys
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models'))
+    import simple_change_point_analysis as simple_cp
+
+    df, breaks = generate_regime_series(n_points, n_regimes=n_regimes, tail_df=tail_df, seed=seed)
+    positions = pd.Series(np.arange(n_points), index=df.index)
+
+    detectors = {
+        'rolling_mean': lambda: simple_cp.detect_change_points_rolling_mean(df['Price']),
+        'volatility': lambda: simple_cp.detect_volatility_changes(df['log_returns'])
+    }
+
+    rows = []
+    for name, detect in detectors.items():
+        start = time.perf_counter()
+        detected = detect()
+        elapsed = time.perf_counter() - start
+        scores = evaluate_detections(positions[detected].values, breaks['position'].values, tolerance)
+        rows.append({'detector': name, 'seconds': elapsed,
+                     'points_per_s': n_points / elapsed, **scores})
+
+    return pd.DataFrame(rows)
+
+def main():
+    """Main function to write a synthetic dataset with ground truth."""
+    parser = argparse.ArgumentParser(description='Generate synthetic regime-switching Brent data')
+    parser.add_argument('--points', type=int, default=1_000_000, help='Series length')
+    parser.add_argument('--regimes', type=int, default=20, help='Number of regimes')
+    parser.add_argument('--chunk-size', type=int, default=1_000_000, help='Points per written chunk')
+    parser.add_argument('--tail-df', type=float, default=None, help='Student-t degrees of freedom')
+    parser.add_argument('--freq', default='auto',
+                        help="Pandas frequency of the date index ('auto' = coarsest ending before 2069)")
+    parser.add_argument('--half-life', type=float, default=DEFAULT_HALF_LIFE,
+                        help='Mean-reversion half-life of the log price in points (0 = random walk)')
+    parser.add_argument('--noise-events', type=int, default=0, help='Events without a break')
+    parser.add_argument('--output-dir', default='../../data/synthetic', help='Output directory')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed')
+    args = parser.parse_args()
+
+    print("=== Synthetic Regime-Switching Data Generation ===\n")
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    breaks = write_regime_series(os.path.join(args.output_dir, 'BrentOilPrices.csv'),
+                                 args.points, chunk_size=args.chunk_size, n_regimes=args.regimes,
+                                 tail_df=args.tail_df, freq=args.freq,
+                                 half_life=args.half_life or None, seed=args.seed)
+    breaks.to_csv(os.path.join(args.output_dir, 'true_breaks.csv'), index=False)
+
+    events = make_events_table(breaks, jitter_days=5, n_noise_events=args.noise_events,
+                               seed=args.seed)
+    events.to_csv(os.path.join(args.output_dir, 'major_events.csv'), index=False)
+
+    print(f"True breaks saved to {os.path.join(args.output_dir, 'true_breaks.csv')}")
+    print(f"Events saved to {os.path.join(args.output_dir, 'major_events.csv')}")
+
+if __name__ == "__main__":
+    main()
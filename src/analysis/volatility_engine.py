@@ -0,0 +1,233 @@
+"""
+Multi-window volatility engine for Brent oil price analysis.
+Computes rolling, EWMA and annualized realized volatility from a single pass
+over log returns, so consumers read precomputed columns instead of re-rolling.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_WINDOWS = (30, 60, 252)
+DEFAULT_HALFLIVES = (10, 30)
+TRADING_DAYS = 252
+
+VOLATILITY_COLUMN = re.compile(r'^(vol_\d+d|ewma_vol_hl\d+|realized_vol_\d+d_ann)$')
+
+def rolling_column(window):
+    """Name of the rolling standard deviation column for a window."""
+    return f'vol_{window}d'
+
+def ewma_column(halflife):
+    """Name of the EWMA volatility column for a half-life."""
+    return f'ewma_vol_hl{halflife}'
+
+def realized_column(window):
+    """Name of the annualized realized volatility column for a window."""
+    return f'realized_vol_{window}d_ann'
+
+def is_volatility_column(name):
+    """Check whether a column was produced by the volatility engine."""
+    return name == 'volatility' or bool(VOLATILITY_COLUMN.match(name))
+
+def compute_volatility(log_returns, windows=DEFAULT_WINDOWS, halflives=DEFAULT_HALFLIVES,
+                       annualization=TRADING_DAYS):
+    """
+    Compute every volatility measure from one pass over the log returns.
+
+    Rolling standard deviations (ddof=1, NaN until the window is full) and
+    realized volatility come from shared prefix sums of r and r^2; EWMA
+    volatility filters the same squared returns.
+
+    Args:
+        log_returns (pd.Series): Log returns with a date index
+        windows (tuple): Rolling window sizes
+        halflives (tuple): EWMA half-lives in observations
+        annualization (int): Observations per year for realized volatility
+
+    Returns:
+        pd.DataFrame: One column per measure, aligned with log_returns
+    """
+    values = np.asarray(log_returns, dtype=np.float64)
+    n = len(values)
+
+    # Center before accumulating so the prefix sums stay well conditioned;
+    # missing returns contribute zero and invalidate every window holding them
+    missing = np.isnan(values)
+    center = np.nanmean(values) if n and not missing.all() else 0.0
+    centered = np.where(missing, 0.0, values - center)
+    squared = values * values
+
+    prefix = np.zeros(n + 1)
+    prefix_sq_centered = np.zeros(n + 1)
+    prefix_sq = np.zeros(n + 1)
+    prefix_missing = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(centered, out=prefix[1:])
+    np.cumsum(centered * centered, out=prefix_sq_centered[1:])
+    np.cumsum(np.where(missing, 0.0, squared), out=prefix_sq[1:])
+    np.cumsum(missing, out=prefix_missing[1:])
+
+    columns = {}
+    for window in windows:
+        rolling = np.full(n, np.nan)
+        realized = np.full(n, np.nan)
+        if n >= window:
+            total = prefix[window:] - prefix[:-window]
+            total_sq = prefix_sq_centered[window:] - prefix_sq_centered[:-window]
+            variance = (total_sq - total * total / window) / (window - 1)
+            rolling[window - 1:] = np.sqrt(np.maximum(variance, 0.0))
+
+            mean_square = (prefix_sq[window:] - prefix_sq[:-window]) / window
+            realized[window - 1:] = np.sqrt(np.maximum(mean_square, 0.0) * annualization)
+
+            incomplete = (prefix_missing[window:] - prefix_missing[:-window]) > 0
+            rolling[window - 1:][incomplete] = np.nan
+            realized[window - 1:][incomplete] = np.nan
+        columns[rolling_column(window)] = rolling
+        columns[realized_column(window)] = realized
+
+    squared_series = pd.Series(squared)
+    for halflife in halflives:
+        ewma_variance = squared_series.ewm(halflife=halflife, adjust=False).mean().to_numpy()
+        columns[ewma_column(halflife)] = np.sqrt(ewma_variance)
+
+    return pd.DataFrame(columns, index=getattr(log_returns, 'index', None))
+
+class VolatilityStream:
+    """
+    Chunk-by-chunk counterpart of compute_volatility.
+
+    Carries the running prefix sums, the last max(windows) prefix entries
+    and the EWMA state across chunks, so feeding a series in any chunking
+    reproduces compute_volatility on the whole series bit for bit. The
+    center must be the one compute_volatility would use (the NaN-mean of
+    the full series), which is why streaming callers make a first pass.
+    """
+
+    def __init__(self, center, windows=DEFAULT_WINDOWS, halflives=DEFAULT_HALFLIVES,
+                 annualization=TRADING_DAYS):
+        self.center = center
+        self.windows = tuple(windows)
+        self.halflives = tuple(halflives)
+        self.annualization = annualization
+        self.position = 0
+        self._tail = max(self.windows, default=1)
+        # Prefix sums up to the current position (only the last _tail entries are kept)
+        self._prefix = np.zeros(1)
+        self._prefix_sq_centered = np.zeros(1)
+        self._prefix_sq = np.zeros(1)
+        self._prefix_missing = np.zeros(1, dtype=np.int64)
+        # Per half-life: (EWMA at the last observation, missing values since then)
+        self._ewma = {halflife: (None, 0) for halflife in self.halflives}
+
+    @staticmethod
+    def _extend(prefix, increments):
+        """Continue a prefix sum the way one np.cumsum over the whole series would."""
+        return np.cumsum(np.concatenate([prefix[-1:], increments]))[1:]
+
+    def update(self, log_returns):
+        """
+        Compute the volatility columns of the next chunk.
+
+        Args:
+            log_returns (np.ndarray): Next log returns of the series
+
+        Returns:
+            dict: Column name -> array for the chunk
+        """
+        values = np.asarray(log_returns, dtype=np.float64)
+        m = len(values)
+        missing = np.isnan(values)
+        centered = np.where(missing, 0.0, values - self.center)
+        squared = values * values
+
+        # Prefix arrays covering global prefix indices [first, position + m]
+        first = self.position + 1 - len(self._prefix)
+        prefix = np.concatenate([self._prefix, self._extend(self._prefix, centered)])
+        prefix_sq_centered = np.concatenate([self._prefix_sq_centered,
+                                             self._extend(self._prefix_sq_centered, centered * centered)])
+        prefix_sq = np.concatenate([self._prefix_sq,
+                                    self._extend(self._prefix_sq, np.where(missing, 0.0, squared))])
+        prefix_missing = np.concatenate([self._prefix_missing,
+                                         self._extend(self._prefix_missing, missing.astype(np.int64))])
+
+        columns = {}
+        rows = self.position + np.arange(m)
+        for window in self.windows:
+            rolling = np.full(m, np.nan)
+            realized = np.full(m, np.nan)
+            full = np.flatnonzero(rows >= window - 1)
+            if len(full):
+                hi = rows[full] + 1 - first
+                lo = hi - window
+                total = prefix[hi] - prefix[lo]
+                total_sq = prefix_sq_centered[hi] - prefix_sq_centered[lo]
+                variance = (total_sq - total * total / window) / (window - 1)
+                rolling[full] = np.sqrt(np.maximum(variance, 0.0))
+
+                mean_square = (prefix_sq[hi] - prefix_sq[lo]) / window
+                realized[full] = np.sqrt(np.maximum(mean_square, 0.0) * self.annualization)
+
+                incomplete = full[(prefix_missing[hi] - prefix_missing[lo]) > 0]
+                rolling[incomplete] = np.nan
+                realized[incomplete] = np.nan
+            columns[rolling_column(window)] = rolling
+            columns[realized_column(window)] = realized
+
+        observed = np.flatnonzero(~np.isnan(squared))
+        for halflife in self.halflives:
+            # Replaying the last EWMA value (and any missing values after it)
+            # restores the exact filter state of the full-series computation
+            last, trailing = self._ewma[halflife]
+            replay = [] if last is None else [last] + [np.nan] * trailing
+            filtered = pd.Series(np.concatenate([replay, squared])) \
+                .ewm(halflife=halflife, adjust=False).mean().to_numpy()[len(replay):]
+            columns[ewma_column(halflife)] = np.sqrt(filtered)
+            if len(observed):
+                self._ewma[halflife] = (filtered[observed[-1]], m - 1 - observed[-1])
+            elif last is not None:
+                self._ewma[halflife] = (last, trailing + m)
+
+        self._prefix = prefix[-self._tail:]
+        self._prefix_sq_centered = prefix_sq_centered[-self._tail:]
+        self._prefix_sq = prefix_sq[-self._tail:]
+        self._prefix_missing = prefix_missing[-self._tail:]
+        self.position += m
+        return columns
+
+def add_volatility_columns(df, windows=DEFAULT_WINDOWS, halflives=DEFAULT_HALFLIVES,
+                           annualization=TRADING_DAYS):
+    """
+    Add the volatility engine columns to a DataFrame with log returns.
+
+    Args:
+        df (pd.DataFrame): Data with a log_returns column
+        windows (tuple): Rolling window sizes
+        halflives (tuple): EWMA half-lives in observations
+        annualization (int): Observations per year for realized volatility
+
+    Returns:
+        pd.DataFrame: Data with volatility columns added
+    """
+    volatility = compute_volatility(df['log_returns'], windows, halflives, annualization)
+    for name in volatility.columns:
+        df[name] = volatility[name].values
+    return df
+
+def get_rolling_volatility(df, window, column='log_returns'):
+    """
+    Return the rolling volatility for a window, computing it only if missing.
+
+    Args:
+        df (pd.DataFrame): Processed data, ideally with engine columns
+        window (int): Rolling window size
+        column (str): Return column used when the volatility must be computed
+
+    Returns:
+        pd.Series: Rolling standard deviation of the returns
+    """
+    name = rolling_column(window)
+    if name in df.columns:
+        return df[name]
+    return compute_volatility(df[column], windows=(window,), halflives=())[name]
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Command line entry point for the Brent oil price analysis.
+Each subcommand imports only the modules its code path needs, so quick runs
+never pay for matplotlib, PyMC3/Theano or Flask.
+
+Usage:
+    python src/cli.py preprocess
+    python src/cli.py preprocess --stream data/intraday.csv --date-format "%Y-%m-%d %H:%M:%S"
+    python src/cli.py detect
+    python src/cli.py bayes --method advi
+    python src/cli.py correlate --days 30
+    python src/cli.py correlate --simulations 10000 --relocate change_points
+    python src/cli.py backtest --confirm-days 5
+    python src/cli.py serve --port 5000
+    python src/cli.py report --force
+    python src/cli.py --profile-startup detect
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SRC_DIR)
+ANALYSIS_DIR = os.path.join(SRC_DIR, 'analysis')
+MODELS_DIR = os.path.join(SRC_DIR, 'models')
+BACKEND_DIR = os.path.join(SRC_DIR, 'dashboard', 'backend')
+
+IMPORT_TIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+def enter(directory):
+    """
+    Run from a script directory so its default relative paths resolve.
+
+    Args:
+        directory (str): Directory holding the script
+    """
+    sys.path.insert(0, directory)
+    if directory != ANALYSIS_DIR:
+        sys.path.insert(1, ANALYSIS_DIR)
+    os.chdir(directory)
+
+def cmd_preprocess(args):
+    if args.stream:
+        # Resolve user paths before moving into the script directory
+        input_path = os.path.abspath(args.stream)
+        output_dir = os.path.abspath(args.output or os.path.splitext(args.stream)[0] + '.columns')
+        enter(ANALYSIS_DIR)
+        import streaming_preprocess
+        streaming_preprocess.preprocess_streaming(input_path, output_dir, chunk_rows=args.chunk_rows,
+                                                  date_format=args.date_format)
+        return
+    enter(ANALYSIS_DIR)
+    import preprocess_data
+    preprocess_data.main()
+
+def cmd_detect(args):
+    enter(MODELS_DIR)
+    import simple_change_point_analysis
+    simple_change_point_analysis.main()
+
+def cmd_bayes(args):
+    enter(MODELS_DIR)
+    import change_point_analysis
+    change_point_analysis.main(method=args.method)
+
+def cmd_correlate(args):
+    """Detect change points and match them with events, without plotting."""
+    enter(MODELS_DIR)
+    import simple_change_point_analysis as simple_cp
+
+    df = simple_cp.load_processed_data()
+    change_points = simple_cp.detect_change_point_episodes(df)['peak'].tolist()
+    correlations = simple_cp.correlate_with_events(change_points, days_threshold=args.days)
+
+    print(f"\nChange points with events within {args.days} days: {len(correlations)} of {len(change_points)}")
+    for cp_name, cp_data in correlations.items():
+        best_event = cp_data['correlated_events'][0]
+        print(f"{cp_name} ({cp_data['change_point_date']:%Y-%m-%d}): "
+              f"{best_event['event']} ({best_event['days_diff']} days)")
+
+    if args.simulations:
+        import pandas as pd
+        import proximity_significance
+
+        events_df = pd.read_csv('../../data/major_events.csv')
+        results = proximity_significance.proximity_significance(
+            change_points, events_df, (df.index[0], df.index[-1]), days_threshold=args.days,
+            n_simulations=args.simulations, relocate=args.relocate)
+        proximity_significance.save_results(results)
+
+        print(f"\nMatches against chance ({args.simulations} simulations, relocating {args.relocate}):")
+        for _, row in results.iterrows():
+            print(f"{row['scope']}: {row['observed_matches']} of {row['n_items']} matched, "
+                  f"{row['expected_matches']:.1f} expected ({row['excess_ratio']:.2f}x, p = {row['p_value']:.4f})")
+
+def cmd_backtest(args):
+    """Replay the detectors once and report detection lag after major events."""
+    enter(MODELS_DIR)
+    import asof_backtest
+    import simple_change_point_analysis as simple_cp
+
+    df = simple_cp.load_processed_data()
+    detections = asof_backtest.replay_detections(df, confirm_days=args.confirm_days)
+    lags = asof_backtest.detection_lags(df, detections, max_lag_days=args.max_lag)
+    asof_backtest.save_results(detections, lags)
+
+    reported = lags[(lags['detector'] == 'any') & lags['asof_date'].notna()]
+    print(f"\nMedian lag: {reported['lag_days'].median():.0f} days over {len(reported)} detected events")
+
+def cmd_serve(args):
+    enter(BACKEND_DIR)
+    import app as backend
+    # Point the API at the repository data regardless of the working directory
+    backend.DATA_DIR = os.path.join(ROOT_DIR, 'data')
+    backend.REPORTS_DIR = os.path.join(ROOT_DIR, 'reports')
+    backend.app.run(debug=args.debug, host=args.host, port=args.port)
+
+def cmd_report(args):
+    os.chdir(ROOT_DIR)
+    sys.path.insert(0, ROOT_DIR)
+    import generate_pdf
+    generate_pdf.generate_pdf(force=args.force, max_workers=args.workers)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Brent oil price change point analysis")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="Report import time per module after the command runs")
+    parser.add_argument('--profile-top', type=int, default=25,
+                        help="Number of modules listed by --profile-startup")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    preprocess = subparsers.add_parser('preprocess', help="Clean raw prices and compute returns and volatility")
+    preprocess.add_argument('--stream', metavar='CSV',
+                            help="Process a large price file in chunks instead of in memory")
+    preprocess.add_argument('--output', help="Column directory written by --stream (default: <CSV>.columns)")
+    preprocess.add_argument('--chunk-rows', type=int, default=1_000_000, help="Rows per chunk with --stream")
+    preprocess.add_argument('--date-format', default='%d-%b-%y', help="Date column format with --stream")
+    preprocess.set_defaults(func=cmd_preprocess)
+    subparsers.add_parser('detect', help="Run the statistical change point analysis"
+                          ).set_defaults(func=cmd_detect)
+    bayes = subparsers.add_parser('bayes', help="Run the Bayesian (PyMC3) change point analysis")
+    bayes.add_argument('--method', choices=['mcmc', 'advi'], default='mcmc',
+                       help="NUTS sampling or the faster ADVI approximation")
+    bayes.set_defaults(func=cmd_bayes)
+
+    correlate = subparsers.add_parser('correlate', help="Match detected change points with major events")
+    correlate.add_argument('--days', type=int, default=30, help="Days threshold for a match")
+    correlate.add_argument('--simulations', type=int, default=0,
+                           help="Monte Carlo placements for the significance test (0 = skip)")
+    correlate.add_argument('--relocate', choices=['events', 'change_points'], default='events',
+                           help="What the significance test moves at random")
+    correlate.set_defaults(func=cmd_correlate)
+
+    backtest = subparsers.add_parser('backtest', help="As-of replay of the detectors with lag after events")
+    backtest.add_argument('--confirm-days', type=int, default=1,
+                          help="Consecutive flagged days before a change point is reported")
+    backtest.add_argument('--max-lag', type=int, default=90, help="Longest lag attributed to an event (days)")
+    backtest.set_defaults(func=cmd_backtest)
+
+    serve = subparsers.add_parser('serve', help="Start the dashboard API")
+    serve.add_argument('--host', default='0.0.0.0')
+    serve.add_argument('--port', type=int, default=5000)
+    serve.add_argument('--debug', action='store_true')
+    serve.set_defaults(func=cmd_serve)
+
+    report = subparsers.add_parser('report', help="Build FINAL_REPORT.pdf incrementally")
+    report.add_argument('--force', action='store_true', help="Rebuild every artifact")
+    report.add_argument('--workers', type=int, default=None, help="Processes used to render figures")
+    report.set_defaults(func=cmd_report)
+    return parser
+
+def parse_import_times(lines):
+    """
+    Parse `python -X importtime` output.
+
+    Args:
+        lines (list): stderr lines of the profiled run
+
+    Returns:
+        tuple: (list of (module, self_us, cumulative_us, depth), other lines)
+    """
+    records, other = [], []
+    for line in lines:
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+        elif not line.startswith('import time:'):
+            other.append(line)
+    return records, other
+
+def profile_startup(argv, top):
+    """
+    Re-run the command under `-X importtime` and summarize import cost.
+
+    Args:
+        argv (list): Command line without --profile-startup
+        top (int): Number of modules to list
+
+    Returns:
+        int: Exit code of the profiled run
+    """
+    command = [sys.executable, '-X', 'importtime', os.path.abspath(__file__)] + argv
+    result = subprocess.run(command, stderr=subprocess.PIPE, text=True)
+    records, other = parse_import_times(result.stderr.splitlines())
+    for line in other:
+        print(line, file=sys.stderr)
+
+    top_level = [record for record in records if record[3] == 0]
+    total_us = sum(record[2] for record in top_level)
+    print(f"\n=== Startup import time: {total_us / 1e6:.3f} s across {len(records)} modules ===")
+    print(f"{'cumulative':>12} {'self':>10}  module")
+    for module, self_us, cumulative_us, _ in sorted(top_level, key=lambda r: -r[2])[:top]:
+        print(f"{cumulative_us / 1e3:10.1f}ms {self_us / 1e3:8.1f}ms  {module}")
+    return result.returncode
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = build_parser().parse_args(argv)
+    if args.profile_startup:
+        child_argv = [arg for arg in argv if arg != '--profile-startup']
+        return profile_startup(child_argv, args.profile_top)
+    args.func(args)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,28 +3,131 @@ Flask backend API for Brent Oil Price Change Point Analysis Dashboard.
 Serves data and analysis results to the React frontend.
 """
 
-from flask import Flask, jsonify, request
+from collections import OrderedDict
+
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
+import hashlib
 import json
 from datetime import datetime
 import os
+import re
+import sys
+import time
+
+import jobs
+import metrics
+from shared_dataset import SharedDatasetStore
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'analysis'))
+from compact_dataset import CompactDataset
+from event_index import EventIndex
+from event_study import ESTIMATION_DAYS, compute_event_impact, parse_windows
+from results_store import ResultsStore
+from resolution_pyramid import LEVELS, PYRAMID_COLUMNS, choose_level, level_file_name
+from volatility_engine import is_volatility_column
 
 app = Flask(__name__)
 CORS(app)
+metrics.init_app(app)
 
 # Data paths
 DATA_DIR = '../../data'
 REPORTS_DIR = '../../reports'
 
+
+# Parsed datasets keyed by name, invalidated when the file changes on disk
+_dataset_cache = {}
+
+# Memory-mapped snapshots shared by all workers (set BRENT_SHARED_DATA_DIR to enable)
+SHARED_DATA_DIR = os.environ.get('BRENT_SHARED_DATA_DIR')
+_shared_store = SharedDatasetStore(SHARED_DATA_DIR) if SHARED_DATA_DIR else None
+
+# Maximum number of dates accepted by one batch near-dates request
+MAX_BATCH_QUERIES = 10000
+
+# Interval index and JSON records of the events, rebuilt when the events file changes
+_event_lookup = {}
+
+# Serialized event-impact responses keyed by dataset versions and window config
+EVENT_IMPACT_CACHE_SIZE = 32
+_event_impact_cache = OrderedDict()
+
+# Background analysis jobs (BRENT_JOBS_DIR defaults to <reports>/jobs), created on first use
+JOB_WORKERS = int(os.environ.get('BRENT_JOB_WORKERS', 1))
+JOB_QUEUE_SIZE = int(os.environ.get('BRENT_JOB_QUEUE_SIZE', 8))
+_job_queue = None
+
+def cached_dataset(name, file_name, parse, shared=False):
+    """
+    Return a parsed dataset, re-reading the file only when it changed.
+
+    Cached frames are shared between requests and must not be mutated.
+    With shared=True and a shared store configured, CompactDatasets are
+    parsed once per file version and memory-mapped read-only by every worker.
+
+    Args:
+        name (str): Dataset name used for caching and metrics
+        file_name (str): File name inside DATA_DIR
+        parse (callable): Function parsing the file path into a DataFrame
+        shared (bool): Serve the dataset from the shared memory-mapped store
+
+    Returns:
+        pd.DataFrame: Parsed dataset
+    """
+    path = os.path.join(DATA_DIR, file_name)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+
+    entry = _dataset_cache.get(name)
+    if entry is not None and entry[0] == key:
+        metrics.registry.record_cache(name, hit=True)
+        return entry[1]
+
+    metrics.registry.record_cache(name, hit=False)
+    start = time.perf_counter()
+    if shared and _shared_store is not None:
+        df, _ = _shared_store.load(name, path, parse)
+    else:
+        df = parse(path)
+    metrics.registry.record_load(name, time.perf_counter() - start)
+    if isinstance(df, CompactDataset):
+        metrics.registry.set_dataset_bytes(name, df.nbytes)
+    _dataset_cache[name] = (key, df)
+    return df
+
+def dataset_version(name):
+    """Cache key (path, mtime, size) of a loaded dataset, or None."""
+    entry = _dataset_cache.get(name)
+    return entry[0] if entry is not None else None
+
+def json_float(value):
+    """Convert a float to a JSON-safe value (NaN becomes None)."""
+    return None if np.isnan(value) else float(value)
+
+def _parse_brent(path):
+    df = pd.read_csv(path)
+    df['Date'] = pd.to_datetime(df['Date'], format='%d-%b-%y', errors='coerce')
+    df = df.dropna().sort_values('Date').set_index('Date')
+    return CompactDataset.from_frame(df)
+
+def _parse_events(path):
+    df = pd.read_csv(path)
+    df['Date'] = pd.to_datetime(df['Date'])
+    return df
+
+def _parse_processed(path):
+    # Volatility columns are served at float32 precision to keep the per-worker footprint small
+    df = pd.read_csv(path, index_col=0, parse_dates=True)
+    float32_columns = [name for name in df.columns if is_volatility_column(name)]
+    return CompactDataset.from_frame(df, float32_columns=float32_columns)
+
 def load_brent_data():
-    """Load Brent oil price data."""
+    """Load Brent oil price data as a CompactDataset."""
     try:
-        df = pd.read_csv(os.path.join(DATA_DIR, 'BrentOilPrices.csv'))
-        df['Date'] = pd.to_datetime(df['Date'], format='%d-%b-%y', errors='coerce')
-        df = df.dropna().sort_values('Date')
-        return df
+        return cached_dataset('brent_prices', 'BrentOilPrices.csv', _parse_brent, shared=True)
     except Exception as e:
         print(f"Error loading Brent data: {e}")
         return None
@@ -32,23 +135,104 @@ def load_brent_data():
 def load_events_data():
     """Load major events data."""
     try:
-        df = pd.read_csv(os.path.join(DATA_DIR, 'major_events.csv'))
-        df['Date'] = pd.to_datetime(df['Date'])
-        return df
+        return cached_dataset('events', 'major_events.csv', _parse_events)
     except Exception as e:
         print(f"Error loading events data: {e}")
         return None
 
 def load_processed_data():
-    """Load processed data with log returns."""
+    """Load processed data with log returns as a CompactDataset."""
     try:
-        df = pd.read_csv(os.path.join(DATA_DIR, 'processed_brent_data.csv'), 
-                        index_col=0, parse_dates=True)
-        return df
+        return cached_dataset('processed', 'processed_brent_data.csv', _parse_processed, shared=True)
     except Exception as e:
         print(f"Error loading processed data: {e}")
         return None
 
+def _parse_pyramid(path):
+    return CompactDataset.read_csv(path, bool_columns=())
+
+def load_pyramid_level(level):
+    """Load one aggregated pyramid level (weekly, monthly, quarterly) as a CompactDataset."""
+    try:
+        return cached_dataset(f'pyramid_{level}', level_file_name(level), _parse_pyramid, shared=True)
+    except Exception as e:
+        print(f"Error loading {level} bars: {e}")
+        return None
+
+def open_results_store():
+    """Open the analysis results database read-only, or None if no run was stored yet."""
+    path = os.path.join(REPORTS_DIR, 'brent_results.db')
+    if not os.path.exists(path):
+        return None
+    return ResultsStore(path, read_only=True)
+
+def job_queue():
+    """The process-wide job queue, created when first needed."""
+    global _job_queue
+    if _job_queue is None:
+        root = os.environ.get('BRENT_JOBS_DIR') or os.path.join(REPORTS_DIR, 'jobs')
+        _job_queue = jobs.JobQueue(root, max_workers=JOB_WORKERS, max_pending=JOB_QUEUE_SIZE)
+    return _job_queue
+
+def _date_range_args():
+    """Validated start/end query parameters (YYYY-MM-DD) or raise ValueError."""
+    start = request.args.get('start')
+    end = request.args.get('end')
+    for value in (start, end):
+        if value:
+            datetime.strptime(value, '%Y-%m-%d')
+    return start, end
+
+# Delta sync: responses carry a version token "<rows>-<digest of those rows>"; a client
+# sending it back as ?since= receives only the rows after it, or everything if the
+# rows it holds were changed. A plain YYYY-MM-DD date returns the rows after that date.
+SINCE_TOKEN = re.compile(r'^(\d+)-([0-9a-f]{16})$')
+SINCE_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+def prefix_digest(arrays, count):
+    """Digest of the first count rows of aligned column arrays."""
+    digest = hashlib.sha1()
+    for values in arrays:
+        digest.update(memoryview(np.ascontiguousarray(values[:count])).cast('B'))
+    return digest.hexdigest()[:16]
+
+def records_digest(records, count):
+    """Digest of the first count JSON records."""
+    return hashlib.sha1(json.dumps(records[:count], sort_keys=True).encode()).hexdigest()[:16]
+
+def sync_token(count, digest):
+    return f'{count}-{digest}'
+
+def delta_selection(since, count, digest_of, after_date):
+    """
+    Rows a client holding the `since` token or date is missing.
+
+    Args:
+        since (str): Version token, YYYY-MM-DD date or None
+        count (int): Current number of rows
+        digest_of (callable): Digest of the first k current rows
+        after_date (callable): Selection of the rows dated after a YYYY-MM-DD date
+
+    Returns:
+        tuple: (row selection, bool delta); delta False means the client must replace its copy
+
+    Raises:
+        ValueError: Malformed since parameter
+    """
+    if not since:
+        return slice(0, None), False
+    if SINCE_DATE.match(since):
+        datetime.strptime(since, '%Y-%m-%d')
+        return after_date(since), True
+    match = SINCE_TOKEN.match(since)
+    if match is None:
+        raise ValueError("since must be a version token or a YYYY-MM-DD date")
+    known = int(match.group(1))
+    if known <= count and digest_of(known) == match.group(2):
+        return slice(known, None), True
+    # Rows the client holds were revised (or come from another dataset): full resend
+    return slice(0, None), False
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
@@ -60,50 +244,58 @@ def health_check():
 
 @app.route('/api/data/brent-prices', methods=['GET'])
 def get_brent_prices():
-    """Get Brent oil price data."""
-    df = load_brent_data()
-    if df is None:
+    """Get Brent oil price data (only the rows after ?since= when given)."""
+    ds = load_brent_data()
+    if ds is None:
         return jsonify({'error': 'Failed to load data'}), 500
     
+    prices = ds.column('Price')
+    digest_of = lambda count: prefix_digest((ds.dates, prices), count)
+    try:
+        selection, delta = delta_selection(request.args.get('since'), len(ds), digest_of,
+                                           lambda date: slice(ds.searchsorted(date, side='right'), None))
+    except ValueError as e:
+        return jsonify({'error': f'Invalid since parameter: {e}'}), 400
+    
     # Convert to JSON-serializable format
-    data = []
-    for _, row in df.iterrows():
-        data.append({
-            'date': row['Date'].strftime('%Y-%m-%d'),
-            'price': float(row['Price'])
-        })
+    dates = ds.date_strings()
+    data = [{'date': d, 'price': p} for d, p in zip(dates[selection].tolist(), prices[selection].tolist())]
     
     return jsonify({
         'data': data,
         'count': len(data),
+        'total_count': len(ds),
+        'delta': delta,
+        'version': sync_token(len(ds), digest_of(len(ds))),
         'date_range': {
-            'start': df['Date'].min().strftime('%Y-%m-%d'),
-            'end': df['Date'].max().strftime('%Y-%m-%d')
+            'start': str(dates[0]),
+            'end': str(dates[-1])
         }
     })
 
 @app.route('/api/data/events', methods=['GET'])
 def get_events():
-    """Get major events data."""
-    df = load_events_data()
-    if df is None:
+    """Get major events data (only the events after ?since= when given)."""
+    lookup = event_lookup()
+    if lookup is None:
         return jsonify({'error': 'Failed to load events data'}), 500
+    df = load_events_data()
+    _, records = lookup
     
-    # Convert to JSON-serializable format
-    data = []
-    for _, row in df.iterrows():
-        data.append({
-            'date': row['Date'].strftime('%Y-%m-%d'),
-            'event': row['Event'],
-            'category': row['Category'],
-            'description': row['Description'],
-            'impact_score': int(row['Impact_Score']),
-            'region': row['Region']
-        })
+    digest_of = lambda count: records_digest(records, count)
+    after_date = lambda date: [i for i, record in enumerate(records) if record['date'] > date]
+    try:
+        selection, delta = delta_selection(request.args.get('since'), len(records), digest_of, after_date)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid since parameter: {e}'}), 400
+    data = records[selection] if isinstance(selection, slice) else [records[i] for i in selection]
     
     return jsonify({
         'data': data,
         'count': len(data),
+        'total_count': len(records),
+        'delta': delta,
+        'version': sync_token(len(records), digest_of(len(records))),
         'categories': df['Category'].unique().tolist(),
         'regions': df['Region'].unique().tolist()
     })
@@ -111,65 +303,69 @@ def get_events():
 @app.route('/api/data/log-returns', methods=['GET'])
 def get_log_returns():
     """Get log returns data."""
-    df = load_processed_data()
-    if df is None:
+    ds = load_processed_data()
+    if ds is None:
         return jsonify({'error': 'Failed to load processed data'}), 500
     
+    log_returns = ds.column('log_returns')
+    volatility = ds.column('volatility') if 'volatility' in ds else np.zeros(len(ds))
+    high_volatility = ds.column('high_volatility') if 'high_volatility' in ds else np.zeros(len(ds), bool)
+    
     # Convert to JSON-serializable format
-    data = []
-    for date, row in df.iterrows():
-        data.append({
-            'date': date.strftime('%Y-%m-%d'),
-            'log_returns': float(row['log_returns']),
-            'volatility': float(row.get('volatility', 0)),
-            'high_volatility': bool(row.get('high_volatility', False))
-        })
+    data = [
+        {'date': d, 'log_returns': r, 'volatility': v, 'high_volatility': h}
+        for d, r, v, h in zip(ds.date_strings().tolist(), log_returns.tolist(),
+                              volatility.tolist(), high_volatility.tolist())
+    ]
     
     return jsonify({
         'data': data,
         'count': len(data),
-        'statistics': {
-            'mean': float(df['log_returns'].mean()),
-            'std': float(df['log_returns'].std()),
-            'min': float(df['log_returns'].min()),
-            'max': float(df['log_returns'].max())
-        }
+        'statistics': column_statistics(log_returns)
     })
 
+def column_statistics(values):
+    """Mean, sample std, min and max of a column, ignoring NaN."""
+    return {
+        'mean': float(np.nanmean(values, dtype=np.float64)),
+        'std': float(np.nanstd(values, dtype=np.float64, ddof=1)),
+        'min': float(np.nanmin(values)),
+        'max': float(np.nanmax(values))
+    }
+
 @app.route('/api/analysis/summary', methods=['GET'])
 def get_analysis_summary():
     """Get analysis summary statistics."""
-    df = load_processed_data()
-    if df is None:
+    ds = load_processed_data()
+    if ds is None:
         return jsonify({'error': 'Failed to load data'}), 500
     
+    # The summary is versioned by the processed file it is computed from
+    version = sync_token(len(ds), hashlib.sha1(repr(dataset_version('processed')).encode()).hexdigest()[:16])
+    if request.args.get('since') == version:
+        return jsonify({'unchanged': True, 'version': version})
+    
+    dates = ds.date_strings()
+    
     # Calculate summary statistics
     summary = {
-        'total_observations': len(df),
+        'total_observations': len(ds),
         'date_range': {
-            'start': df.index.min().strftime('%Y-%m-%d'),
-            'end': df.index.max().strftime('%Y-%m-%d')
-        },
-        'price_statistics': {
-            'mean': float(df['Price'].mean()),
-            'std': float(df['Price'].std()),
-            'min': float(df['Price'].min()),
-            'max': float(df['Price'].max())
+            'start': str(dates[ds.dates.argmin()]),
+            'end': str(dates[ds.dates.argmax()])
         },
-        'returns_statistics': {
-            'mean': float(df['log_returns'].mean()),
-            'std': float(df['log_returns'].std()),
-            'min': float(df['log_returns'].min()),
-            'max': float(df['log_returns'].max())
-        }
+        'price_statistics': column_statistics(ds.column('Price')),
+        'returns_statistics': column_statistics(ds.column('log_returns')),
+        'version': version
     }
     
     # Add volatility statistics if available
-    if 'volatility' in df.columns:
+    if 'volatility' in ds:
+        volatility_stats = column_statistics(ds.column('volatility'))
         summary['volatility_statistics'] = {
-            'mean': float(df['volatility'].mean()),
-            'std': float(df['volatility'].std()),
-            'high_volatility_periods': int(df['high_volatility'].sum())
+            'mean': volatility_stats['mean'],
+            'std': volatility_stats['std'],
+            'high_volatility_periods': int(ds.column('high_volatility').sum())
         }
     
     return jsonify(summary)
@@ -177,74 +373,103 @@ def get_analysis_summary():
 @app.route('/api/analysis/volatility-periods', methods=['GET'])
 def get_volatility_periods():
     """Get high volatility periods."""
-    df = load_processed_data()
-    if df is None:
+    ds = load_processed_data()
+    if ds is None:
         return jsonify({'error': 'Failed to load data'}), 500
     
-    if 'high_volatility' not in df.columns:
+    if 'high_volatility' not in ds:
         return jsonify({'error': 'Volatility data not available'}), 404
     
     # Get high volatility periods
-    high_vol_periods = df[df['high_volatility']]
+    high_vol_periods = ds.take(np.flatnonzero(ds.column('high_volatility')))
     
-    data = []
-    for date, row in high_vol_periods.iterrows():
-        data.append({
-            'date': date.strftime('%Y-%m-%d'),
-            'price': float(row['Price']),
-            'log_returns': float(row['log_returns']),
-            'volatility': float(row['volatility'])
-        })
+    data = [
+        {'date': d, 'price': p, 'log_returns': r, 'volatility': v}
+        for d, p, r, v in zip(high_vol_periods.date_strings().tolist(),
+                              high_vol_periods.column('Price').tolist(),
+                              high_vol_periods.column('log_returns').tolist(),
+                              high_vol_periods.column('volatility').tolist())
+    ]
     
     return jsonify({
         'data': data,
         'count': len(data),
-        'total_periods': len(df),
-        'percentage': round(len(data) / len(df) * 100, 2)
+        'total_periods': len(ds),
+        'percentage': round(len(data) / len(ds) * 100, 2)
     })
 
+def event_lookup():
+    """
+    Return the interval index and JSON records for the current events data.
+
+    Returns:
+        tuple: (EventIndex, list of event dicts), or None if loading failed
+    """
+    df = load_events_data()
+    if df is None:
+        return None
+    
+    version = dataset_version('events')
+    if _event_lookup.get('version') != version:
+        records = [
+            {
+                'date': row['Date'].strftime('%Y-%m-%d'),
+                'event': row['Event'],
+                'category': row['Category'],
+                'description': row['Description'],
+                'impact_score': int(row['Impact_Score']),
+                'region': row['Region']
+            }
+            for _, row in df.iterrows()
+        ]
+        _event_lookup.update(version=version, index=EventIndex(df['Date'].values), records=records)
+    return _event_lookup['index'], _event_lookup['records']
+
+def events_near_dates(dates, days):
+    """
+    Find events near each date with the interval index.
+
+    Args:
+        dates (list): Query dates (datetime-like)
+        days (int or list): Search half-width in days, scalar or per date
+
+    Returns:
+        list: Per-query lists of event dicts with days_from_target, or None on load failure
+    """
+    lookup = event_lookup()
+    if lookup is None:
+        return None
+    index, records = lookup
+    
+    query_positions, event_rows, offsets = index.matches(dates, days)
+    results = [[] for _ in dates]
+    for query, row, offset in zip(query_positions.tolist(), event_rows.tolist(), offsets.tolist()):
+        results[query].append(dict(records[row], days_from_target=offset))
+    return results
+
 @app.route('/api/events/near-date', methods=['GET'])
 def get_events_near_date():
     """Get events within a specified date range."""
     date_str = request.args.get('date')
-    days = int(request.args.get('days', 30))
     
     if not date_str:
         return jsonify({'error': 'Date parameter required'}), 400
+    try:
+        days = int(request.args.get('days', 30))
+    except ValueError:
+        return jsonify({'error': '"days" must be an integer'}), 400
+    if days < 0:
+        return jsonify({'error': '"days" must not be negative'}), 400
     
     try:
         target_date = datetime.strptime(date_str, '%Y-%m-%d')
     except ValueError:
         return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
     
-    df = load_events_data()
-    if df is None:
+    results = events_near_dates([target_date], days)
+    if results is None:
         return jsonify({'error': 'Failed to load events data'}), 500
-    
-    # Find events within the specified range
-    start_date = target_date - pd.Timedelta(days=days)
-    end_date = target_date + pd.Timedelta(days=days)
-    
-    nearby_events = df[
-        (df['Date'] >= start_date) & 
-        (df['Date'] <= end_date)
-    ].copy()
-    
-    # Add distance in days
-    nearby_events['days_from_target'] = (nearby_events['Date'] - target_date).dt.days
-    
-    # Convert to JSON-serializable format
-    data = []
-    for _, row in nearby_events.iterrows():
-        data.append({
-            'date': row['Date'].strftime('%Y-%m-%d'),
-            'event': row['Event'],
-            'category': row['Category'],
-            'description': row['Description'],
-            'impact_score': int(row['Impact_Score']),
-            'region': row['Region'],
-            'days_from_target': int(row['days_from_target'])
-        })
+    data = results[0]
     
     return jsonify({
         'data': data,
@@ -253,55 +478,361 @@ def get_events_near_date():
         'search_range_days': days
     })
 
+@app.route('/api/events/near-dates', methods=['POST'])
+def get_events_near_dates():
+    """
+    Get events near many dates in one request.
+
+    Body: {"dates": ["YYYY-MM-DD", ...], "days": 30} where days is a single
+    half-width or a list with one value per date.
+    """
+    body = request.get_json(silent=True) or {}
+    dates = body.get('dates')
+    days = body.get('days', 30)
+    
+    if not isinstance(dates, list) or not dates:
+        return jsonify({'error': 'Body must contain a non-empty "dates" list'}), 400
+    if len(dates) > MAX_BATCH_QUERIES:
+        return jsonify({'error': f'At most {MAX_BATCH_QUERIES} dates per request'}), 400
+    if isinstance(days, list) and len(days) != len(dates):
+        return jsonify({'error': '"days" must be a number or a list matching "dates"'}), 400
+    
+    try:
+        target_dates = [datetime.strptime(d, '%Y-%m-%d') for d in dates]
+        days = [int(d) for d in days] if isinstance(days, list) else int(days)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD and integer days'}), 400
+    if min(days if isinstance(days, list) else [days]) < 0:
+        return jsonify({'error': '"days" must not be negative'}), 400
+    
+    results = events_near_dates(target_dates, days)
+    if results is None:
+        return jsonify({'error': 'Failed to load events data'}), 500
+    
+    half_widths = days if isinstance(days, list) else [days] * len(dates)
+    return jsonify({
+        'results': [
+            {'target_date': d, 'search_range_days': w, 'data': data, 'count': len(data)}
+            for d, w, data in zip(dates, half_widths, results)
+        ],
+        'count': len(results)
+    })
+
 @app.route('/api/analysis/price-changes', methods=['GET'])
 def get_price_changes():
     """Get significant price changes."""
-    df = load_processed_data()
-    if df is None:
+    ds = load_processed_data()
+    if ds is None:
         return jsonify({'error': 'Failed to load data'}), 500
     
     # Calculate price changes
-    df['price_change'] = df['Price'].pct_change()
-    df['price_change_abs'] = df['price_change'].abs()
+    prices = ds.column('Price')
+    price_change = np.full(len(prices), np.nan)
+    price_change[1:] = prices[1:] / prices[:-1] - 1
+    price_change_abs = np.abs(price_change)
     
-    # Get top price changes
+    # Get top price changes, sorted by absolute change (stable, like pandas)
     threshold = float(request.args.get('threshold', 0.05))  # 5% default
-    significant_changes = df[df['price_change_abs'] >= threshold].copy()
-    
-    # Sort by absolute change
-    significant_changes = significant_changes.sort_values('price_change_abs', ascending=False)
+    significant = np.flatnonzero(price_change_abs >= threshold)
+    significant = significant[np.argsort(-price_change_abs[significant], kind='stable')]
     
     # Limit results
     limit = int(request.args.get('limit', 50))
-    significant_changes = significant_changes.head(limit)
+    significant = significant[:limit]
+    
+    dates = ds.date_strings()[significant].tolist()
+    changes = price_change[significant]
+    data = [
+        {'date': d, 'price': p, 'price_change': c, 'price_change_pct': pct, 'log_returns': r}
+        for d, p, c, pct, r in zip(dates, prices[significant].tolist(), changes.tolist(),
+                                   (changes * 100).tolist(),
+                                   ds.column('log_returns')[significant].tolist())
+    ]
+    
+    return jsonify({
+        'data': data,
+        'count': len(data),
+        'threshold': threshold,
+        'total_observations': len(ds)
+    })
+
+@app.route('/api/data/price-bars', methods=['GET'])
+def get_price_bars():
+    """Get OHLC bars at the finest resolution that fits the requested range and width."""
+    ds = load_processed_data()
+    if ds is None:
+        return jsonify({'error': 'Failed to load processed data'}), 500
+    
+    try:
+        start = request.args.get('start')
+        end = request.args.get('end')
+        start = datetime.strptime(start, '%Y-%m-%d') if start else None
+        end = datetime.strptime(end, '%Y-%m-%d') if end else None
+        width = int(request.args.get('width', 1000))
+    except ValueError:
+        return jsonify({'error': 'Invalid parameters. Use YYYY-MM-DD dates and an integer width'}), 400
+    if width <= 0:
+        return jsonify({'error': '"width" must be positive'}), 400
+    
+    levels = {'daily': ds}
+    for level in LEVELS:
+        bars = load_pyramid_level(level)
+        if bars is not None:
+            levels[level] = bars
+    
+    def bounds(dataset):
+        lo = dataset.searchsorted(start, side='left') if start else 0
+        hi = dataset.searchsorted(end, side='right') if end else len(dataset)
+        return lo, max(lo, hi)
+    
+    ranges = {level: bounds(dataset) for level, dataset in levels.items()}
+    requested = request.args.get('level')
+    if requested is not None and requested not in levels:
+        return jsonify({'error': f'Unknown level "{requested}". Use one of {list(levels)}'}), 400
+    level = requested or choose_level({name: hi - lo for name, (lo, hi) in ranges.items()}, width)
+    
+    lo, hi = ranges[level]
+    dataset = levels[level]
+    if level == 'daily':
+        prices = dataset.column('Price')[lo:hi]
+        columns = {
+            'open': prices, 'high': prices, 'low': prices, 'close': prices, 'mean': prices,
+            'volatility': np.full(hi - lo, np.nan),
+            'log_return': dataset.column('log_returns')[lo:hi],
+            'observations': np.ones(hi - lo)
+        }
+    else:
+        columns = {name: dataset.column(name)[lo:hi] for name in PYRAMID_COLUMNS}
+    
+    dates = dataset.date_strings()[lo:hi].tolist()
+    values = [np.asarray(columns[name], dtype=np.float64).tolist() for name in PYRAMID_COLUMNS[:-1]]
+    observations = np.asarray(columns['observations'], dtype=np.int64).tolist()
+    data = [
+        {'date': d, 'open': o, 'high': h, 'low': l, 'close': c, 'mean': m,
+         'volatility': None if v != v else v, 'log_return': r, 'observations': n}
+        for d, o, h, l, c, m, v, r, n in zip(dates, *values, observations)
+    ]
+    
+    return jsonify({
+        'level': level,
+        'data': data,
+        'count': len(data),
+        'available_levels': list(levels)
+    })
+
+@app.route('/api/results/runs', methods=['GET'])
+def get_result_runs():
+    """Get stored analysis runs, newest first."""
+    store = open_results_store()
+    if store is None:
+        return jsonify({'error': 'No analysis results stored yet'}), 404
+    try:
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+    
+    with store:
+        runs = store.runs(method=request.args.get('method'), limit=limit)
+    return jsonify({'data': runs, 'count': len(runs)})
+
+def _run_query(query):
+    """Run a per-run result query with run_id/start/end parameters (latest run by default)."""
+    store = open_results_store()
+    if store is None:
+        return jsonify({'error': 'No analysis results stored yet'}), 404
+    try:
+        start, end = _date_range_args()
+        run_id = request.args.get('run_id')
+        run_id = int(run_id) if run_id else None
+    except ValueError:
+        return jsonify({'error': 'Invalid parameters. Use YYYY-MM-DD dates and an integer run_id'}), 400
+    
+    with store:
+        if run_id is None:
+            run_id = store.latest_run_id(request.args.get('method'))
+        if run_id is None:
+            return jsonify({'error': 'No finished analysis run found'}), 404
+        if not store.has_run(run_id):
+            return jsonify({'error': 'Run not found'}), 404
+        data = query(store, run_id, start, end)
+    return jsonify({'run_id': run_id, 'data': data, 'count': len(data)})
+
+@app.route('/api/results/change-points', methods=['GET'])
+def get_result_change_points():
+    """Get stored change points of a run, filtered by date range and event category."""
+    category = request.args.get('category')
+    return _run_query(lambda store, run_id, start, end: store.change_points(run_id, start, end, category))
+
+@app.route('/api/results/regime-stats', methods=['GET'])
+def get_result_regime_stats():
+    """Get stored regime statistics of a run, filtered by date range."""
+    return _run_query(lambda store, run_id, start, end: store.regime_stats(run_id, start, end))
+
+@app.route('/api/results/events', methods=['GET'])
+def get_result_events():
+    """Get stored events filtered by date range and category."""
+    store = open_results_store()
+    if store is None:
+        return jsonify({'error': 'No analysis results stored yet'}), 404
+    try:
+        start, end = _date_range_args()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    
+    with store:
+        events = store.events(start, end, request.args.get('category'))
+    return jsonify({'data': events, 'count': len(events)})
+
+@app.route('/api/analysis/event-impact', methods=['GET'])
+def get_event_impact():
+    """Get cumulative returns and volatility changes around every event."""
+    try:
+        windows = parse_windows(request.args.get('windows', '-5:5,-30:30'))
+        estimation_days = int(request.args.get('estimation_days', ESTIMATION_DAYS))
+        include_path = request.args.get('path', 'false').lower() == 'true'
+    except ValueError as e:
+        return jsonify({'error': f'Invalid parameters: {e}'}), 400
+    if estimation_days < 0:
+        return jsonify({'error': '"estimation_days" must not be negative'}), 400
+    
+    ds = load_processed_data()
+    events = load_events_data()
+    if ds is None or events is None:
+        return jsonify({'error': 'Failed to load data'}), 500
+    
+    key = (dataset_version('processed'), dataset_version('events'), windows, estimation_days,
+           include_path)
+    body = _event_impact_cache.get(key)
+    metrics.registry.record_cache('event_impact', hit=body is not None)
+    if body is not None:
+        _event_impact_cache.move_to_end(key)
+        return Response(body, mimetype='application/json')
+    
+    # Day 0 is the first trading day on or after the event; events outside the data get -1
+    positions = ds.searchsorted(events['Date'].values)
+    event_days = events['Date'].values.astype('datetime64[D]')
+    covered = (event_days >= ds.datetimes[0]) & (positions < len(ds))
+    positions = np.where(covered, positions, -1)
+    impact = compute_event_impact(ds.column('log_returns'), positions, windows, estimation_days,
+                                  include_path)
+    dates = ds.date_strings()
     
     data = []
-    for date, row in significant_changes.iterrows():
+    for i, (_, row) in enumerate(events.iterrows()):
+        event_windows = {}
+        for label, result in impact.items():
+            event_windows[label] = {
+                'complete': bool(result['complete'][i]),
+                'observations': int(result['observations'][i]),
+                'cumulative_return': json_float(result['cumulative_return'][i]),
+                'abnormal_return': json_float(result['abnormal_return'][i]),
+                'price_change_pct': json_float(result['price_change_pct'][i]),
+                'pre_volatility': json_float(result['pre_volatility'][i]),
+                'post_volatility': json_float(result['post_volatility'][i]),
+                'vol_change_pct': json_float(result['vol_change_pct'][i])
+            }
+            if include_path:
+                path = result['cumulative_path'][i]
+                event_windows[label]['cumulative_path'] = path.tolist() if positions[i] >= 0 else None
         data.append({
-            'date': date.strftime('%Y-%m-%d'),
-            'price': float(row['Price']),
-            'price_change': float(row['price_change']),
-            'price_change_pct': float(row['price_change'] * 100),
-            'log_returns': float(row['log_returns'])
+            'date': row['Date'].strftime('%Y-%m-%d'),
+            'event': row['Event'],
+            'category': row['Category'],
+            'impact_score': int(row['Impact_Score']),
+            'event_day': str(dates[positions[i]]) if positions[i] >= 0 else None,
+            'windows': event_windows
         })
     
-    return jsonify({
+    body = json.dumps({
         'data': data,
         'count': len(data),
-        'threshold': threshold,
-        'total_observations': len(df)
+        'windows': [list(window) for window in windows],
+        'estimation_days': estimation_days
     })
+    _event_impact_cache[key] = body
+    if len(_event_impact_cache) > EVENT_IMPACT_CACHE_SIZE:
+        _event_impact_cache.popitem(last=False)
+    
+    return Response(body, mimetype='application/json')
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """Queue a detection or Bayesian analysis run: {kind, params}."""
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict) or 'kind' not in body:
+        return jsonify({'error': 'Expected a JSON body with a "kind" field'}), 400
+    params = body.get('params') or {}
+    if not isinstance(params, dict):
+        return jsonify({'error': '"params" must be an object'}), 400
+    
+    paths = {'data_dir': os.path.abspath(DATA_DIR), 'reports_dir': os.path.abspath(REPORTS_DIR)}
+    try:
+        status = job_queue().submit(body['kind'], params, paths)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except jobs.QueueFull as e:
+        return jsonify({'error': str(e)}), 429
+    return jsonify(status), 202
+
+@app.route('/api/jobs', methods=['GET'])
+def get_jobs():
+    """List recent jobs, optionally filtered by status."""
+    try:
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+    data = job_queue().list(limit=limit, status=request.args.get('status'))
+    return jsonify({'data': data, 'count': len(data)})
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get the status and progress of a job."""
+    status = job_queue().status(job_id)
+    if status is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(status)
+
+@app.route('/api/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """Get the result of a succeeded job."""
+    status = job_queue().status(job_id)
+    if status is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if status['status'] != 'succeeded':
+        return jsonify({'error': f"Job is {status['status']}", 'status': status}), 409
+    return jsonify({'job_id': job_id, 'result': job_queue().result(job_id)})
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancel a queued job or ask a running job to stop."""
+    status = job_queue().cancel(job_id)
+    if status is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(status)
 
 if __name__ == '__main__':
     print("Starting Brent Oil Analysis API...")
     print("Available endpoints:")
     print("  GET /api/health - Health check")
-    print("  GET /api/data/brent-prices - Brent oil price data")
-    print("  GET /api/data/events - Major events data")
+    print("  GET /api/metrics - Prometheus metrics")
+    print("  GET /api/data/brent-prices?since=<version> - Brent oil price data (delta after a version)")
+    print("  GET /api/data/events?since=<version> - Major events data (delta after a version)")
     print("  GET /api/data/log-returns - Log returns data")
-    print("  GET /api/analysis/summary - Analysis summary")
+    print("  GET /api/analysis/summary?since=<version> - Analysis summary")
     print("  GET /api/analysis/volatility-periods - High volatility periods")
     print("  GET /api/events/near-date?date=YYYY-MM-DD&days=30 - Events near date")
+    print("  POST /api/events/near-dates {dates: [...], days: 30} - Events near many dates")
     print("  GET /api/analysis/price-changes?threshold=0.05&limit=50 - Significant price changes")
+    print("  GET /api/data/price-bars?start=YYYY-MM-DD&end=YYYY-MM-DD&width=800 - OHLC bars for a chart")
+    print("  GET /api/results/runs?method=rolling_mean - Stored analysis runs")
+    print("  GET /api/results/change-points?run_id=&start=&end=&category= - Stored change points")
+    print("  GET /api/results/regime-stats?run_id=&start=&end= - Stored regime statistics")
+    print("  GET /api/results/events?start=&end=&category= - Stored events")
+    print("  GET /api/analysis/event-impact?windows=-5:5,-30:30&path=false - Returns and volatility around events")
+    print("  POST /api/jobs {kind: detection|bayesian, params: {...}} - Queue a background analysis")
+    print("  GET /api/jobs?status= - Recent jobs")
+    print("  GET /api/jobs/<id> - Job status and progress")
+    print("  GET /api/jobs/<id>/result - Result of a finished job")
+    print("  DELETE /api/jobs/<id> - Cancel a job")
     
     app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
@@ -0,0 +1,31 @@
+"""
+Gunicorn configuration for the Brent Oil Analysis API.
+
+Run from this directory with:
+    gunicorn -c gunicorn.conf.py app:app
+
+The app is preloaded in the master and the datasets are published to the
+shared memory-mapped store before forking, so workers start without parsing
+any CSV and share a single copy of the data through the page cache.
+"""
+
+import multiprocessing
+import os
+import tempfile
+
+bind = os.environ.get('BRENT_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('BRENT_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+preload_app = True
+
+# Must be set before the app module is imported by the master
+os.environ.setdefault('BRENT_SHARED_DATA_DIR',
+                      os.path.join(tempfile.gettempdir(), 'brent_shared_data'))
+
+def when_ready(server):
+    """Publish the shared dataset snapshots once, before workers are forked."""
+    import app
+
+    for load in (app.load_brent_data, app.load_processed_data):
+        dataset = load()
+        if dataset is not None:
+            server.log.info(f"Shared dataset ready: {load.__name__} ({len(dataset)} rows)")
@@ -0,0 +1,525 @@
+"""
+Background jobs for long-running analyses triggered through the API.
+Detection and Bayesian (MCMC/ADVI) runs execute in a local process pool, so
+request handlers only enqueue work and read job files. Status, progress and
+results live on disk and can be polled from any API worker.
+
+Layout under the jobs root:
+    <job_id>.json           status, progress and parameters (replaced atomically)
+    <job_id>.result.json    result of a succeeded job
+    <job_id>.cancel         cancellation request picked up by the running job
+    <job_id>.lock           flock serialising status updates across processes
+"""
+
+import ctypes
+import fcntl
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'models')
+
+FINAL_STATES = ('succeeded', 'failed', 'cancelled')
+
+# Accepted parameters per job kind: name -> (default, minimum, maximum) or (default, choices)
+JOB_PARAMETERS = {
+    'detection': {
+        'price_window': (252, 20, 2520),
+        'price_threshold': (2.0, 0.5, 10.0),
+        'vol_window': (60, 5, 1000),
+        'vol_threshold': (1.5, 0.1, 10.0),
+        'episode_max_gap': (5, 0, 252),
+        'regime_window': (252, 20, 2520),
+        'n_permutations': (1000, 0, 100000),
+        'days_threshold': (30, 0, 365)
+    },
+    'bayesian': {
+        'method': ('mcmc', ('mcmc', 'advi')),
+        'n_changepoints': (3, 1, 10),
+        'draws': (2000, 100, 20000),
+        'tune': (1000, 0, 20000),
+        'n_iterations': (30000, 1000, 500000)
+    }
+}
+
+# Minimum seconds between progress writes of a running job
+PROGRESS_INTERVAL = 0.5
+
+class QueueFull(RuntimeError):
+    """Raised when the job queue already holds its maximum number of jobs."""
+
+class JobCancelled(Exception):
+    """Raised inside a job when its cancellation was requested."""
+
+def validate_params(kind, params):
+    """
+    Check job parameters against JOB_PARAMETERS and fill in defaults.
+
+    Args:
+        kind (str): Job kind
+        params (dict): Requested parameters
+
+    Returns:
+        dict: Complete, type-converted parameters
+
+    Raises:
+        ValueError: If the kind, a parameter name or a value is invalid
+    """
+    if kind not in JOB_PARAMETERS:
+        raise ValueError(f"Unknown job kind: {kind}. Use one of {', '.join(JOB_PARAMETERS)}")
+    spec = JOB_PARAMETERS[kind]
+    unknown = set(params) - set(spec)
+    if unknown:
+        raise ValueError(f"Unknown parameters for {kind}: {', '.join(sorted(unknown))}")
+
+    validated = {}
+    for name, (default, *bounds) in spec.items():
+        value = params.get(name, default)
+        if len(bounds) == 1:
+            if value not in bounds[0]:
+                raise ValueError(f"{name} must be one of {', '.join(bounds[0])}")
+        else:
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"{name} must be a number")
+            if isinstance(default, int) and value != int(value):
+                raise ValueError(f"{name} must be an integer")
+            value = type(default)(value)
+            if not bounds[0] <= value <= bounds[1]:
+                raise ValueError(f"{name} must be between {bounds[0]} and {bounds[1]}")
+        validated[name] = value
+    return validated
+
+def _status_path(root, job_id):
+    return os.path.join(root, f'{job_id}.json')
+
+def _result_path(root, job_id):
+    return os.path.join(root, f'{job_id}.result.json')
+
+def _cancel_path(root, job_id):
+    return os.path.join(root, f'{job_id}.cancel')
+
+def _lock_path(root, job_id):
+    return os.path.join(root, f'{job_id}.lock')
+
+def _write_json(path, payload):
+    """Write JSON through a temporary file so readers never see a partial file."""
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, default=str)
+    os.replace(tmp_path, path)
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def update_status(root, job_id, **fields):
+    """
+    Merge fields into a job's status file.
+
+    The API processes and the worker update the same file, so the
+    read-modify-write runs under an exclusive flock on the job's lock file.
+    A job in a final state is never changed again, so a late update (e.g. a
+    cancel request racing the job's completion) cannot revive it.
+
+    Args:
+        root (str): Jobs directory
+        job_id (str): Job ID
+        **fields: Status fields to set
+
+    Returns:
+        dict: Updated status
+    """
+    with open(_lock_path(root, job_id), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            status = _read_json(_status_path(root, job_id)) or {'job_id': job_id}
+            if status.get('status') in FINAL_STATES:
+                return status
+            status.update(fields)
+            _write_json(_status_path(root, job_id), status)
+            return status
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+class JobContext:
+    """Progress reporting and cancellation checks for code running inside a job."""
+
+    def __init__(self, root, job_id):
+        self.root = root
+        self.job_id = job_id
+        self._last_write = 0.0
+
+    def cancelled(self):
+        return os.path.exists(_cancel_path(self.root, self.job_id))
+
+    def check_cancelled(self):
+        """Raise JobCancelled if the job was asked to stop."""
+        if self.cancelled():
+            raise JobCancelled()
+
+    def progress(self, fraction, message=None):
+        """
+        Record progress, writing the status file at most every PROGRESS_INTERVAL seconds.
+
+        Args:
+            fraction (float): Completed share of the job (0-1)
+            message (str): Current step
+        """
+        now = time.monotonic()
+        if now - self._last_write < PROGRESS_INTERVAL:
+            return
+        self._last_write = now
+        fields = {'progress': round(min(max(fraction, 0.0), 1.0), 4)}
+        if message is not None:
+            fields['message'] = message
+        update_status(self.root, self.job_id, **fields)
+
+    def step(self, fraction, message):
+        """Record a new step unthrottled and stop if cancellation was requested."""
+        self.check_cancelled()
+        self._last_write = 0.0
+        self.progress(fraction, message)
+
+class _CancelWatcher:
+    """
+    Interrupt a job as soon as its cancellation is requested.
+
+    A single step (a permutation test, a sampler run) can take minutes
+    without reaching a check, so a watcher thread polls the cancel file and
+    raises JobCancelled asynchronously in the job's thread. The exception
+    fires at the next Python bytecode; a job blocked on its own worker
+    processes (nested pools, sampler chains) is released by terminating
+    them after a grace period. Either way the pool worker stays alive.
+    """
+
+    def __init__(self, context, interval=PROGRESS_INTERVAL, grace=5.0):
+        self.context = context
+        self.interval = interval
+        self.grace = grace
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._active = False
+
+    def _raise(self, exception):
+        ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(self._thread_id), exception)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            if self.context.cancelled():
+                with self._lock:
+                    if self._active:
+                        self._raise(ctypes.py_object(JobCancelled))
+                if not self._stop.wait(self.grace):
+                    for child in multiprocessing.active_children():
+                        child.terminate()
+                return
+
+    def __enter__(self):
+        self._thread_id = threading.get_ident()
+        self._active = True
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        with self._lock:
+            self._active = False
+            # Drop an exception that was scheduled but has not fired yet
+            self._raise(None)
+        self._stop.set()
+        self._thread.join()
+        return False
+
+def _run_detection(context, params, paths):
+    """Rolling-mean and volatility detection with regime analysis and event correlation."""
+    import simple_change_point_analysis as simple_cp
+
+    context.step(0.05, "Loading processed data")
+    df = simple_cp.load_processed_data(os.path.join(paths['data_dir'], 'processed_brent_data.csv'))
+
+    context.step(0.15, "Detecting change points")
+    episodes = simple_cp.detect_change_point_episodes(df, price_window=params['price_window'],
+                                                      price_threshold=params['price_threshold'],
+                                                      vol_window=params['vol_window'],
+                                                      vol_threshold=params['vol_threshold'],
+                                                      max_gap=params['episode_max_gap'])
+    change_points = episodes['peak'].tolist()
+
+    context.step(0.3, f"Analyzing {len(change_points)} regime changes")
+    regime_analysis = simple_cp.analyze_regime_changes(df, change_points, window=params['regime_window'],
+                                                       n_permutations=params['n_permutations'])
+
+    context.step(0.8, "Correlating with major events")
+    events_file = os.path.join(paths['data_dir'], 'major_events.csv')
+    event_correlations = simple_cp.correlate_with_events(change_points, events_file=events_file,
+                                                         days_threshold=params['days_threshold'])
+
+    context.step(0.9, "Storing results")
+    run_id = simple_cp.store_results(df, change_points, regime_analysis, event_correlations,
+                                     parameters=params, events_file=events_file,
+                                     db_path=os.path.join(paths['reports_dir'], 'brent_results.db'))
+    return {
+        'run_id': run_id,
+        'n_change_points': len(change_points),
+        # Episodes each detector took part in
+        'n_price_change_points': int((episodes['detectors'] != 'volatility').sum()),
+        'n_volatility_change_points': int((episodes['detectors'] != 'price').sum()),
+        'n_flagged_days': int(episodes['n_flags'].sum()),
+        'n_correlated': len(event_correlations),
+        'episodes': [
+            {'episode': row.episode, 'start': row.start.strftime('%Y-%m-%d'),
+             'peak': row.peak.strftime('%Y-%m-%d'), 'end': row.end.strftime('%Y-%m-%d'),
+             'n_flags': int(row.n_flags), 'max_score': float(row.max_score), 'detectors': row.detectors}
+            for row in episodes.itertuples()
+        ]
+    }
+
+def _run_bayesian(context, params, paths):
+    """Bayesian change point model fitted with NUTS (mcmc) or ADVI."""
+    import change_point_analysis as bayes_cp
+
+    context.step(0.02, "Loading processed data")
+    df = bayes_cp.load_processed_data(os.path.join(paths['data_dir'], 'processed_brent_data.csv'))
+
+    context.step(0.05, "Building model")
+    model = bayes_cp.simple_change_point_model(df['log_returns'].values,
+                                               n_changepoints=params['n_changepoints'])
+
+    if params['method'] == 'advi':
+        def on_iteration(approx, losses, i):
+            context.check_cancelled()
+            context.progress(0.1 + 0.8 * i / params['n_iterations'], f"ADVI iteration {i}")
+
+        context.step(0.1, "Fitting ADVI approximation")
+        trace = bayes_cp.run_advi(model, n_iterations=params['n_iterations'], draws=params['draws'],
+                                  callbacks=[on_iteration])
+    else:
+        total = params['draws'] + params['tune']
+
+        def on_draw(trace, draw):
+            context.check_cancelled()
+            position = getattr(draw, 'draw_idx', 0)
+            context.progress(0.1 + 0.8 * position / total, f"MCMC draw {position} of {total}")
+
+        context.step(0.1, "Running MCMC sampling")
+        trace = bayes_cp.run_mcmc_sampling(model, draws=params['draws'], tune=params['tune'],
+                                           callback=on_draw)
+
+    context.step(0.9, "Extracting change point dates")
+    changepoint_info = bayes_cp.extract_changepoint_dates(trace, df.index)
+    run_id = bayes_cp.store_results(df, changepoint_info, parameters=params,
+                                    db_path=os.path.join(paths['reports_dir'], 'brent_results.db'))
+    return {
+        'run_id': run_id,
+        'method': params['method'],
+        'change_points': [
+            {'change_point': cp_name, **{key: value.strftime('%Y-%m-%d') if hasattr(value, 'strftime') else value
+                                         for key, value in cp_data.items()}}
+            for cp_name, cp_data in changepoint_info.items()
+        ]
+    }
+
+RUNNERS = {
+    'detection': _run_detection,
+    'bayesian': _run_bayesian
+}
+
+def run_job(root, job_id, kind, params, paths):
+    """
+    Process pool entry point: run one job and persist its outcome.
+
+    Args:
+        root (str): Jobs directory
+        job_id (str): Job ID
+        kind (str): Job kind (key of RUNNERS)
+        params (dict): Validated parameters
+        paths (dict): Absolute data_dir and reports_dir
+    """
+    context = JobContext(root, job_id)
+    if context.cancelled():
+        update_status(root, job_id, status='cancelled', finished_at=_now(), message="Cancelled before start")
+        return
+
+    if MODELS_DIR not in sys.path:
+        sys.path.insert(0, MODELS_DIR)
+    update_status(root, job_id, status='running', started_at=_now(), pid=os.getpid(), message="Starting")
+    try:
+        with _CancelWatcher(context):
+            result = RUNNERS[kind](context, params, paths)
+    except JobCancelled:
+        update_status(root, job_id, status='cancelled', finished_at=_now(), message="Cancelled")
+        return
+    except Exception as e:
+        if context.cancelled():
+            # Terminated helper processes surface as errors of the interrupted step
+            update_status(root, job_id, status='cancelled', finished_at=_now(), message="Cancelled")
+            return
+        update_status(root, job_id, status='failed', finished_at=_now(), error=f'{type(e).__name__}: {e}',
+                      traceback=traceback.format_exc(limit=5), message="Failed")
+        return
+
+    _write_json(_result_path(root, job_id), result)
+    update_status(root, job_id, status='succeeded', finished_at=_now(), progress=1.0, message="Done")
+
+class JobQueue:
+    """
+    Bounded queue of analysis jobs executed by a local process pool.
+
+    The pool is created on the first submission, so importing the app (for
+    example in a preloading gunicorn master) never forks worker processes.
+    Each API process owns its queue; job files are shared through the jobs
+    directory, so status and results can be read from any process.
+    """
+
+    def __init__(self, root, max_workers=1, max_pending=8):
+        self.root = root
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        os.makedirs(root, exist_ok=True)
+        self._executor = None
+        self._futures = {}
+        self._lock = threading.RLock()
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def submit(self, kind, params, paths):
+        """
+        Validate and enqueue a job.
+
+        Args:
+            kind (str): Job kind
+            params (dict): Requested parameters
+            paths (dict): Absolute data_dir and reports_dir for the job
+
+        Returns:
+            dict: Status of the queued job
+
+        Raises:
+            ValueError: If the kind or parameters are invalid
+            QueueFull: If max_pending jobs are already queued or running
+        """
+        params = validate_params(kind, params)
+        with self._lock:
+            if len(self._futures) >= self.max_pending:
+                raise QueueFull(f"Job queue is full ({self.max_pending} jobs pending)")
+
+            job_id = uuid.uuid4().hex[:16]
+            status = update_status(self.root, job_id, kind=kind, params=params, status='queued',
+                                   submitted_at=_now(), owner_pid=os.getpid(), progress=0.0,
+                                   message="Queued")
+            future = self._pool().submit(run_job, self.root, job_id, kind, params, paths)
+            self._futures[job_id] = future
+        future.add_done_callback(partial(self._finished, job_id))
+        return status
+
+    def _finished(self, job_id, future):
+        """Record pool-level failures (e.g. a crashed worker) the job could not report itself."""
+        with self._lock:
+            self._futures.pop(job_id, None)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            status = _read_json(_status_path(self.root, job_id)) or {}
+            if status.get('status') not in FINAL_STATES:
+                update_status(self.root, job_id, status='failed', finished_at=_now(),
+                              error=f'{type(error).__name__}: {error}', message="Failed")
+
+    def status(self, job_id):
+        """
+        Current status of a job, or None if unknown.
+
+        Jobs whose process died without reporting an outcome are marked failed.
+        """
+        if not job_id.isalnum():
+            return None
+        status = _read_json(_status_path(self.root, job_id))
+        if status is None or status.get('status') in FINAL_STATES:
+            return status
+
+        pid = status.get('pid') if status.get('status') == 'running' else status.get('owner_pid')
+        if pid is not None and not _process_alive(pid):
+            status = update_status(self.root, job_id, status='failed', finished_at=_now(),
+                                   error="Job process exited before the job finished", message="Failed")
+        return status
+
+    def result(self, job_id):
+        """Result of a succeeded job, or None."""
+        if not job_id.isalnum():
+            return None
+        return _read_json(_result_path(self.root, job_id))
+
+    def list(self, limit=50, status=None):
+        """
+        Recent jobs, newest first.
+
+        Args:
+            limit (int): Maximum number of jobs
+            status (str): Only jobs in this state
+
+        Returns:
+            list: Job statuses
+        """
+        paths = [path for path in glob.glob(os.path.join(self.root, '*.json'))
+                 if not path.endswith('.result.json')]
+        jobs = [self.status(os.path.basename(path)[:-len('.json')]) for path in paths]
+        jobs = [job for job in jobs if job is not None and (status is None or job.get('status') == status)]
+        jobs.sort(key=lambda job: job.get('submitted_at', ''), reverse=True)
+        return jobs[:limit]
+
+    def cancel(self, job_id):
+        """
+        Cancel a queued job, or ask a running job to stop at its next check.
+
+        Args:
+            job_id (str): Job ID
+
+        Returns:
+            dict: Updated status, or None if the job is unknown
+        """
+        status = self.status(job_id)
+        if status is None or status.get('status') in FINAL_STATES:
+            return status
+
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            return update_status(self.root, job_id, status='cancelled', finished_at=_now(),
+                                 message="Cancelled before start")
+
+        # Running (possibly in another API process): the job stops at its next check
+        open(_cancel_path(self.root, job_id), 'w').close()
+        return update_status(self.root, job_id, cancel_requested=True, message="Cancelling")
+
+    def shutdown(self, wait=False):
+        """Stop the process pool, cancelling jobs that have not started."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
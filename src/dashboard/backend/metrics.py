@@ -0,0 +1,173 @@
+"""
+Prometheus-style metrics for the Brent Oil Analysis API.
+Request middleware records per-route counts, latency and response sizes;
+the dataset cache reports hits, misses and load durations.
+"""
+
+import threading
+import time
+from collections import defaultdict
+
+from flask import Response, g, request
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values."""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series = defaultdict(lambda: [[0] * len(buckets), 0.0, 0])
+
+    def observe(self, labels, value):
+        counts, _, _ = entry = self.series[labels]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def exposition(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labels, (counts, total, count) in sorted(self.series.items()):
+            base = _format_labels(self.label_names, labels)
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{_with_le(base, bound)} {bucket_count}')
+            lines.append(f'{self.name}_bucket{_with_le(base, "+Inf")} {count}')
+            lines.append(f'{self.name}_sum{base} {total}')
+            lines.append(f'{self.name}_count{base} {count}')
+        return lines
+
+class Counter:
+    """Monotonic counter keyed by label values."""
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.series = defaultdict(int)
+
+    def inc(self, labels, amount=1):
+        self.series[labels] += amount
+
+    def exposition(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for labels, value in sorted(self.series.items()):
+            lines.append(f'{self.name}{_format_labels(self.label_names, labels)} {value}')
+        return lines
+
+def _escape(value):
+    """Escape a label value for the text exposition format."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names, values):
+    """Render a label set as {name="value",...}."""
+    if not names:
+        return ''
+    pairs = ','.join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return '{' + pairs + '}'
+
+def _with_le(base, bound):
+    """Add the histogram bucket label to a rendered label set."""
+    le = f'le="{bound}"'
+    return '{' + le + '}' if not base else base[:-1] + ',' + le + '}'
+
+class MetricsRegistry:
+    """Thread-safe collection of the API metrics."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = Counter('brent_api_requests_total',
+                                'Total HTTP requests by route, method and status.',
+                                ('route', 'method', 'status'))
+        self.latency = Histogram('brent_api_request_duration_seconds',
+                                 'HTTP request latency in seconds.',
+                                 ('route', 'method'), LATENCY_BUCKETS)
+        self.response_bytes = Histogram('brent_api_response_bytes',
+                                        'HTTP response body size in bytes.',
+                                        ('route', 'method'), SIZE_BUCKETS)
+        self.cache = Counter('brent_dataset_cache_requests_total',
+                             'Dataset cache lookups by dataset and result.',
+                             ('dataset', 'result'))
+        self.load_duration = Histogram('brent_dataset_load_duration_seconds',
+                                       'Time to load and parse a dataset from disk.',
+                                       ('dataset',), LATENCY_BUCKETS)
+        self.dataset_bytes = {}
+
+    def record_request(self, route, method, status, seconds, size):
+        with self.lock:
+            self.requests.inc((route, method, str(status)))
+            self.latency.observe((route, method), seconds)
+            if size is not None:
+                self.response_bytes.observe((route, method), size)
+
+    def record_cache(self, dataset, hit):
+        with self.lock:
+            self.cache.inc((dataset, 'hit' if hit else 'miss'))
+
+    def record_load(self, dataset, seconds):
+        with self.lock:
+            self.load_duration.observe((dataset,), seconds)
+
+    def set_dataset_bytes(self, dataset, nbytes):
+        with self.lock:
+            self.dataset_bytes[dataset] = nbytes
+
+    def cache_hit_ratios(self):
+        """Hit ratio per dataset."""
+        totals = defaultdict(lambda: [0, 0])
+        for (dataset, result), value in self.cache.series.items():
+            totals[dataset][0 if result == 'hit' else 1] += value
+        return {dataset: hits / (hits + misses) for dataset, (hits, misses) in totals.items()}
+
+    def exposition(self):
+        """Render all metrics in the Prometheus text exposition format."""
+        with self.lock:
+            lines = []
+            for metric in (self.requests, self.latency, self.response_bytes,
+                           self.cache, self.load_duration):
+                lines.extend(metric.exposition())
+
+            lines.append('# HELP brent_dataset_cache_hit_ratio Fraction of dataset lookups served from cache.')
+            lines.append('# TYPE brent_dataset_cache_hit_ratio gauge')
+            for dataset, ratio in sorted(self.cache_hit_ratios().items()):
+                lines.append(f'brent_dataset_cache_hit_ratio{_format_labels(("dataset",), (dataset,))} {ratio}')
+
+            lines.append('# HELP brent_dataset_memory_bytes In-memory size of a cached dataset.')
+            lines.append('# TYPE brent_dataset_memory_bytes gauge')
+            for dataset, nbytes in sorted(self.dataset_bytes.items()):
+                lines.append(f'brent_dataset_memory_bytes{_format_labels(("dataset",), (dataset,))} {nbytes}')
+        return '\n'.join(lines) + '\n'
+
+registry = MetricsRegistry()
+
+def init_app(app, endpoint='/api/metrics'):
+    """
+    Install the request metrics middleware and the metrics endpoint.
+
+    Args:
+        app (Flask): Application to instrument
+        endpoint (str): URL of the metrics endpoint
+    """
+    @app.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+            size = None if response.is_streamed else response.calculate_content_length()
+            registry.record_request(route, request.method, response.status_code,
+                                    time.perf_counter() - start, size)
+        return response
+
+    @app.route(endpoint, methods=['GET'])
+    def metrics_endpoint():
+        """Prometheus text exposition of the API metrics."""
+        return Response(registry.exposition(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,162 @@
+"""
+Memory-mapped dataset snapshots shared by all gunicorn workers.
+Each dataset is parsed once into per-column .npy files; workers map them
+read-only, so the page cache holds a single copy regardless of worker count.
+
+Layout under the store root:
+    <name>-<version>/meta.json, dates.npy,     immutable snapshot
+        col_<column>.npy, flag_<flag>.npy
+    <name>.current                             name of the live snapshot
+A refresh writes a new snapshot directory and atomically replaces the
+pointer file, so readers never see a half-written dataset.
+"""
+
+import json
+import os
+import shutil
+import sys
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'analysis'))
+from compact_dataset import CompactDataset
+
+KEEP_SNAPSHOTS = 2
+
+class SharedDatasetStore:
+    """Directory of memory-mapped CompactDataset snapshots."""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        # Per-process map of name -> (snapshot directory, mapped dataset)
+        self._mapped = {}
+
+    def _pointer(self, name):
+        return os.path.join(self.root, f'{name}.current')
+
+    @contextmanager
+    def _lock(self, name):
+        """Serialize publishers of one dataset across processes."""
+        with open(os.path.join(self.root, f'{name}.lock'), 'w') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def current(self, name):
+        """
+        Read the live snapshot of a dataset.
+
+        Args:
+            name (str): Dataset name
+
+        Returns:
+            tuple: (snapshot directory, metadata dict), or (None, None) if unpublished
+        """
+        try:
+            with open(self._pointer(name)) as f:
+                snapshot = f.read().strip()
+            with open(os.path.join(self.root, snapshot, 'meta.json')) as f:
+                return snapshot, json.load(f)
+        except FileNotFoundError:
+            return None, None
+
+    def publish(self, name, dataset, source_key):
+        """
+        Write a dataset snapshot and make it the live version.
+
+        Args:
+            name (str): Dataset name
+            dataset (CompactDataset): Dataset to share
+            source_key (list): Identity of the source file (path, mtime, size)
+
+        Returns:
+            str: Snapshot directory name
+        """
+        snapshot = f'{name}-{uuid.uuid4().hex[:12]}'
+        tmp_dir = os.path.join(self.root, f'.{snapshot}.tmp')
+        os.makedirs(tmp_dir)
+
+        np.save(os.path.join(tmp_dir, 'dates.npy'), dataset.dates)
+        for column, values in dataset.columns.items():
+            np.save(os.path.join(tmp_dir, f'col_{column}.npy'), values)
+        for flag, packed in dataset.flags.items():
+            np.save(os.path.join(tmp_dir, f'flag_{flag}.npy'), packed)
+
+        meta = {
+            'source_key': list(source_key),
+            'date_unit': dataset.date_unit,
+            'columns': list(dataset.columns),
+            'flags': list(dataset.flags),
+            'length': len(dataset)
+        }
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+        os.rename(tmp_dir, os.path.join(self.root, snapshot))
+        pointer_tmp = self._pointer(name) + f'.{os.getpid()}.tmp'
+        with open(pointer_tmp, 'w') as f:
+            f.write(snapshot)
+        os.replace(pointer_tmp, self._pointer(name))
+
+        self._prune(name, snapshot)
+        return snapshot
+
+    def _prune(self, name, live):
+        """Remove old snapshots, keeping the most recent few for readers still mapping them."""
+        snapshots = sorted(
+            (entry for entry in os.scandir(self.root)
+             if entry.is_dir() and entry.name.startswith(f'{name}-') and entry.name != live),
+            key=lambda entry: entry.stat().st_mtime, reverse=True)
+        for entry in snapshots[KEEP_SNAPSHOTS - 1:]:
+            # Mapped files stay valid for processes that still hold them open
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+    def open(self, name, snapshot, meta):
+        """Map a snapshot read-only as a CompactDataset (reused within the process)."""
+        cached = self._mapped.get(name)
+        if cached is not None and cached[0] == snapshot:
+            return cached[1]
+
+        dataset = CompactDataset.load_directory(os.path.join(self.root, snapshot))
+        self._mapped[name] = (snapshot, dataset)
+        return dataset
+
+    def load(self, name, source_path, parse):
+        """
+        Return the shared dataset, publishing a new snapshot if the source changed.
+
+        Args:
+            name (str): Dataset name
+            source_path (str): File the dataset is parsed from
+            parse (callable): Function parsing source_path into a CompactDataset
+
+        Returns:
+            tuple: (CompactDataset, bool) where the flag is True if this call parsed the source
+        """
+        stat = os.stat(source_path)
+        source_key = [os.path.abspath(source_path), stat.st_mtime_ns, stat.st_size]
+
+        snapshot, meta = self.current(name)
+        parsed = False
+        if meta is None or meta['source_key'] != source_key:
+            with self._lock(name):
+                # Another worker may have published while we waited
+                snapshot, meta = self.current(name)
+                if meta is None or meta['source_key'] != source_key:
+                    self.publish(name, parse(source_path), source_key)
+                    snapshot, meta = self.current(name)
+                    parsed = True
+
+        return self.open(name, snapshot, meta), parsed
@@ -5,6 +5,35 @@ import axios from 'axios';
 import 'bootstrap/dist/css/bootstrap.min.css';
 import './App.css';
 
+const CACHE_PREFIX = 'brent-dashboard:';
+
+const readCache = (key) => {
+  try {
+    return JSON.parse(window.localStorage.getItem(CACHE_PREFIX + key));
+  } catch (err) {
+    return null;
+  }
+};
+
+const writeCache = (key, value) => {
+  try {
+    window.localStorage.setItem(CACHE_PREFIX + key, JSON.stringify(value));
+  } catch (err) {
+    // Storage full or disabled: the next visit simply fetches everything again
+    console.warn('Could not cache dashboard data:', err);
+  }
+};
+
+// Fetch only the rows added since the cached version and merge them into the cache
+const syncDataset = async (url, key) => {
+  const cached = readCache(key);
+  const response = await axios.get(url, { params: cached ? { since: cached.version } : {} });
+  const { data, delta, version } = response.data;
+  const rows = delta && cached ? cached.data.concat(data) : data;
+  writeCache(key, { version, data: rows });
+  return rows;
+};
+
 function App() {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
@@ -28,17 +57,21 @@ function App() {
     try {
       setLoading(true);
       
-      // Load Brent prices
-      const brentResponse = await axios.get('/api/data/brent-prices');
-      setBrentData(brentResponse.data.data);
-      
-      // Load events
-      const eventsResponse = await axios.get('/api/data/events');
-      setEventsData(eventsResponse.data.data);
+      // Load Brent prices and events as deltas against the locally cached copies
+      setBrentData(await syncDataset('/api/data/brent-prices', 'brent-prices'));
+      setEventsData(await syncDataset('/api/data/events', 'events'));
       
-      // Load summary
-      const summaryResponse = await axios.get('/api/analysis/summary');
-      setSummary(summaryResponse.data);
+      // Load summary (the server answers "unchanged" when the cached version is current)
+      const cachedSummary = readCache('summary');
+      const summaryResponse = await axios.get('/api/analysis/summary', {
+        params: cachedSummary ? { since: cachedSummary.version } : {}
+      });
+      if (summaryResponse.data.unchanged) {
+        setSummary(cachedSummary.data);
+      } else {
+        setSummary(summaryResponse.data);
+        writeCache('summary', { version: summaryResponse.data.version, data: summaryResponse.data });
+      }
       
     } catch (err) {
       setError('Failed to load dashboard data. Please check if the backend is running.');
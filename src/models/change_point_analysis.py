@@ -5,14 +5,18 @@ Detects structural breaks in oil price behavior and quantifies uncertainty.
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pymc3 as pm
-import arviz as az
 from datetime import datetime
+import os
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'analysis'))
+from compact_dataset import CompactDataset
+from instrumentation import instrument
+from results_store import ResultsStore
+
+@instrument
 def load_processed_data(file_path='../../data/processed_brent_data.csv'):
     """
     Load processed Brent oil price data.
@@ -24,10 +28,12 @@ def load_processed_data(file_path='../../data/processed_brent_data.csv'):
         pd.DataFrame: Processed time series data
     """
     print("Loading processed data...")
-    df = pd.read_csv(file_path, index_col=0, parse_dates=True)
+    # Parse through the compact container so dates and flags come back typed
+    df = CompactDataset.read_csv(file_path).to_frame()
     print(f"Loaded {len(df)} observations")
     return df
 
+@instrument
 def simple_change_point_model(data, n_changepoints=3):
     """
     Implement a simple Bayesian change point model.
@@ -40,6 +46,8 @@ def simple_change_point_model(data, n_changepoints=3):
         pm.Model: PyMC3 model object
     """
     print(f"Building change point model with {n_changepoints} change points...")
+    # PyMC3 pulls in Theano, so it is only imported when a model is built
+    import pymc3 as pm
     
     n = len(data)
     
@@ -76,7 +84,8 @@ def simple_change_point_model(data, n_changepoints=3):
     
     return model
 
-def run_mcmc_sampling(model, draws=2000, tune=1000):
+@instrument
+def run_mcmc_sampling(model, draws=2000, tune=1000, callback=None):
     """
     Run MCMC sampling for the change point model.
     
@@ -84,17 +93,47 @@ def run_mcmc_sampling(model, draws=2000, tune=1000):
         model (pm.Model): PyMC3 model
         draws (int): Number of posterior samples
         tune (int): Number of tuning steps
+        callback (callable): Called as callback(trace, draw) after every draw
         
     Returns:
         pm.backends.base.MultiTrace: MCMC trace
     """
     print("Running MCMC sampling...")
+    import pymc3 as pm
     
     with model:
-        trace = pm.sample(draws=draws, tune=tune, return_inferencedata=True)
+        trace = pm.sample(draws=draws, tune=tune, return_inferencedata=True, callback=callback)
     
     return trace
 
+@instrument
+def run_advi(model, n_iterations=30000, draws=2000, callbacks=None):
+    """
+    Fit the change point model with ADVI and sample the approximation.
+    
+    Much faster than MCMC for a first look at the posterior, at the cost of
+    a mean-field approximation (no R-hat diagnostics).
+    
+    Args:
+        model (pm.Model): PyMC3 model
+        n_iterations (int): Number of optimisation steps
+        draws (int): Number of samples drawn from the fitted approximation
+        callbacks (list): Called as callback(approx, losses, i) during the fit
+        
+    Returns:
+        arviz.InferenceData: Samples of the approximate posterior
+    """
+    print(f"Fitting ADVI approximation ({n_iterations} iterations)...")
+    import arviz as az
+    import pymc3 as pm
+    
+    with model:
+        approx = pm.fit(n=n_iterations, method='advi', callbacks=callbacks)
+        trace = az.from_pymc3(approx.sample(draws))
+    
+    return trace
+
+@instrument
 def analyze_convergence(trace):
     """
     Analyze MCMC convergence.
@@ -103,6 +142,7 @@ def analyze_convergence(trace):
         trace: MCMC trace object
     """
     print("\n=== Convergence Analysis ===")
+    import arviz as az
     
     # Summary statistics
     summary = az.summary(trace)
@@ -120,6 +160,7 @@ def analyze_convergence(trace):
     
     return summary
 
+@instrument
 def plot_trace(trace, save_path='../../reports/trace_plots.png'):
     """
     Plot MCMC trace plots.
@@ -129,6 +170,8 @@ def plot_trace(trace, save_path='../../reports/trace_plots.png'):
         save_path (str): Path to save the plot
     """
     print("Creating trace plots...")
+    import arviz as az
+    import matplotlib.pyplot as plt
     
     az.plot_trace(trace)
     plt.tight_layout()
@@ -137,6 +180,7 @@ def plot_trace(trace, save_path='../../reports/trace_plots.png'):
     
     print(f"Trace plots saved to {save_path}")
 
+@instrument
 def plot_changepoint_posteriors(trace, dates, save_path='../../reports/changepoint_posteriors.png'):
     """
     Plot posterior distributions of change points.
@@ -147,6 +191,7 @@ def plot_changepoint_posteriors(trace, dates, save_path='../../reports/changepoi
         save_path (str): Path to save the plot
     """
     print("Creating change point posterior plots...")
+    import matplotlib.pyplot as plt
     
     # Extract change point samples
     changepoint_samples = trace.posterior['sorted_changepoints'].values
@@ -171,6 +216,7 @@ def plot_changepoint_posteriors(trace, dates, save_path='../../reports/changepoi
     
     print(f"Change point posterior plots saved to {save_path}")
 
+@instrument
 def extract_changepoint_dates(trace, dates, confidence_level=0.95):
     """
     Extract change point dates with confidence intervals.
@@ -237,6 +283,7 @@ def compare_regime_parameters(trace):
         regime_means = means_samples[:, i, :].flatten()
         print(f"Regime {i+1} mean: {np.mean(regime_means):.6f} ± {np.std(regime_means):.6f}")
 
+@instrument
 def save_results(changepoint_info, file_path='../../reports/changepoint_results.csv'):
     """
     Save change point results to CSV.
@@ -262,9 +309,49 @@ def save_results(changepoint_info, file_path='../../reports/changepoint_results.
     results_df.to_csv(file_path, index=False)
     print("Results saved successfully!")
 
-def main():
+@instrument
+def store_results(df, changepoint_info, parameters=None, db_path='../../reports/brent_results.db'):
+    """
+    Record the run in the SQLite results store.
+    
+    Args:
+        df (pd.DataFrame): Processed data
+        changepoint_info (dict): Change point information
+        parameters (dict): Model and sampler parameters of the run
+        db_path (str): Path to the SQLite database
+        
+    Returns:
+        int: Run ID
+    """
+    print(f"Storing results in {db_path}...")
+    
+    records = [
+        {
+            'change_point': cp_name,
+            'date': cp_data['mean_date'],
+            'median_date': cp_data['median_date'],
+            'lower_ci': cp_data['lower_ci'],
+            'upper_ci': cp_data['upper_ci'],
+            'confidence_level': cp_data['confidence_level']
+        }
+        for cp_name, cp_data in changepoint_info.items()
+    ]
+    
+    with ResultsStore(db_path) as store:
+        store.write_prices(df)
+        run_id = store.start_run('bayesian', parameters)
+        store.write_change_points(run_id, records)
+        store.finish_run(run_id, len(records))
+    
+    print(f"Stored run {run_id}")
+    return run_id
+
+def main(method='mcmc'):
     """
     Main function to run the change point analysis.
+    
+    Args:
+        method (str): 'mcmc' (NUTS sampling) or 'advi' (variational approximation)
     """
     print("=== Bayesian Change Point Analysis ===\n")
     
@@ -278,11 +365,16 @@ def main():
     # Build model
     model = simple_change_point_model(data, n_changepoints=3)
     
-    # Run MCMC sampling
-    trace = run_mcmc_sampling(model)
-    
-    # Analyze convergence
-    summary = analyze_convergence(trace)
+    # Run MCMC sampling, or fit the faster variational approximation
+    if method == 'advi':
+        trace = run_advi(model)
+        parameters = {'n_changepoints': 3, 'method': 'advi', 'n_iterations': 30000, 'draws': 2000}
+    else:
+        trace = run_mcmc_sampling(model)
+        parameters = {'n_changepoints': 3, 'method': 'mcmc', 'draws': 2000, 'tune': 1000}
+        
+        # Analyze convergence
+        summary = analyze_convergence(trace)
     
     # Create plots
     plot_trace(trace)
@@ -296,6 +388,7 @@ def main():
     
     # Save results
     save_results(changepoint_info)
+    store_results(df, changepoint_info, parameters=parameters)
     
     print("\n=== Change Point Analysis Complete ===")
     print("Results are ready for event correlation analysis!")
@@ -0,0 +1,245 @@
+"""
+Block bootstrap confidence intervals for the simple change point detectors.
+Resamples log returns in blocks within each regime, reruns the rolling-mean and
+volatility detectors on all replicates as 2-D array operations and reports a
+date interval and detection rate for every original change point.
+"""
+
+import os
+import sys
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+warnings.filterwarnings('ignore')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'analysis'))
+from detection_kernels import rolling_mean_std
+from instrumentation import instrument
+from garch_regimes import segment_regimes
+
+def block_indices(length, n_replicates, block_length, rng, method='stationary'):
+    """
+    Draw circular block bootstrap indices for a batch of replicates.
+
+    Args:
+        length (int): Number of observations to resample
+        n_replicates (int): Number of replicates (rows)
+        block_length (float): Fixed block length, or mean length for 'stationary'
+        rng (np.random.Generator): Random generator
+        method (str): 'stationary' (geometric block lengths) or 'moving' (fixed)
+
+    Returns:
+        np.ndarray: (n_replicates x length) positions into the original series
+    """
+    steps = np.arange(length)
+    if method == 'stationary':
+        new_block = rng.random((n_replicates, length)) < 1.0 / block_length
+    elif method == 'moving':
+        new_block = np.zeros((n_replicates, length), dtype=bool)
+        new_block[:, ::max(int(block_length), 1)] = True
+    else:
+        raise ValueError(f"Unknown bootstrap method: {method}")
+    new_block[:, 0] = True
+
+    # Each position continues the block that started at the last new-block position
+    block_start = np.maximum.accumulate(np.where(new_block, steps, 0), axis=1)
+    origins = rng.integers(0, length, size=(n_replicates, length))
+    origin = np.take_along_axis(origins, block_start, axis=1)
+    return (origin + steps - block_start) % length
+
+def detect_batch(prices, returns, price_window=252, price_threshold=2.0,
+                 vol_window=60, vol_threshold=1.5):
+    """
+    Run both simple detectors on a batch of replicate series.
+
+    Mirrors detect_change_points_rolling_mean on prices and
+    detect_volatility_changes on returns, one replicate per row.
+
+    Args:
+        prices (np.ndarray): (replicates x n) price paths
+        returns (np.ndarray): (replicates x n) log returns
+        price_window (int): Rolling mean window
+        price_threshold (float): Z-score threshold
+        vol_window (int): Rolling volatility window
+        vol_threshold (float): Relative volatility change threshold
+
+    Returns:
+        np.ndarray: Boolean (replicates x n) change point mask
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean, std = rolling_mean_std(prices, price_window)
+        detected = np.abs((prices - mean) / std) > price_threshold
+
+        _, vol = rolling_mean_std(returns, vol_window)
+        vol_change = np.full(vol.shape, np.nan)
+        vol_change[:, 1:] = vol[:, 1:] / vol[:, :-1] - 1
+        detected |= np.abs(vol_change) > vol_threshold
+    return detected
+
+def nearest_detections(detected, positions, max_distance):
+    """
+    Find the detection closest to each reference position in every replicate.
+
+    Args:
+        detected (np.ndarray): Boolean (replicates x n) detection mask
+        positions (np.ndarray): Reference change point positions
+        max_distance (int): Largest distance counted as the same change point
+
+    Returns:
+        np.ndarray: (replicates x positions) matched positions, -1 if none
+    """
+    n = detected.shape[1]
+    steps = np.arange(n)
+    last = np.maximum.accumulate(np.where(detected, steps, -1), axis=1)
+    following = np.minimum.accumulate(np.where(detected, steps, n)[:, ::-1], axis=1)[:, ::-1]
+
+    before = last[:, positions]
+    after = following[:, positions]
+    before_distance = np.where(before >= 0, positions - before, n)
+    after_distance = np.where(after < n, after - positions, n)
+
+    nearest = np.where(before_distance <= after_distance, before, after)
+    distance = np.minimum(before_distance, after_distance)
+    return np.where(distance <= max_distance, nearest, -1).astype(np.int32)
+
+def _bootstrap_task(task):
+    """Process pool entry point: one chunk of replicates -> matched positions."""
+    (returns, first_price, bounds, positions, n_replicates, seed, block_length,
+     method, max_distance, detector_params) = task
+    rng = np.random.default_rng(seed)
+
+    # Resample within each regime so the detected breaks stay in place
+    resampled = np.empty((n_replicates, len(returns)))
+    for start, stop in bounds:
+        indices = block_indices(stop - start, n_replicates, block_length, rng, method)
+        resampled[:, start:stop] = returns[start:stop][indices]
+
+    # Day 0 keeps the observed price; later prices follow the resampled returns
+    log_path = np.cumsum(resampled, axis=1) - resampled[:, :1]
+    prices = first_price * np.exp(log_path)
+
+    detected = detect_batch(prices, resampled, **detector_params)
+    return nearest_detections(detected, positions, max_distance)
+
+@instrument
+def bootstrap_change_points(df, change_points, n_replicates=1000, block_length=20,
+                            method='stationary', min_regime_length=252, max_distance=63,
+                            confidence=0.95, chunk_size=50, max_workers=None, seed=42,
+                            price_window=252, price_threshold=2.0, vol_window=60,
+                            vol_threshold=1.5):
+    """
+    Bootstrap date intervals for detected change points.
+
+    Log returns are resampled with a block bootstrap inside each regime
+    (regimes shorter than min_regime_length are merged), prices are rebuilt
+    from the first observed price and both detectors are rerun. The replicate
+    detection nearest to each original change point (within max_distance
+    observations) forms its bootstrap distribution.
+
+    Args:
+        df (pd.DataFrame): Processed data with Price and log_returns (sorted by date)
+        change_points (list): Detected change point dates
+        n_replicates (int): Number of bootstrap replicates
+        block_length (float): Block length (mean length for the stationary bootstrap)
+        method (str): 'stationary' or 'moving'
+        min_regime_length (int): Minimum observations per resampling regime
+        max_distance (int): Matching tolerance in observations
+        confidence (float): Confidence level of the intervals
+        chunk_size (int): Replicates processed per task
+        max_workers (int): Worker processes (None = number of cores)
+        seed (int): Random seed
+        price_window (int): Rolling mean window of the price detector
+        price_threshold (float): Z-score threshold of the price detector
+        vol_window (int): Rolling window of the volatility detector
+        vol_threshold (float): Threshold of the volatility detector
+
+    Returns:
+        pd.DataFrame: One row per change point with detection rate and date interval
+    """
+    print(f"Bootstrapping {len(change_points)} change points with {n_replicates} replicates...")
+
+    returns = np.nan_to_num(df['log_returns'].to_numpy(dtype=np.float64))
+    first_price = float(df['Price'].iloc[0])
+    positions = df.index.searchsorted(pd.DatetimeIndex(change_points))
+    positions = np.clip(positions, 0, len(df) - 1)
+    bounds = segment_regimes(df, change_points, min_regime_length)
+    detector_params = {
+        'price_window': price_window,
+        'price_threshold': price_threshold,
+        'vol_window': vol_window,
+        'vol_threshold': vol_threshold
+    }
+
+    chunk_sizes = [min(chunk_size, n_replicates - i) for i in range(0, n_replicates, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    tasks = [(returns, first_price, bounds, positions, size, child, block_length, method,
+              max_distance, detector_params) for size, child in zip(chunk_sizes, seeds)]
+
+    if len(tasks) > 1 and max_workers != 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            matched = np.vstack(list(executor.map(_bootstrap_task, tasks)))
+    else:
+        matched = np.vstack([_bootstrap_task(task) for task in tasks])
+
+    alpha = (1 - confidence) / 2
+    found = matched >= 0
+    detection_rate = found.mean(axis=0)
+    # Percentiles over the replicates that found the change point
+    matched_float = np.where(found, matched, np.nan)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        lower, median, upper = np.nanquantile(matched_float, [alpha, 0.5, 1 - alpha], axis=0)
+
+    def to_dates(values):
+        valid = ~np.isnan(values)
+        dates = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[ns]')
+        dates[valid] = df.index.values[np.round(values[valid]).astype(np.int64)]
+        return dates
+
+    ci_lower, ci_upper = to_dates(lower), to_dates(upper)
+    # Change points no replicate found have no interval (NaT would cast to -9.22e18 days)
+    ci_width_days = np.full(len(change_points), np.nan)
+    bounded = ~np.isnat(ci_lower) & ~np.isnat(ci_upper)
+    ci_width_days[bounded] = (ci_upper[bounded] - ci_lower[bounded]).astype('timedelta64[D]').astype(float)
+
+    results = pd.DataFrame({
+        'change_point': [f'cp_{i+1}' for i in range(len(change_points))],
+        'date': pd.DatetimeIndex(change_points),
+        'detection_rate': detection_rate,
+        'ci_lower': ci_lower,
+        'ci_median': to_dates(median),
+        'ci_upper': ci_upper,
+        'ci_width_days': ci_width_days
+    })
+
+    print(f"Median detection rate: {np.median(detection_rate):.2f}")
+    return results
+
+def save_results(results, file_path='../../reports/change_point_bootstrap.csv'):
+    """Save bootstrap intervals to CSV."""
+    print(f"Saving results to {file_path}...")
+    results.to_csv(file_path, index=False, date_format='%Y-%m-%d')
+    print("Results saved successfully!")
+
+def main():
+    """Main function to bootstrap the simple change point detections."""
+    import simple_change_point_analysis as simple_cp
+
+    print("=== Change Point Bootstrap ===\n")
+
+    df = simple_cp.load_processed_data()
+    change_points = simple_cp.detect_change_point_episodes(df)['peak'].tolist()
+
+    results = bootstrap_change_points(df, change_points)
+    save_results(results)
+
+    print("\n=== Most Stable Change Points ===")
+    for _, row in results.nlargest(10, 'detection_rate').iterrows():
+        print(f"{row['change_point']} ({row['date']:%Y-%m-%d}): detected in "
+              f"{row['detection_rate']:.0%} of replicates, "
+              f"interval {row['ci_lower']:%Y-%m-%d} to {row['ci_upper']:%Y-%m-%d}")
+
+if __name__ == "__main__":
+    main()
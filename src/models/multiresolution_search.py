@@ -0,0 +1,285 @@
+"""
+Coarse-to-fine change point search for Brent oil prices.
+Runs the simple detectors on weekly (or any coarser) bars first, then evaluates
+the daily detectors only at the days inside short windows around the flagged
+bars, taking their rolling sums from per-bar prefix sums.
+"""
+
+import os
+import sys
+import warnings
+
+import numpy as np
+warnings.filterwarnings('ignore')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'analysis'))
+from instrumentation import instrument
+from resolution_pyramid import aggregate_level
+from change_point_bootstrap import detect_batch
+
+def merge_intervals(starts, stops):
+    """
+    Merge overlapping or touching [start, stop) intervals.
+
+    Args:
+        starts (np.ndarray): Interval starts
+        stops (np.ndarray): Interval stops
+
+    Returns:
+        tuple: (merged starts, merged stops) sorted by start
+    """
+    if len(starts) == 0:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    order = np.argsort(starts, kind='stable')
+    starts, stops = np.asarray(starts)[order], np.asarray(stops)[order]
+    reach = np.maximum.accumulate(stops)
+    # A new interval begins where the start lies beyond everything merged so far
+    new = np.concatenate([[True], starts[1:] > reach[:-1]])
+    group = np.cumsum(new) - 1
+    merged_stops = np.zeros(group[-1] + 1, dtype=np.int64)
+    np.maximum.at(merged_stops, group, stops)
+    return starts[new].astype(np.int64), merged_stops
+
+def coarse_candidates(bars, bar_window_price, bar_window_vol, price_threshold, vol_threshold):
+    """
+    Flag candidate bars with the detectors scaled to the coarse resolution.
+
+    Args:
+        bars (pd.DataFrame): Aggregated bars with close and log_return
+        bar_window_price (int): Rolling mean window in bars
+        bar_window_vol (int): Rolling volatility window in bars
+        price_threshold (float): Z-score threshold at the coarse level
+        vol_threshold (float): Relative volatility change threshold at the coarse level
+
+    Returns:
+        np.ndarray: Positions of the flagged bars
+    """
+    closes = bars['close'].to_numpy(dtype=np.float64)[None]
+    returns = np.nan_to_num(bars['log_return'].to_numpy(dtype=np.float64))[None]
+    flagged = detect_batch(closes, returns, price_window=bar_window_price, price_threshold=price_threshold,
+                           vol_window=bar_window_vol, vol_threshold=vol_threshold)[0]
+    return np.flatnonzero(flagged)
+
+def bar_prefix_sums(values, bar_starts):
+    """
+    Prefix sums of per-bar totals.
+
+    Args:
+        values (np.ndarray): (columns x n) daily values
+        bar_starts (np.ndarray): First daily position of every bar, followed by n
+
+    Returns:
+        np.ndarray: (columns x bars + 1) sums of values before each bar start
+    """
+    prefix = np.zeros((values.shape[0], len(bar_starts)))
+    if len(bar_starts) > 1:
+        np.cumsum(np.add.reduceat(values, bar_starts[:-1], axis=1), axis=1, out=prefix[:, 1:])
+    return prefix
+
+def prefix_at(positions, bar_starts, bar_prefix, read):
+    """
+    Prefix sums at arbitrary daily positions from bar prefix sums.
+
+    Each prefix is the sum of the whole bars before the position plus the
+    part of its own bar that precedes it, so only the bars that contain one
+    of the positions are read.
+
+    Args:
+        positions (np.ndarray): Daily positions k (0..n); the result sums values[:k]
+        bar_starts (np.ndarray): First daily position of every bar, followed by n
+        bar_prefix (np.ndarray): Output of bar_prefix_sums
+        read (callable): Maps daily positions to their (columns x len) values
+
+    Returns:
+        np.ndarray: (columns x len(positions)) prefix sums
+    """
+    n_bars = len(bar_starts) - 1
+    bar = np.searchsorted(bar_starts, positions, side='right') - 1
+    sums = bar_prefix[:, bar].copy()
+
+    # Read every touched bar once and take running sums inside it
+    partial = bar < n_bars
+    touched = np.unique(bar[partial])
+    if len(touched):
+        lengths = bar_starts[touched + 1] - bar_starts[touched]
+        first = np.concatenate([[0], np.cumsum(lengths)])
+        days = np.repeat(bar_starts[touched] - first[:-1], lengths) + np.arange(first[-1])
+        running = np.zeros((sums.shape[0], first[-1] + 1))
+        np.cumsum(read(days), axis=1, out=running[:, 1:])
+
+        slot = np.searchsorted(touched, bar[partial])
+        offset = positions[partial] - bar_starts[bar[partial]]
+        sums[:, partial] += running[:, first[slot] + offset] - running[:, first[slot]]
+    return sums
+
+def detect_at(positions, prices, returns, bar_starts, price_window=252, price_threshold=2.0,
+              vol_window=60, vol_threshold=1.5):
+    """
+    Evaluate the daily detectors only at the given positions.
+
+    Gives the same flags as detect_batch on the whole series (up to rounding
+    in the rolling sums). Apart from one pass summing every bar, it reads only
+    the bars that contain a position or the start of one of its windows.
+
+    Args:
+        positions (np.ndarray): Sorted daily positions to evaluate
+        prices (np.ndarray): Daily prices
+        returns (np.ndarray): Daily log returns (NaN replaced by 0)
+        bar_starts (np.ndarray): First daily position of every bar, followed by n
+        price_window (int): Rolling mean window
+        price_threshold (float): Z-score threshold
+        vol_window (int): Rolling volatility window
+        vol_threshold (float): Relative volatility change threshold
+
+    Returns:
+        np.ndarray: Boolean flags, one per position
+    """
+    # Centering on the first price keeps the squared sums small
+    center = prices[0] if len(prices) else 0.0
+
+    def read(days):
+        price, ret = prices[days] - center, returns[days]
+        return np.vstack([price, price * price, ret, ret * ret])
+
+    bar_prefix = bar_prefix_sums(read(np.arange(len(prices))), bar_starts)
+
+    # Window ends t + 1 (and t for the previous volatility), window starts a window earlier
+    ends = positions + 1
+    needed = np.concatenate([ends, ends - price_window, ends - vol_window,
+                             positions, positions - vol_window])
+    keys, inverse = np.unique(np.clip(needed, 0, len(prices)), return_inverse=True)
+    sums = prefix_at(keys, bar_starts, bar_prefix, read)[:, inverse].reshape(4, 5, len(positions))
+
+    def moments(total, total_sq, window):
+        variance = (total_sq - total * total / window) / (window - 1)
+        return total / window, np.sqrt(np.maximum(variance, 0.0))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        price_sum = sums[0, 0] - sums[0, 1]
+        price_sq = sums[1, 0] - sums[1, 1]
+        mean, std = moments(price_sum, price_sq, price_window)
+        z_score = np.abs((prices[positions] - center - mean) / std)
+        detected = (z_score > price_threshold) & (positions >= price_window - 1)
+
+        _, vol = moments(sums[2, 0] - sums[2, 2], sums[3, 0] - sums[3, 2], vol_window)
+        _, previous = moments(sums[2, 3] - sums[2, 4], sums[3, 3] - sums[3, 4], vol_window)
+        vol_change = np.abs(vol / previous - 1)
+        detected |= (vol_change > vol_threshold) & (positions >= vol_window)
+    return detected
+
+@instrument
+def hierarchical_change_points(df, bars=None, rule='W-FRI', price_window=252, price_threshold=2.0,
+                               vol_window=60, vol_threshold=1.5, coarse_threshold_scale=0.75,
+                               margin_bars=1, max_fine_fraction=0.5):
+    """
+    Detect change points coarse-to-fine.
+
+    Candidate bars come from the detectors run on aggregated bars with
+    windows scaled by the bar size and thresholds relaxed by
+    coarse_threshold_scale. Every day inside a candidate bar, widened by
+    margin_bars on both sides, is then checked with the daily detectors,
+    whose rolling sums are derived from per-bar prefix sums plus the bars at
+    the window edges, so the work grows with the number of candidates and
+    not with the rolling windows' lookback.
+
+    Args:
+        df (pd.DataFrame): Processed data with Price and log_returns (sorted by date)
+        bars (pd.DataFrame): Precomputed bars (e.g. a persisted pyramid level); built from df if None
+        rule (str): Resample rule of the coarse level when bars is None
+        price_window (int): Rolling mean window of the price detector (observations)
+        price_threshold (float): Z-score threshold of the price detector
+        vol_window (int): Rolling window of the volatility detector (observations)
+        vol_threshold (float): Threshold of the volatility detector
+        coarse_threshold_scale (float): Threshold multiplier at the coarse level (< 1 favours recall)
+        margin_bars (int): Bars added on each side of a candidate before refining
+        max_fine_fraction (float): Largest share of daily points refined before falling back
+            to the full daily detection
+
+    Returns:
+        tuple: (list of change point dates, dict of search statistics)
+    """
+    print("Detecting change points coarse-to-fine...")
+
+    if bars is None:
+        bars = aggregate_level(df, rule)
+    n = len(df)
+    observations_per_bar = max(float(np.median(bars['observations'])), 1.0)
+    bar_window_price = max(int(round(price_window / observations_per_bar)), 3)
+    bar_window_vol = max(int(round(vol_window / observations_per_bar)), 3)
+
+    candidates = coarse_candidates(bars, bar_window_price, bar_window_vol,
+                                   price_threshold * coarse_threshold_scale,
+                                   vol_threshold * coarse_threshold_scale)
+
+    # Daily bounds of every bar, then of every widened candidate window
+    bar_starts = np.append(df.index.searchsorted(bars.index), n)
+    lo = np.clip(candidates - margin_bars, 0, len(bars))
+    hi = np.clip(candidates + 1 + margin_bars, 0, len(bars))
+    starts, stops = merge_intervals(bar_starts[lo], bar_starts[hi])
+
+    prices = df['Price'].to_numpy(dtype=np.float64)
+    returns = np.nan_to_num(df['log_returns'].to_numpy(dtype=np.float64))
+    fine_points = int((stops - starts).sum())
+    detector_params = {
+        'price_window': price_window,
+        'price_threshold': price_threshold,
+        'vol_window': vol_window,
+        'vol_threshold': vol_threshold
+    }
+
+    if n and fine_points > max_fine_fraction * n:
+        # Pruning would not pay off: one full pass is cheaper than checking most days
+        mode = 'full'
+        flagged = detect_batch(prices[None], returns[None], **detector_params)[0]
+        positions = np.flatnonzero(flagged)
+        fine_points = n
+    else:
+        mode = 'refined'
+        lengths = stops - starts
+        refine = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(fine_points)
+        positions = refine[detect_at(refine, prices, returns, bar_starts, **detector_params)]
+    change_points = df.index[positions].tolist()
+
+    stats = {
+        'coarse_bars': len(bars),
+        'candidate_bars': len(candidates),
+        'refined_windows': len(starts),
+        'fine_points': int(fine_points),
+        'fine_fraction': fine_points / n if n else 0.0,
+        'mode': mode
+    }
+    if mode == 'full':
+        print(f"Candidate windows cover more than {max_fine_fraction:.0%} of the series; "
+              f"ran the full daily detection")
+    print(f"Detected {len(change_points)} change points from {len(candidates)} candidate bars "
+          f"({stats['fine_fraction']:.1%} of daily points refined)")
+    return change_points, stats
+
+def main():
+    """Compare the coarse-to-fine search with the full daily detection."""
+    import time
+    import simple_change_point_analysis as simple_cp
+
+    print("=== Coarse-to-Fine Change Point Search ===\n")
+
+    df = simple_cp.load_processed_data()
+
+    start = time.perf_counter()
+    full = simple_cp.detect_change_point_episodes(df)
+    full_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    hierarchical, stats = hierarchical_change_points(df)
+    hierarchical_seconds = time.perf_counter() - start
+
+    # Both searches report episode peaks; the coarse-to-fine flags mix both detectors
+    scores = simple_cp.change_point_scores(df)
+    coarse_to_fine = simple_cp.build_change_point_episodes(df, hierarchical, [], scores=scores)
+    found = set(full['peak']) & set(coarse_to_fine['peak'])
+    print(f"\nFull daily detection: {len(full)} change point episodes in {full_seconds:.3f}s")
+    print(f"Coarse-to-fine: {len(coarse_to_fine)} change point episodes in {hierarchical_seconds:.3f}s")
+    print(f"Recall vs full detection: {len(found) / max(len(full), 1):.1%}")
+    print(f"Daily points refined: {stats['fine_points']} of {len(df)} ({stats['mode']} pass)")
+
+if __name__ == "__main__":
+    main()
@@ -5,20 +5,31 @@ Uses statistical methods to identify structural breaks without PyMC3.
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime
+import os
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'analysis'))
+from compact_dataset import CompactDataset
+from detection_kernels import before_after_stats, rolling_moments
+from instrumentation import instrument
+from regime_significance import permutation_p_values
+from results_store import ResultsStore
+from volatility_engine import get_rolling_volatility
+
+@instrument
 def load_processed_data(file_path='../../data/processed_brent_data.csv'):
     """Load processed Brent oil price data."""
     print("Loading processed data...")
-    df = pd.read_csv(file_path, index_col=0, parse_dates=True)
+    # Parse through the compact container so dates and flags come back typed
+    df = CompactDataset.read_csv(file_path).to_frame()
     print(f"Loaded {len(df)} observations")
     return df
 
-def detect_change_points_rolling_mean(data, window=252, threshold=2.0):
+@instrument
+def detect_change_points_rolling_mean(data, window=252, threshold=2.0, backend=None):
     """
     Detect change points using rolling mean comparison.
     
@@ -26,12 +37,23 @@ def detect_change_points_rolling_mean(data, window=252, threshold=2.0):
         data (pd.Series): Time series data
         window (int): Rolling window size (252 = 1 year)
         threshold (float): Standard deviation threshold for change detection
+        backend (str): None for pandas, or a detection kernel backend ('auto', 'numba', 'numpy')
         
     Returns:
-        list: Indices of detected change points
+        list: Indices of detected change points (an Index with a kernel backend, which
+            skips boxing every flagged date)
     """
     print("Detecting change points using rolling mean analysis...")
     
+    if backend is not None:
+        values = data.to_numpy(dtype=np.float64)
+        rolling_mean, rolling_std = rolling_moments(values, window, backend)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            flags = np.abs((values - rolling_mean) / rolling_std) > threshold
+        change_point_indices = data.index[flags]
+        print(f"Detected {len(change_point_indices)} potential change points")
+        return change_point_indices
+    
     # Calculate rolling mean and standard deviation
     rolling_mean = data.rolling(window=window).mean()
     rolling_std = data.rolling(window=window).std()
@@ -48,7 +70,8 @@ def detect_change_points_rolling_mean(data, window=252, threshold=2.0):
     print(f"Detected {len(change_point_indices)} potential change points")
     return change_point_indices
 
-def detect_volatility_changes(data, window=60, threshold=1.5):
+@instrument
+def detect_volatility_changes(data, window=60, threshold=1.5, rolling_vol=None, backend=None):
     """
     Detect changes in volatility using rolling standard deviation.
     
@@ -56,14 +79,29 @@ def detect_volatility_changes(data, window=60, threshold=1.5):
         data (pd.Series): Time series data (log returns)
         window (int): Rolling window size
         threshold (float): Threshold for volatility change detection
+        rolling_vol (pd.Series): Precomputed rolling volatility for the window
+        backend (str): None for pandas, or a detection kernel backend ('auto', 'numba', 'numpy')
         
     Returns:
-        list: Indices of volatility change points
+        list: Indices of volatility change points (an Index with a kernel backend)
     """
     print("Detecting volatility change points...")
     
-    # Calculate rolling volatility
-    rolling_vol = data.rolling(window=window).std()
+    if backend is not None:
+        if rolling_vol is None:
+            _, vol = rolling_moments(np.nan_to_num(data.to_numpy(dtype=np.float64)), window, backend)
+        else:
+            vol = rolling_vol.to_numpy(dtype=np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            flags = np.zeros(len(vol), dtype=bool)
+            flags[1:] = np.abs(vol[1:] / vol[:-1] - 1) > threshold
+        vol_change_indices = data.index[flags]
+        print(f"Detected {len(vol_change_indices)} volatility change points")
+        return vol_change_indices
+    
+    # Calculate rolling volatility unless the volatility engine already did
+    if rolling_vol is None:
+        rolling_vol = data.rolling(window=window).std()
     
     # Calculate volatility changes
     vol_changes = rolling_vol.pct_change()
@@ -77,13 +115,165 @@ def detect_volatility_changes(data, window=60, threshold=1.5):
     print(f"Detected {len(vol_change_indices)} volatility change points")
     return vol_change_indices
 
-def analyze_regime_changes(df, change_points):
+def change_point_scores(df, price_window=252, price_threshold=2.0, vol_window=60, vol_threshold=1.5,
+                        rolling_vol=None, backend='numpy'):
+    """
+    Detection strength of both detectors on every day.
+    
+    Scores are the detector statistics as multiples of their thresholds, so
+    a day is flagged by a detector exactly when its score exceeds 1.
+    
+    Args:
+        df (pd.DataFrame): Processed data with Price and log_returns
+        price_window (int): Rolling mean window of the price detector
+        price_threshold (float): Z-score threshold of the price detector
+        vol_window (int): Rolling window of the volatility detector
+        vol_threshold (float): Threshold of the volatility detector
+        rolling_vol (pd.Series): Precomputed rolling volatility for vol_window
+        backend (str): Detection kernel backend ('auto', 'numba', 'numpy')
+        
+    Returns:
+        tuple: (price scores, volatility scores) arrays, NaN before the windows fill
+    """
+    prices = df['Price'].to_numpy(dtype=np.float64)
+    rolling_mean, rolling_std = rolling_moments(prices, price_window, backend)
+    if rolling_vol is None:
+        rolling_vol = get_rolling_volatility(df, vol_window)
+    vol = rolling_vol.to_numpy(dtype=np.float64)
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        price_scores = np.abs((prices - rolling_mean) / rolling_std) / price_threshold
+        vol_scores = np.full(len(vol), np.nan)
+        vol_scores[1:] = np.abs(vol[1:] / vol[:-1] - 1) / vol_threshold
+    return price_scores, vol_scores
+
+def _row_positions(df, points):
+    """Row positions of change points given as dates or as integer positions."""
+    values = np.asarray(points)
+    if values.dtype.kind in 'iu':
+        return values.astype(np.int64, copy=False)
+    return df.index.searchsorted(pd.DatetimeIndex(points))
+
+@instrument
+def build_change_point_episodes(df, price_change_points, vol_change_points, max_gap=5, scores=None):
+    """
+    Collapse runs of flagged days from both detectors into change point episodes.
+    
+    The two sorted detector outputs are merged with one stable sort (a merge
+    of two sorted runs) instead of set operations; flagged days separated by
+    at most max_gap unflagged observations then form one episode. Each
+    episode is represented downstream by its peak, the day with the highest
+    detection score.
+    
+    Args:
+        df (pd.DataFrame): Processed data (sorted by date)
+        price_change_points (list): Sorted dates (or integer row positions) flagged by the price detector
+        vol_change_points (list): Sorted dates (or integer row positions) flagged by the volatility detector
+        max_gap (int): Unflagged observations allowed inside one episode
+        scores (tuple): (price scores, volatility scores) from change_point_scores;
+            without scores the middle flagged day is the peak
+        
+    Returns:
+        pd.DataFrame: One row per episode with start, peak, end, n_flags,
+            max_score and detectors ('price', 'volatility' or 'both')
+    """
+    print("Building change point episodes...")
+    
+    price_positions = _row_positions(df, price_change_points)
+    vol_positions = _row_positions(df, vol_change_points)
+    
+    # Sort-merge of the two sorted position lists, keeping which detector flagged each day
+    merged = np.concatenate([price_positions, vol_positions])
+    sources = np.repeat(np.array([1, 2], dtype=np.int8), [len(price_positions), len(vol_positions)])
+    order = np.argsort(merged, kind='stable')
+    merged, sources = merged[order], sources[order]
+    first = np.ones(len(merged), dtype=bool)
+    first[1:] = merged[1:] != merged[:-1]
+    positions = merged[first]
+    if len(positions) == 0:
+        print("Built 0 episodes from 0 flagged days")
+        return pd.DataFrame(columns=['episode', 'start', 'peak', 'end', 'n_flags', 'max_score', 'detectors'])
+    detectors = np.bitwise_or.reduceat(sources, np.flatnonzero(first))
+    
+    # Run-length encoding: a new episode starts after a gap of more than max_gap observations
+    new_episode = np.ones(len(positions), dtype=bool)
+    new_episode[1:] = np.diff(positions) > max_gap + 1
+    episode_starts = np.flatnonzero(new_episode)
+    episode_ids = np.cumsum(new_episode) - 1
+    n_flags = np.diff(np.append(episode_starts, len(positions)))
+    
+    if scores is not None:
+        price_scores, vol_scores = scores
+        day_scores = np.nan_to_num(np.fmax(price_scores[positions], vol_scores[positions]))
+        max_scores = np.maximum.reduceat(day_scores, episode_starts)
+        # First day of each episode reaching the episode maximum
+        at_max = np.flatnonzero(day_scores == max_scores[episode_ids])
+        peaks = at_max[np.unique(episode_ids[at_max], return_index=True)[1]]
+    else:
+        max_scores = np.full(len(episode_starts), np.nan)
+        peaks = episode_starts + (n_flags - 1) // 2
+    
+    dates = df.index
+    labels = np.array(['', 'price', 'volatility', 'both'])
+    episodes = pd.DataFrame({
+        'episode': [f'ep_{i+1}' for i in range(len(episode_starts))],
+        'start': dates[positions[episode_starts]],
+        'peak': dates[positions[peaks]],
+        'end': dates[positions[episode_starts + n_flags - 1]],
+        'n_flags': n_flags,
+        'max_score': max_scores,
+        'detectors': labels[np.bitwise_or.reduceat(detectors, episode_starts)]
+    })
+    
+    print(f"Built {len(episodes)} episodes from {len(positions)} flagged days")
+    return episodes
+
+def detect_change_point_episodes(df, price_window=252, price_threshold=2.0, vol_window=60,
+                                 vol_threshold=1.5, max_gap=5):
+    """
+    Run both detectors and collapse their flagged days into scored episodes.
+    
+    Args:
+        df (pd.DataFrame): Processed data with Price and log_returns (sorted by date)
+        price_window (int): Rolling mean window of the price detector
+        price_threshold (float): Z-score threshold of the price detector
+        vol_window (int): Rolling window of the volatility detector
+        vol_threshold (float): Threshold of the volatility detector
+        max_gap (int): Unflagged observations allowed inside one episode
+        
+    Returns:
+        pd.DataFrame: Episodes from build_change_point_episodes; callers use the
+            peak column as the change point dates
+    """
+    rolling_vol = get_rolling_volatility(df, vol_window)
+    price_change_points = detect_change_points_rolling_mean(df['Price'], window=price_window,
+                                                            threshold=price_threshold)
+    vol_change_points = detect_volatility_changes(df['log_returns'], window=vol_window,
+                                                  threshold=vol_threshold, rolling_vol=rolling_vol)
+    scores = change_point_scores(df, price_window=price_window, price_threshold=price_threshold,
+                                 vol_window=vol_window, vol_threshold=vol_threshold,
+                                 rolling_vol=rolling_vol)
+    return build_change_point_episodes(df, price_change_points, vol_change_points, max_gap=max_gap,
+                                       scores=scores)
+
+@instrument
+def analyze_regime_changes(df, change_points, window=252, n_permutations=0, seed=42, backend=None):
     """
     Analyze regime changes at detected change points.
     
+    Volatilities come from the precomputed rolling column for the window when
+    the full window is available, instead of re-slicing the returns. With
+    n_permutations > 0, price and volatility shifts also get permutation
+    p-values from shuffling the returns around each change point.
+    
     Args:
-        df (pd.DataFrame): Data with prices and returns
+        df (pd.DataFrame): Data with prices and returns (sorted by date)
         change_points (list): List of change point dates
+        window (int): Observations before and after each change point (252 = 1 year)
+        n_permutations (int): Shuffles per change point (0 skips the significance test)
+        seed (int): Random seed for the permutations
+        backend (str): None for the pandas path, or a detection kernel backend
+            ('auto', 'numba', 'numpy') computing all before/after statistics at once
         
     Returns:
         dict: Analysis results
@@ -91,18 +281,57 @@ def analyze_regime_changes(df, change_points):
     print("Analyzing regime changes...")
     
     results = {}
+    n = len(df)
+    starts = df.index.searchsorted(change_points, side='left')
+    ends = df.index.searchsorted(change_points, side='right')
+    
+    if n_permutations > 0:
+        print(f"Testing significance with {n_permutations} permutations...")
+        price_p, vol_p = permutation_p_values(df['log_returns'].to_numpy(), np.maximum(starts - window, 0),
+                                              starts, ends, np.minimum(ends + window, n),
+                                              n_permutations=n_permutations, seed=seed)
+    else:
+        price_p = vol_p = np.full(len(change_points), np.nan)
+    
+    if backend is not None:
+        # All before/after windows in one kernel call
+        stats = before_after_stats(df['Price'].to_numpy(), df['log_returns'].to_numpy(),
+                                   starts, ends, window, backend)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            price_changes = (stats['after_mean'] - stats['before_mean']) / stats['before_mean'] * 100
+            vol_changes = (stats['after_vol'] - stats['before_vol']) / stats['before_vol'] * 100
+        for i in np.flatnonzero((starts > 0) & (ends < n)):
+            results[f'cp_{i+1}'] = {
+                'date': change_points[i],
+                'before_mean': stats['before_mean'][i],
+                'after_mean': stats['after_mean'][i],
+                'before_vol': stats['before_vol'][i],
+                'after_vol': stats['after_vol'][i],
+                'price_change_pct': price_changes[i],
+                'vol_change_pct': vol_changes[i],
+                'price_p_value': price_p[i],
+                'vol_p_value': vol_p[i]
+            }
+        return results
     
+    rolling_vol = get_rolling_volatility(df, window).to_numpy()
     for i, cp_date in enumerate(change_points):
         # Define periods before and after change point
-        before_period = df[df.index < cp_date].tail(252)  # 1 year before
-        after_period = df[df.index > cp_date].head(252)   # 1 year after
+        before_period = df.iloc[max(starts[i] - window, 0):starts[i]]  # 1 year before
+        after_period = df.iloc[ends[i]:ends[i] + window]               # 1 year after
         
         if len(before_period) > 0 and len(after_period) > 0:
             # Calculate statistics
             before_mean = before_period['Price'].mean()
             after_mean = after_period['Price'].mean()
-            before_vol = before_period['log_returns'].std()
-            after_vol = after_period['log_returns'].std()
+            if starts[i] >= window:
+                before_vol = rolling_vol[starts[i] - 1]
+            else:
+                before_vol = before_period['log_returns'].std()
+            if ends[i] + window <= n:
+                after_vol = rolling_vol[ends[i] + window - 1]
+            else:
+                after_vol = after_period['log_returns'].std()
             
             # Calculate changes
             price_change = ((after_mean - before_mean) / before_mean) * 100
@@ -115,49 +344,36 @@ def analyze_regime_changes(df, change_points):
                 'before_vol': before_vol,
                 'after_vol': after_vol,
                 'price_change_pct': price_change,
-                'vol_change_pct': vol_change
+                'vol_change_pct': vol_change,
+                'price_p_value': price_p[i],
+                'vol_p_value': vol_p[i]
             }
     
     return results
 
-def plot_change_points(df, change_points, save_path='../../reports/change_points_analysis.png'):
-    """Plot change points on price series."""
+@instrument
+def plot_change_points(df, change_points, save_path='../../reports/change_points_analysis.png', priorities=None):
+    """
+    Plot change points on price series.
+    
+    The price and returns panels come from a cached base layer; only the
+    markers (one scatter collection) and the non-overlapping labels are
+    redrawn when the change points change.
+    
+    Args:
+        df (pd.DataFrame): Data with prices and returns
+        change_points (list): Change point dates
+        save_path (str): Path to save the plot
+        priorities (array-like): Label priority per change point (e.g. episode max scores)
+    """
     print("Creating change point visualization...")
+    from change_point_charts import plot_change_points as render_chart
     
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(15, 10))
-    
-    # Price plot with change points
-    ax1.plot(df.index, df['Price'], linewidth=0.5, alpha=0.8, label='Brent Oil Price')
-    
-    # Mark change points
-    for cp_date in change_points:
-        if cp_date in df.index:
-            price_at_cp = df.loc[cp_date, 'Price']
-            ax1.scatter(cp_date, price_at_cp, color='red', s=50, zorder=5)
-            ax1.annotate(f'CP: {cp_date.strftime("%Y-%m")}', 
-                        xy=(cp_date, price_at_cp), 
-                        xytext=(10, 10), textcoords='offset points',
-                        fontsize=8, bbox=dict(boxstyle='round,pad=0.3', facecolor='yellow', alpha=0.7))
-    
-    ax1.set_title('Brent Oil Prices with Detected Change Points', fontsize=14, fontweight='bold')
-    ax1.set_ylabel('Price (USD/barrel)')
-    ax1.grid(True, alpha=0.3)
-    ax1.legend()
-    
-    # Log returns plot
-    ax2.plot(df.index, df['log_returns'], linewidth=0.5, alpha=0.8, color='orange', label='Log Returns')
-    ax2.set_title('Log Returns', fontsize=14, fontweight='bold')
-    ax2.set_ylabel('Log Returns')
-    ax2.set_xlabel('Date')
-    ax2.grid(True, alpha=0.3)
-    ax2.legend()
-    
-    plt.tight_layout()
-    plt.savefig(save_path, dpi=300, bbox_inches='tight')
-    plt.show()
-    
-    print(f"Change point plot saved to {save_path}")
+    n_labels = render_chart(df, change_points, save_path, priorities=priorities)
+    
+    print(f"Change point plot saved to {save_path} ({len(change_points)} change points, {n_labels} labelled)")
 
+@instrument
 def correlate_with_events(change_points, events_file='../../data/major_events.csv', days_threshold=30):
     """
     Correlate detected change points with major events.
@@ -205,6 +421,7 @@ def correlate_with_events(change_points, events_file='../../data/major_events.cs
     
     return correlations
 
+@instrument
 def save_results(change_points, regime_analysis, event_correlations, file_path='../../reports/change_point_results.csv'):
     """Save analysis results to CSV."""
     print(f"Saving results to {file_path}...")
@@ -222,6 +439,8 @@ def save_results(change_points, regime_analysis, event_correlations, file_path='
                     'after_mean_price': round(cp_data['after_mean'], 2),
                     'price_change_pct': round(cp_data['price_change_pct'], 2),
                     'vol_change_pct': round(cp_data['vol_change_pct'], 2),
+                    'price_p_value': round(cp_data['price_p_value'], 4),
+                    'vol_p_value': round(cp_data['vol_p_value'], 4),
                     'correlated_event': best_event['event'],
                     'event_date': best_event['event_date'].strftime('%Y-%m-%d'),
                     'days_diff': best_event['days_diff'],
@@ -233,6 +452,57 @@ def save_results(change_points, regime_analysis, event_correlations, file_path='
     results_df.to_csv(file_path, index=False)
     print("Results saved successfully!")
 
+def save_episodes(episodes, file_path='../../reports/change_point_episodes.csv'):
+    """Save change point episodes to CSV."""
+    print(f"Saving episodes to {file_path}...")
+    episodes.to_csv(file_path, index=False, date_format='%Y-%m-%d')
+    print("Episodes saved successfully!")
+
+@instrument
+def store_results(df, change_points, regime_analysis, event_correlations, parameters=None,
+                  events_file='../../data/major_events.csv', db_path='../../reports/brent_results.db'):
+    """
+    Record the run in the SQLite results store.
+    
+    Args:
+        df (pd.DataFrame): Processed data
+        change_points (list): Detected change point dates
+        regime_analysis (dict): Output of analyze_regime_changes
+        event_correlations (dict): Output of correlate_with_events
+        parameters (dict): Detection parameters of the run
+        events_file (str): Path to events CSV file
+        db_path (str): Path to the SQLite database
+        
+    Returns:
+        int: Run ID
+    """
+    print(f"Storing results in {db_path}...")
+    
+    records = []
+    for i, cp_date in enumerate(change_points):
+        name = f'cp_{i+1}'
+        record = {'change_point': name, 'date': cp_date}
+        if name in event_correlations:
+            best_event = event_correlations[name]['correlated_events'][0]
+            record.update({
+                'correlated_event': best_event['event'],
+                'event_date': best_event['event_date'],
+                'days_diff': best_event['days_diff'],
+                'event_category': best_event['category']
+            })
+        records.append(record)
+    
+    with ResultsStore(db_path) as store:
+        store.write_prices(df)
+        store.write_events(pd.read_csv(events_file))
+        run_id = store.start_run('rolling_mean', parameters)
+        store.write_change_points(run_id, records)
+        store.write_regime_stats(run_id, regime_analysis)
+        store.finish_run(run_id, len(change_points))
+    
+    print(f"Stored run {run_id}")
+    return run_id
+
 def main():
     """Main function to run the simplified change point analysis."""
     print("=== Simplified Change Point Analysis ===\n")
@@ -240,33 +510,35 @@ def main():
     # Load data
     df = load_processed_data()
     
-    # Detect change points using price data
-    price_change_points = detect_change_points_rolling_mean(df['Price'], window=252, threshold=2.0)
-    
-    # Detect volatility change points
-    vol_change_points = detect_volatility_changes(df['log_returns'], window=60, threshold=1.5)
-    
-    # Combine change points (remove duplicates)
-    all_change_points = list(set(price_change_points + vol_change_points))
-    all_change_points.sort()
+    # Detect change points with both detectors and collapse runs of flagged days into
+    # episodes; downstream steps use each episode's peak
+    episodes = detect_change_point_episodes(df, price_window=252, price_threshold=2.0, vol_window=60,
+                                            vol_threshold=1.5, max_gap=5)
+    all_change_points = episodes['peak'].tolist()
     
-    print(f"\nTotal unique change points detected: {len(all_change_points)}")
+    print(f"\nTotal change point episodes: {len(all_change_points)}")
     
     # Analyze regime changes
-    regime_analysis = analyze_regime_changes(df, all_change_points)
+    regime_analysis = analyze_regime_changes(df, all_change_points, n_permutations=1000)
     
     # Correlate with events
     event_correlations = correlate_with_events(all_change_points)
     
     # Create visualizations
-    plot_change_points(df, all_change_points)
+    plot_change_points(df, all_change_points, priorities=episodes['max_score'].to_numpy())
     
     # Save results
     save_results(all_change_points, regime_analysis, event_correlations)
+    save_episodes(episodes)
+    store_results(df, all_change_points, regime_analysis, event_correlations, parameters={
+        'price_window': 252, 'price_threshold': 2.0, 'vol_window': 60, 'vol_threshold': 1.5,
+        'episode_max_gap': 5, 'regime_window': 252, 'days_threshold': 30
+    })
     
     # Print summary
     print("\n=== Analysis Summary ===")
-    print(f"Total change points detected: {len(all_change_points)}")
+    print(f"Change point episodes detected: {len(all_change_points)} "
+          f"(from {int(episodes['n_flags'].sum())} flagged days)")
     print(f"Change points with event correlations: {len(event_correlations)}")
     
     for cp_name, cp_data in regime_analysis.items():
@@ -275,8 +547,8 @@ def main():
             if events:
                 best_event = events[0]
                 print(f"\n{cp_name} ({cp_data['date'].strftime('%Y-%m-%d')}):")
-                print(f"  Price change: {cp_data['price_change_pct']:.2f}%")
-                print(f"  Volatility change: {cp_data['vol_change_pct']:.2f}%")
+                print(f"  Price change: {cp_data['price_change_pct']:.2f}% (p = {cp_data['price_p_value']:.3f})")
+                print(f"  Volatility change: {cp_data['vol_change_pct']:.2f}% (p = {cp_data['vol_p_value']:.3f})")
                 print(f"  Correlated event: {best_event['event']} ({best_event['days_diff']} days)")
                 print(f"  Event category: {best_event['category']} (Impact: {best_event['impact_score']}/9)")
     
@@ -0,0 +1,8 @@
+"""Put the script directories on sys.path, as the scripts do for each other."""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for directory in ('src/analysis', 'src/models', 'src/dashboard/backend'):
+    sys.path.insert(0, os.path.join(ROOT, directory))
@@ -0,0 +1,49 @@
+"""Tests that the as-of replay equals rerunning the detectors on truncated data."""
+
+import os
+
+import numpy as np
+import pytest
+
+from conftest import ROOT
+import asof_backtest
+import simple_change_point_analysis as simple_cp
+from detection_kernels import threshold_flags
+
+AS_OF_DATES = ['1990-08-31', '2008-10-15', '2014-12-31', '2020-04-21']
+
+@pytest.fixture(scope='module')
+def df():
+    return simple_cp.load_processed_data(os.path.join(ROOT, 'data', 'processed_brent_data.csv'))
+
+@pytest.mark.parametrize('as_of', AS_OF_DATES)
+def test_visible_change_points_equal_truncated_rerun(df, as_of):
+    detections = asof_backtest.replay_detections(df, backend='numpy')
+
+    truncated = df.loc[:as_of]
+    expected = sorted(set(simple_cp.detect_change_points_rolling_mean(truncated['Price']) +
+                          simple_cp.detect_volatility_changes(truncated['log_returns'])))
+
+    assert asof_backtest.visible_change_points(detections, as_of) == expected
+
+@pytest.mark.parametrize('as_of', AS_OF_DATES)
+def test_confirmation_rule_equals_truncated_rerun(df, as_of):
+    confirm_days = 3
+    detections = asof_backtest.replay_detections(df, confirm_days=confirm_days, backend='numpy')
+
+    # A truncated run knows a flag once its run of flags has reached confirm_days within the data
+    truncated = df.loc[:as_of]
+    expected = set()
+    for flags in threshold_flags(truncated['Price'], truncated['log_returns'], backend='numpy'):
+        # Length of the run of flags each day belongs to, within the truncated data
+        run = 0
+        lengths = np.zeros(len(flags), dtype=int)
+        for i, flag in enumerate(flags):
+            run = run + 1 if flag else 0
+            lengths[i] = run
+        for i in range(len(flags) - 1, -1, -1):
+            if flags[i] and i + 1 < len(flags) and flags[i + 1]:
+                lengths[i] = lengths[i + 1]
+        expected.update(truncated.index[flags & (lengths >= confirm_days)])
+
+    assert asof_backtest.visible_change_points(detections, as_of) == sorted(expected)
@@ -0,0 +1,18 @@
+"""Tests for the block bootstrap of change point dates."""
+
+import numpy as np
+import pandas as pd
+
+from change_point_bootstrap import bootstrap_change_points
+
+def test_unmatched_change_point_has_no_interval():
+    # A flat series never triggers either detector, so no replicate finds the change point
+    dates = pd.bdate_range('2000-01-03', periods=600)
+    df = pd.DataFrame({'Price': 50.0, 'log_returns': 0.0}, index=dates)
+
+    results = bootstrap_change_points(df, [dates[300]], n_replicates=4, chunk_size=4, max_workers=1)
+
+    row = results.iloc[0]
+    assert row['detection_rate'] == 0
+    assert pd.isna(row['ci_lower']) and pd.isna(row['ci_upper'])
+    assert np.isnan(row['ci_width_days'])
@@ -0,0 +1,86 @@
+"""Tests for merging detector flags into change point episodes."""
+
+import numpy as np
+import pandas as pd
+
+import simple_change_point_analysis as simple_cp
+from detection_kernels import threshold_flags
+
+def reference_episodes(price_positions, vol_positions, max_gap, price_scores, vol_scores):
+    """Episodes built day by day: (start, peak, end, n_flags, max_score, detectors)."""
+    sources = {}
+    for position in price_positions:
+        sources[position] = sources.get(position, set()) | {'price'}
+    for position in vol_positions:
+        sources[position] = sources.get(position, set()) | {'volatility'}
+
+    groups = []
+    for position in sorted(sources):
+        if groups and position - groups[-1][-1] <= max_gap + 1:
+            groups[-1].append(position)
+        else:
+            groups.append([position])
+
+    episodes = []
+    for group in groups:
+        day_scores = [np.nan_to_num(np.fmax(price_scores[p], vol_scores[p])) for p in group]
+        peak = group[int(np.argmax(day_scores))]
+        detectors = set().union(*(sources[p] for p in group))
+        label = 'both' if len(detectors) == 2 else detectors.pop()
+        episodes.append((group[0], peak, group[-1], len(group), max(day_scores), label))
+    return episodes
+
+def test_matches_day_by_day_grouping():
+    rng = np.random.default_rng(3)
+    n = 500
+    df = pd.DataFrame({'Price': 1.0}, index=pd.bdate_range('2000-01-03', periods=n))
+    price_positions = np.flatnonzero(rng.random(n) < 0.1)
+    vol_positions = np.flatnonzero(rng.random(n) < 0.05)
+    scores = (rng.random(n) * 5, np.where(rng.random(n) < 0.5, np.nan, rng.random(n) * 5))
+
+    episodes = simple_cp.build_change_point_episodes(df, df.index[price_positions], df.index[vol_positions],
+                                                     max_gap=3, scores=scores)
+
+    expected = reference_episodes(price_positions, vol_positions, 3, *scores)
+    dates = df.index
+    assert len(episodes) == len(expected)
+    for row, (start, peak, end, n_flags, max_score, label) in zip(episodes.itertuples(), expected):
+        assert (row.start, row.peak, row.end) == (dates[start], dates[peak], dates[end])
+        assert row.n_flags == n_flags and row.detectors == label
+        assert np.isclose(row.max_score, max_score)
+
+def test_positions_and_dates_give_the_same_episodes():
+    df = pd.DataFrame({'Price': 1.0}, index=pd.bdate_range('2000-01-03', periods=50))
+    price_positions = np.array([3, 4, 5, 20, 30])
+    vol_positions = np.array([5, 9, 40])
+
+    from_positions = simple_cp.build_change_point_episodes(df, price_positions, vol_positions, max_gap=3)
+    from_dates = simple_cp.build_change_point_episodes(df, list(df.index[price_positions]),
+                                                       list(df.index[vol_positions]), max_gap=3)
+
+    pd.testing.assert_frame_equal(from_positions, from_dates)
+    # Days 3-9 form one episode (gap of 3); without scores the middle flagged day is the peak
+    assert from_positions['peak'].tolist() == list(df.index[[4, 20, 30, 40]])
+    assert from_positions['detectors'].tolist() == ['both', 'price', 'price', 'volatility']
+
+def test_no_flags_give_no_episodes():
+    df = pd.DataFrame({'Price': 1.0}, index=pd.bdate_range('2000-01-03', periods=10))
+
+    episodes = simple_cp.build_change_point_episodes(df, [], [])
+
+    assert episodes.empty and 'peak' in episodes.columns
+
+def test_kernel_flags_give_the_pipeline_episodes():
+    rng = np.random.default_rng(4)
+    returns = rng.normal(0, 0.01, 2000) * np.where(np.arange(2000) > 1000, 4.0, 1.0)
+    prices = 60 * np.exp(np.cumsum(returns))
+    df = pd.DataFrame({'Price': prices, 'log_returns': np.concatenate([[np.nan], np.diff(np.log(prices))])},
+                      index=pd.bdate_range('2000-01-03', periods=2000))
+
+    episodes = simple_cp.detect_change_point_episodes(df)
+
+    price_flags, vol_flags = threshold_flags(df['Price'], df['log_returns'], backend='numpy')
+    from_flags = simple_cp.build_change_point_episodes(df, np.flatnonzero(price_flags), np.flatnonzero(vol_flags),
+                                                       scores=simple_cp.change_point_scores(df))
+    assert len(episodes) > 0
+    pd.testing.assert_frame_equal(episodes, from_flags)
@@ -0,0 +1,41 @@
+"""Tests for the event interval index and the near-date endpoints."""
+
+import os
+
+import pytest
+
+from conftest import ROOT
+from event_index import EventIndex
+
+def test_negative_days_match_nothing():
+    index = EventIndex(['2020-01-01', '2020-01-10', '2020-02-01'])
+
+    query_positions, event_rows, offsets = index.matches(['2020-01-05', '2020-01-10'], -5)
+
+    assert len(query_positions) == len(event_rows) == len(offsets) == 0
+
+def test_per_query_days_with_negative_entry():
+    index = EventIndex(['2020-01-01', '2020-01-10', '2020-02-01'])
+
+    query_positions, event_rows, offsets = index.matches(['2020-01-05', '2020-01-10'], [-1, 0])
+
+    assert query_positions.tolist() == [1]
+    assert event_rows.tolist() == [1]
+    assert offsets.tolist() == [0]
+
+@pytest.fixture
+def client():
+    app = pytest.importorskip('app')
+    app.DATA_DIR = os.path.join(ROOT, 'data')
+    return app.app.test_client()
+
+def test_near_date_rejects_negative_days(client):
+    response = client.get('/api/events/near-date?date=2020-01-01&days=-5')
+    assert response.status_code == 400
+
+def test_near_dates_rejects_negative_days(client):
+    response = client.post('/api/events/near-dates', json={'dates': ['2020-01-01'], 'days': -5})
+    assert response.status_code == 400
+
+    response = client.post('/api/events/near-dates', json={'dates': ['2020-01-01'], 'days': [-5]})
+    assert response.status_code == 400
@@ -0,0 +1,56 @@
+"""Tests for the vectorized event study against per-event loops."""
+
+import numpy as np
+import pytest
+
+from event_study import compute_event_impact, gather_windows, parse_windows
+
+def reference_impact(returns, position, start_offset, end_offset, estimation_days):
+    """One event's statistics computed directly from its window slices."""
+    start = max(position + start_offset, 0)
+    stop = min(position + end_offset + 1, len(returns))
+    car = returns[start:stop].sum()
+    estimation = returns[max(start - estimation_days, 0):start]
+    abnormal = car - estimation.mean() * (stop - start)
+    pre_vol = returns[start:position].std(ddof=1)
+    post_vol = returns[position:stop].std(ddof=1)
+    return car, abnormal, pre_vol, post_vol
+
+def test_matches_per_event_loop():
+    returns = np.random.default_rng(1).normal(0, 0.02, 1000)
+    positions = np.array([400, 600, 990, 700])
+
+    impact = compute_event_impact(returns, positions, windows=((-30, 30),), estimation_days=250)['-30:+30']
+
+    for i, position in enumerate(positions):
+        car, abnormal, pre_vol, post_vol = reference_impact(returns, position, -30, 30, 250)
+        assert np.isclose(impact['cumulative_return'][i], car)
+        assert np.isclose(impact['abnormal_return'][i], abnormal)
+        assert np.isclose(impact['pre_volatility'][i], pre_vol)
+        assert np.isclose(impact['post_volatility'][i], post_vol)
+    # The window of the event at 990 runs past the end of the series
+    assert impact['complete'].tolist() == [True, True, False, True]
+    assert impact['observations'][2] == 40
+
+def test_uncovered_event_is_nan():
+    returns = np.random.default_rng(2).normal(0, 0.02, 300)
+
+    impact = compute_event_impact(returns, np.array([-1, 150]), windows=((-5, 5),))['-5:+5']
+
+    assert np.isnan(impact['cumulative_return'][0]) and np.isnan(impact['vol_change_pct'][0])
+    assert impact['observations'].tolist() == [0, 11]
+
+def test_gather_windows_pads_edges():
+    values = np.arange(1.0, 11.0)
+
+    windows = gather_windows(values, np.array([0, 5, 9, -1]), -2, 2)
+
+    assert windows[0].tolist() == [0.0, 0.0, 1.0, 2.0, 3.0]
+    assert windows[1].tolist() == [4.0, 5.0, 6.0, 7.0, 8.0]
+    assert windows[2].tolist() == [8.0, 9.0, 10.0, 0.0, 0.0]
+    assert np.isnan(windows[3]).all()
+
+def test_parse_windows_requires_event_day():
+    assert parse_windows('-5:5,-30:30') == ((-5, 5), (-30, 30))
+    with pytest.raises(ValueError):
+        parse_windows('1:5')
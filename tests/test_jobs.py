@@ -0,0 +1,75 @@
+"""Tests for the background analysis job queue."""
+
+import os
+import time
+
+import pytest
+
+from conftest import ROOT
+
+jobs = pytest.importorskip('jobs')
+
+PATHS = {'data_dir': os.path.join(ROOT, 'data')}
+
+def test_validate_params_fills_defaults_and_rejects_bad_values():
+    params = jobs.validate_params('detection', {'price_window': 126})
+    assert params['price_window'] == 126 and params['vol_window'] == 60
+
+    for kind, params in [('unknown', {}), ('detection', {'window': 5}),
+                         ('detection', {'price_window': 10}), ('detection', {'price_window': 1.5}),
+                         ('bayesian', {'method': 'nuts'})]:
+        with pytest.raises(ValueError):
+            jobs.validate_params(kind, params)
+
+def test_final_state_is_never_changed(tmp_path):
+    root = str(tmp_path)
+    jobs.update_status(root, 'job1', status='running', progress=0.5)
+    jobs.update_status(root, 'job1', status='succeeded', progress=1.0)
+
+    status = jobs.update_status(root, 'job1', status='cancelled', message="Cancelling")
+
+    assert status['status'] == 'succeeded' and status['progress'] == 1.0
+
+def test_detection_job_stores_a_run(tmp_path):
+    root = str(tmp_path / 'jobs')
+    os.makedirs(root)
+    params = jobs.validate_params('detection', {'n_permutations': 0})
+    jobs.update_status(root, 'job1', status='queued')
+
+    jobs.run_job(root, 'job1', 'detection', params, {**PATHS, 'reports_dir': str(tmp_path)})
+
+    queue = jobs.JobQueue(root)
+    assert queue.status('job1')['status'] == 'succeeded'
+    result = queue.result('job1')
+    assert result['n_change_points'] == len(result['episodes']) > 0
+    assert os.path.exists(tmp_path / 'brent_results.db')
+
+def test_cancel_request_before_start(tmp_path):
+    root = str(tmp_path)
+    jobs.update_status(root, 'job1', status='queued')
+    open(os.path.join(root, 'job1.cancel'), 'w').close()
+
+    jobs.run_job(root, 'job1', 'detection', jobs.validate_params('detection', {}),
+                 {**PATHS, 'reports_dir': root})
+
+    assert jobs.JobQueue(root).status('job1')['status'] == 'cancelled'
+
+def test_queue_runs_job_in_worker_process(tmp_path):
+    queue = jobs.JobQueue(str(tmp_path / 'jobs'))
+    try:
+        status = queue.submit('detection', {'n_permutations': 0}, {**PATHS, 'reports_dir': str(tmp_path)})
+        deadline = time.time() + 60
+        while queue.status(status['job_id'])['status'] not in jobs.FINAL_STATES and time.time() < deadline:
+            time.sleep(0.1)
+
+        assert queue.status(status['job_id'])['status'] == 'succeeded'
+        assert queue.list(status='succeeded')[0]['job_id'] == status['job_id']
+        assert queue.status('missing') is None
+    finally:
+        queue.shutdown(wait=True)
+
+def test_full_queue_rejects_submissions(tmp_path):
+    queue = jobs.JobQueue(str(tmp_path), max_pending=0)
+
+    with pytest.raises(jobs.QueueFull):
+        queue.submit('detection', {}, {**PATHS, 'reports_dir': str(tmp_path)})
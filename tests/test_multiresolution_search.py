@@ -0,0 +1,38 @@
+"""Tests for the coarse-to-fine change point search."""
+
+import numpy as np
+import pandas as pd
+
+from change_point_bootstrap import detect_batch
+from multiresolution_search import detect_at, hierarchical_change_points
+
+def synthetic_prices(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0, 0.01, n) * np.where((np.arange(n) // 500) % 2, 3.0, 1.0)
+    prices = 60 * np.exp(np.cumsum(returns))
+    log_returns = np.concatenate([[np.nan], np.diff(np.log(prices))])
+    return pd.DataFrame({'Price': prices, 'log_returns': log_returns},
+                        index=pd.bdate_range('2000-01-03', periods=n))
+
+def test_detect_at_matches_full_detection():
+    df = synthetic_prices()
+    prices = df['Price'].to_numpy()
+    returns = np.nan_to_num(df['log_returns'].to_numpy())
+    bar_starts = np.append(np.arange(0, len(df), 5), len(df))
+
+    full = detect_batch(prices[None], returns[None])[0]
+    positions = np.arange(len(df))
+
+    assert np.array_equal(detect_at(positions, prices, returns, bar_starts), full)
+
+def test_refined_search_only_reports_full_detections():
+    df = synthetic_prices()
+    prices = df['Price'].to_numpy()
+    returns = np.nan_to_num(df['log_returns'].to_numpy())
+    full = set(df.index[detect_batch(prices[None], returns[None])[0]])
+
+    change_points, stats = hierarchical_change_points(df, coarse_threshold_scale=1.0, max_fine_fraction=1.0)
+
+    assert stats['mode'] == 'refined'
+    assert stats['fine_fraction'] < 1.0
+    assert set(change_points) <= full
@@ -0,0 +1,32 @@
+"""Tests for the Monte Carlo change point / event proximity test."""
+
+import numpy as np
+import pandas as pd
+
+from proximity_significance import nearest_distance, proximity_significance
+
+EVENTS = pd.DataFrame({
+    'Date': ['2001-03-01', '2001-06-15', '2002-01-10'],
+    'Category': ['OPEC', 'Conflict', 'OPEC']
+})
+SPAN = ('2001-01-01', '2002-12-31')
+
+def test_nearest_distance_with_empty_side():
+    assert nearest_distance(np.empty((2, 0)), np.ones((2, 3))).shape == (2, 3)
+    assert nearest_distance(np.ones((2, 3)), np.empty((2, 0))).shape == (2, 0)
+
+def test_no_change_points():
+    results = proximity_significance([], EVENTS, SPAN, n_simulations=50, max_workers=1)
+
+    assert results['scope'].tolist() == ['overall', 'Conflict', 'OPEC', 'change_points']
+    assert (results['observed_matches'] == 0).all()
+    assert (results['expected_matches'] == 0).all()
+    assert results['n_items'].tolist() == [3, 1, 2, 0]
+
+def test_span_without_events():
+    results = proximity_significance(['2005-05-02'], EVENTS, ('2005-01-01', '2005-12-31'),
+                                     n_simulations=50, max_workers=1)
+
+    assert (results['observed_matches'] == 0).all()
+    assert results['n_items'].tolist() == [0, 0, 0, 1]
+    assert np.isnan(results['z_score']).all()
@@ -0,0 +1,29 @@
+"""Tests for the stored results endpoints."""
+
+import os
+
+import pytest
+
+from conftest import ROOT
+from results_store import ResultsStore
+
+@pytest.fixture
+def client(tmp_path):
+    app = pytest.importorskip('app')
+    with ResultsStore(str(tmp_path / 'brent_results.db')) as store:
+        run_id = store.start_run('rolling_mean', {'price_window': 252})
+        store.write_change_points(run_id, [])
+        store.finish_run(run_id, 0)
+    app.DATA_DIR = os.path.join(ROOT, 'data')
+    app.REPORTS_DIR = str(tmp_path)
+    return app.app.test_client()
+
+def test_known_run_returns_its_rows(client):
+    response = client.get('/api/results/change-points?run_id=1')
+    assert response.status_code == 200
+    assert response.get_json()['run_id'] == 1
+
+def test_unknown_run_is_not_found(client):
+    for route in ('change-points', 'regime-stats'):
+        response = client.get(f'/api/results/{route}?run_id=999')
+        assert response.status_code == 404
@@ -0,0 +1,33 @@
+"""Tests that the chunked preprocessing reproduces the in-memory pipeline."""
+
+import os
+
+import numpy as np
+import pytest
+
+from conftest import ROOT
+import preprocess_data
+from streaming_preprocess import preprocess_streaming
+
+RAW_FILE = os.path.join(ROOT, 'data', 'BrentOilPrices.csv')
+
+@pytest.fixture(scope='module')
+def in_memory():
+    df = preprocess_data.load_brent_data(RAW_FILE)
+    return preprocess_data.identify_volatility_periods(preprocess_data.calculate_returns(df))
+
+@pytest.mark.parametrize('chunk_rows', [777, 1_000_000])
+def test_streamed_columns_are_bit_identical(tmp_path, in_memory, chunk_rows):
+    streamed = preprocess_streaming(RAW_FILE, str(tmp_path / 'brent.columns'), chunk_rows=chunk_rows).to_frame()
+
+    assert streamed.index.equals(in_memory.index)
+    assert streamed.columns.tolist() == in_memory.columns.tolist()
+    for column in in_memory.columns:
+        expected = in_memory[column].to_numpy()
+        actual = streamed[column].to_numpy()
+        assert actual.dtype == expected.dtype, column
+        if expected.dtype.kind == 'f':
+            # Same bits, NaN included
+            assert np.array_equal(actual.view(np.int64), expected.view(np.int64)), column
+        else:
+            assert np.array_equal(actual, expected), column